@@ -1,112 +1,158 @@
 import requests
 import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from instrument import failure, start, timer
+from http_policy import get
+
+BASE_URL = "https://api.bseindia.com/BseIndiaAPI/api/MktCapBoard_indstream/w?cat={cat}&type=2"
+CATEGORIES = [1, 2, 3]
+
+headers = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:136.0) Gecko/20100101 Firefox/136.0",
+    "Referer": "https://www.bseindia.com/"
+}
+
+# Payload keys per block: name, value, change, change %, previous close, 52w high, 52w low.
+# EOD rows carry no 52 week range.
+FIELD_MAP = {
+    "RealTime": ("IndexName", "Curvalue", "Chg", "ChgPer", "Prev_Close", "Week52High", "Week52Low"),
+    "EOD": ("IndicesWatchName", "Curvalue", "CHNG", "CHNGPER", "PrevDayClose", None, None),
+}
+
+
+class BseRecord:
+    """One board row with numbers kept as floats until the CSV is rendered"""
+
+    __slots__ = ("name", "ltp", "chg", "chg_pct", "prev_close", "week52_high", "week52_low")
+
+    def __init__(self, name, ltp, chg, chg_pct, prev_close, week52_high=None, week52_low=None):
+        self.name = name
+        self.ltp = ltp
+        self.chg = chg
+        self.chg_pct = chg_pct
+        self.prev_close = prev_close
+        self.week52_high = week52_high
+        self.week52_low = week52_low
+
+    @classmethod
+    def from_item(cls, item, keys):
+        """Parse one payload row; raises ValueError/TypeError on a malformed number"""
+        name_key, ltp_key, chg_key, pct_key, prev_key, high_key, low_key = keys
+        return cls(
+            (item.get(name_key) or "").strip(),
+            float(item.get(ltp_key, 0)),
+            float(item.get(chg_key, 0)),
+            float(item.get(pct_key, 0)),
+            float(item.get(prev_key, 0)),
+            optional_float(item.get(high_key, 0)) if high_key else None,
+            optional_float(item.get(low_key, 0)) if low_key else None,
+        )
+
+
+def optional_float(value):
+    """52 week values are allowed to be '-' or blank; those become None"""
+    if value in ("-", "", None):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class CategoryResult:
+    __slots__ = ("category", "records", "failures", "error", "seconds")
+
+    def __init__(self, category):
+        self.category = category
+        self.records = []
+        self.failures = []
+        self.error = None
+        self.seconds = 0.0
+
+
+def parse_category(data, result):
+    for block, keys in FIELD_MAP.items():
+        for item in data.get(block) or []:
+            try:
+                result.records.append(BseRecord.from_item(item, keys))
+            except (TypeError, ValueError) as e:
+                result.failures.append(f"{item.get(keys[0], '?')}: {e}")
+
+
+def fetch_category(session, cat):
+    result = CategoryResult(cat)
+    start = time.perf_counter()
+    try:
+        response = get(BASE_URL.format(cat=cat), session=session)
+        response.raise_for_status()
+        with timer('parse'):
+            parse_category(response.json(), result)
+    except (requests.RequestException, ValueError) as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def make_session():
+    session = requests.Session()
+    session.headers.update(headers)
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=len(CATEGORIES)))
+    return session
+
 
 def fetch_bse_data():
-    urls = [
-        "https://api.bseindia.com/BseIndiaAPI/api/MktCapBoard_indstream/w?cat=1&type=2",
-        "https://api.bseindia.com/BseIndiaAPI/api/MktCapBoard_indstream/w?cat=2&type=2",
-        "https://api.bseindia.com/BseIndiaAPI/api/MktCapBoard_indstream/w?cat=3&type=2"
+    """Fetch every board category concurrently over one pooled session, in category order"""
+    with make_session() as session, ThreadPoolExecutor(max_workers=len(CATEGORIES)) as pool:
+        results = list(pool.map(lambda cat: fetch_category(session, cat), CATEGORIES))
+
+    for r in results:
+        status = f"error: {r.error}" if r.error else f"{len(r.records)} records, {len(r.failures)} parse failures"
+        print(f"Category {r.category}: {status} ({r.seconds:.2f}s)")
+        if r.error:
+            failure('bse', f"category {r.category}")
+        for skipped in r.failures:
+            failure('bse', skipped.split(':', 1)[0])
+            print(f"  skipped {skipped}")
+    return results
+
+
+def transform_data(records):
+    """Render records to CSV rows"""
+    def fmt(value):
+        return "-" if value is None else f"{value:.2f}"
+
+    return [
+        [r.name, fmt(r.ltp), fmt(r.chg), fmt(r.chg_pct), fmt(r.prev_close), fmt(r.week52_high), fmt(r.week52_low)]
+        for r in records
     ]
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:136.0) Gecko/20100101 Firefox/136.0",
-        "Referer": "https://www.bseindia.com/"
-    }
-    
-    all_data = []
-    for url in urls:
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Handle RealTime data
-                if "RealTime" in data:
-                    for item in data["RealTime"]:
-                        all_data.append({
-                            "IndexName": item.get("IndexName", "").strip(),
-                            "Curvalue": item.get("Curvalue", 0),
-                            "Chg": item.get("Chg", 0),
-                            "ChgPer": item.get("ChgPer", 0),
-                            "Prev_Close": item.get("Prev_Close", 0),
-                            "Week52High": item.get("Week52High", 0),
-                            "Week52Low": item.get("Week52Low", 0)
-                        })
-                
-                # Handle EOD data
-                if "EOD" in data:
-                    for item in data["EOD"]:
-                        all_data.append({
-                            "IndexName": item.get("IndicesWatchName", "").strip(),
-                            "Curvalue": item.get("Curvalue", 0),
-                            "Chg": item.get("CHNG", 0),
-                            "ChgPer": item.get("CHNGPER", 0),
-                            "Prev_Close": item.get("PrevDayClose", 0),
-                            "Week52High": "-",
-                            "Week52Low": "-"
-                        })
-                        
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
-            continue
-    
-    return all_data
-
-def transform_data(original_data):
-    if not original_data:
-        return []
-    
-    transformed = []
-    for item in original_data:
-        week52high = item.get("Week52High", "-")
-        week52low = item.get("Week52Low", "-")
-        
-        if week52high != "-" and week52high != "":
-            try:
-                week52high = f'{float(week52high):.2f}'
-            except:
-                week52high = "-"
-        
-        if week52low != "-" and week52low != "":
-            try:
-                week52low = f'{float(week52low):.2f}'
-            except:
-                week52low = "-"
-        
-        try:
-            row = [
-                item.get("IndexName", "-"),
-                f'{float(item.get("Curvalue", 0)):.2f}',
-                f'{float(item.get("Chg", 0)):.2f}',
-                f'{float(item.get("ChgPer", 0)):.2f}',
-                f'{float(item.get("Prev_Close", 0)):.2f}',
-                week52high,
-                week52low
-            ]
-            transformed.append(row)
-        except:
-            continue
-    
-    return transformed
+
 
 def save_to_csv(data, filename="Data/BSE.csv"):
     os.makedirs(os.path.dirname(filename), exist_ok=True)
-    
+
     csv_headers = ["Index", "LTP", "CHNG", "%", "PREV.", "YR HI", "YR LO"]
-    
+
     with open(filename, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(csv_headers)
         writer.writerows(data)
-        
+
         timestamp = (datetime.now() + timedelta(hours=5, minutes=30)).strftime("%d-%b %H:%M")
         writer.writerow(["", "", "", "", "", "Update Time", timestamp])
 
 if __name__ == "__main__":
-    raw_data = fetch_bse_data()
-    print(f"Total records fetched: {len(raw_data)}")
-    processed_data = transform_data(raw_data)
-    save_to_csv(processed_data)
+    start()
+    results = fetch_bse_data()
+    records = [record for r in results for record in r.records]
+    print(f"Total records fetched: {len(records)}")
+    processed_data = transform_data(records)
+    with timer('write'):
+        save_to_csv(processed_data)
     print(f"CSV saved with {len(processed_data)} records")
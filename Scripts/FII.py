@@ -1,11 +1,15 @@
 import requests
 import csv
-import time
+import os
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
 import calendar
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from http_policy import get
+
 # Set up logging - Reduce verbosity
 logging.basicConfig(
     level=logging.INFO,
@@ -67,40 +71,34 @@ def get_primary_and_fallback_dates():
     
     return primary_url, primary_date_str, fallback_url, fallback_date_str
 
-def fetch_url_with_retries(url, description, max_retries=3, delay=3):
-    """Fetch URL with retry logic."""
+def fetch_url(url, description):
+    """Fetch URL; transient failures are retried by the shared request policy."""
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     }
     
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Attempt {attempt + 1}/{max_retries}: {description}")
-            response = requests.get(url, headers=headers, timeout=30, verify=True)
-            
-            # Check for 400/404 errors
-            if response.status_code in [400, 404]:
-                logger.info(f"URL not available (HTTP {response.status_code})")
-                time.sleep(delay)
-                continue
-            
-            response.raise_for_status()
-            
-            # Check if page contains valid data
-            if len(response.text) < 5000 or "No Data" in response.text:
-                logger.info("Page exists but no valid data found")
-                time.sleep(delay)
-                continue
-            
-            logger.info(f"Successfully fetched {len(response.text):,} characters")
-            return response.text
-            
-        except requests.exceptions.RequestException as e:
-            logger.info(f"Attempt failed: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(delay)
-    
-    return None
+    try:
+        logger.info(description)
+        response = get(url, headers=headers)
+        
+        # A report that is not published yet will not appear on a retry
+        if response.status_code in [400, 404]:
+            logger.info(f"URL not available (HTTP {response.status_code})")
+            return None
+        
+        response.raise_for_status()
+        
+        # Check if page contains valid data
+        if len(response.text) < 5000 or "No Data" in response.text:
+            logger.info("Page exists but no valid data found")
+            return None
+        
+        logger.info(f"Successfully fetched {len(response.text):,} characters")
+        return response.text
+        
+    except requests.exceptions.RequestException as e:
+        logger.info(f"Request failed: {e}")
+        return None
 
 def try_fetch_data():
     """Try to fetch data from primary and fallback URLs."""
@@ -112,15 +110,15 @@ def try_fetch_data():
     logger.info("-" * 50)
     
     # Try primary URL with retries
-    html_content = fetch_url_with_retries(primary_url, f"Trying primary URL", 3, 3)
+    html_content = fetch_url(primary_url, "Trying primary URL")
     
     if html_content:
         return html_content, primary_url, primary_date
     
     logger.info("Primary URL failed, trying fallback...")
     
-    # Try fallback URL with retries
-    html_content = fetch_url_with_retries(fallback_url, f"Trying fallback URL", 3, 3)
+    # Try fallback URL
+    html_content = fetch_url(fallback_url, "Trying fallback URL")
     
     if html_content:
         return html_content, fallback_url, fallback_date
@@ -0,0 +1,76 @@
+"""
+Scaling curve of iv_batch.run_batch across worker counts.
+
+Builds synthetic chains (symbols x expiries x snapshots) from a known smile,
+solves them with 1..N worker processes and reports rows/s and speedup over the
+single-process run. Results are checked against the single-process output.
+
+    python Scripts/bench_iv_batch.py
+    python Scripts/bench_iv_batch.py --chains 400 --strikes 120 --workers 1,2,4,8
+    python Scripts/bench_iv_batch.py --backend numpy
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from iv_batch import ChainBatch, run_batch
+from iv_calculator import black76_price, set_backend
+
+
+def build_batch(chains, strikes, seed=7):
+    rng = np.random.default_rng(seed)
+    batch = ChainBatch()
+    for i in range(chains):
+        forward = 25000 * (1 + rng.normal(0, 0.01))
+        T = rng.uniform(1, 90) / 365
+        K = np.round(forward / 50) * 50 + 50 * np.arange(-(strikes // 2), strikes - strikes // 2)
+        k = np.log(K / forward)
+        vol = 0.12 - 0.1 * k + 0.4 * k * k
+        calls = np.round(black76_price(forward, K, T, vol, 0.0, True), 2)
+        puts = np.round(black76_price(forward, K, T, vol, 0.0, False), 2)
+        batch.add(i, K, calls, puts, forward, T)
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark process-pool IV batches")
+    parser.add_argument("--chains", type=int, default=200)
+    parser.add_argument("--strikes", type=int, default=100)
+    parser.add_argument("--workers", default=",".join(str(w) for w in sorted({1, 2, 4, os.cpu_count() or 1})))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", default="auto", help="IV kernels: auto, numba or numpy")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    backend = set_backend(args.backend)
+    batch = build_batch(args.chains, args.strikes)
+    print(f"{len(batch)} chains, {batch.rows} strikes, {os.cpu_count()} CPUs, {backend} kernels")
+    baseline, reference, results = None, None, []
+    for workers in [int(w) for w in args.workers.split(",")]:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            out = run_batch(batch, workers)
+            best = min(best, time.perf_counter() - start)
+        if reference is None:
+            reference = out
+        mismatch = max(np.nanmax(np.abs(out[k]['iv'] - reference[k]['iv'])) for k in batch.keys)
+        baseline = baseline or best
+        results.append({'workers': workers, 'seconds': best, 'rows_per_s': batch.rows / best,
+                        'speedup': baseline / best, 'max_diff': float(mismatch)})
+
+    print(f"{'Workers':>8} {'Seconds':>9} {'Rows/s':>11} {'Speedup':>8} {'Max diff':>9}")
+    for r in results:
+        print(f"{r['workers']:>8} {r['seconds']:>9.3f} {r['rows_per_s']:>11,.0f} "
+              f"{r['speedup']:>7.2f}x {r['max_diff']:>9.1e}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+End-to-end benchmark of the watch-list refresh against recorded responses.
+
+Starts the http_replay stand-in over the recorded fixtures, then runs every
+watch-list fetcher in turn, as the scheduler does, each in its own process with
+its HTTP redirected to the stand-in. Scripts run in a scratch copy of Data/,
+so the repo's outputs are left alone. Reports wall time per script and in
+total, and the requests and bytes that crossed the wire.
+
+    python Scripts/http_replay.py record Scripts/nseindices.py   # once per script, online
+    python Scripts/bench_watchlist.py
+    python Scripts/bench_watchlist.py --latency 0.08 --jitter 0.04 --error-rate 0.02 --repeat 3
+    python Scripts/bench_watchlist.py --scripts nseindices.py BSE.py --json bench.json
+
+fetch_emails.py is not included: it speaks IMAP, see bench_email.py.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from http_replay import FIXTURE_DIR, ReplayServer, load_fixtures
+from scheduler import SCHEDULE
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPTS_DIR, '..', 'Data')
+WATCHLIST = [s.script for s in SCHEDULE if s.script != 'fetch_emails.py'] + ['nav_fetch.py', 'FII.py']
+
+
+def scratch_dir():
+    """Temporary working directory holding a copy of the repo's Data/ files"""
+    workdir = tempfile.mkdtemp(prefix='bench_watchlist_')
+    shutil.copytree(DATA_DIR, os.path.join(workdir, 'Data'),
+                    ignore=shutil.ignore_patterns('fixtures', 'chain_store', '*.db'))
+    return workdir
+
+
+def run_once(server, scripts, verbose=False):
+    server.reset_stats()
+    workdir = scratch_dir()
+    env = dict(os.environ, REPORT_DIR=os.path.join(workdir, 'Data', 'reports'))
+    timings = []
+    try:
+        start = time.perf_counter()
+        for script in scripts:
+            t = time.perf_counter()
+            code = subprocess.call(
+                [sys.executable, os.path.join(SCRIPTS_DIR, 'http_replay.py'), 'run', '--server', server.url,
+                 os.path.join(SCRIPTS_DIR, script)],
+                cwd=workdir, env=env,
+                stdout=None if verbose else subprocess.DEVNULL, stderr=None if verbose else subprocess.DEVNULL)
+            timings.append({'script': script, 'seconds': round(time.perf_counter() - t, 3), 'exit_code': code})
+        wall = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {'wall_seconds': round(wall, 3), 'scripts': timings, **server.stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the watch-list refresh against recorded responses")
+    parser.add_argument('--fixtures', default=FIXTURE_DIR)
+    parser.add_argument('--scripts', nargs='+', default=WATCHLIST)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='+/- seconds around the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with a 503')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true', help="show the scripts' output")
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures['exact']:
+        print(f"No fixtures in {args.fixtures}; record some first with http_replay.py record")
+        sys.exit(1)
+    print(f"{len(fixtures['exact'])} fixtures, latency {args.latency}s ±{args.jitter}s, "
+          f"error rate {args.error_rate:.0%}, {len(args.scripts)} scripts")
+
+    runs = []
+    with ReplayServer(fixtures, args.latency, args.jitter, args.error_rate, args.seed) as server:
+        for i in range(args.repeat):
+            result = run_once(server, args.scripts, args.verbose)
+            runs.append(result)
+            print(f"run {i + 1}: {result['wall_seconds']:.2f}s wall, {result['requests']} requests, "
+                  f"{result['bytes_sent'] / 1e3:.1f} kB down, {result['bytes_received'] / 1e3:.1f} kB up, "
+                  f"{result['errors']} injected errors, {result['misses']} unrecorded")
+
+    best = min(runs, key=lambda r: r['wall_seconds'])
+    print(f"\n{'script':<22}{'seconds':>9}  exit")
+    for row in best['scripts']:
+        print(f"{row['script']:<22}{row['seconds']:>9.2f}  {row['exit_code']}")
+    print(f"{'total':<22}{best['wall_seconds']:>9.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+                       'best': best, 'runs': runs}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
-import requests
 import csv
 import os
+import sys
 from datetime import datetime
 import pytz
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from http_policy import get
+
 url = "https://oxide.sensibull.com/v1/compute/cache/fii_dii_daily"
-response = requests.get(url)
+response = get(url)
 data = response.json()
 
 os.makedirs("Data", exist_ok=True)
@@ -0,0 +1,141 @@
+"""
+Memory-mapped columnar store of intraday option chain snapshots.
+
+One directory per symbol and expiry, Data/chain_store/<symbol>/<expiry>/, holds
+
+    meta.json      strikes, field names, row count and capacity
+    times.npy      int64 snapshot times (epoch seconds), one per row
+    <field>.npy    float32 [capacity x strikes] per strike field (call_ltp, put_oi, iv, ...)
+    <field>.npy    float64 [capacity] per snapshot field (spot, forward)
+
+Files are .npy so np.load(mmap_mode='r') opens them without reading; history()
+returns a strided view into the mapped file, so slicing one strike's IV over a
+whole expiry never parses or loads anything else. Capacity doubles when full and
+a snapshot with new strikes widens the strike axis; both rewrite the files once.
+The row count in meta.json is written last, so a crash mid-append leaves the
+previous snapshots intact.
+"""
+import json
+import os
+import numpy as np
+
+ROOT = os.path.join('Data', 'chain_store')
+STRIKE_FIELDS = ['call_ltp', 'put_ltp', 'call_oi', 'put_oi', 'call_oi_chng', 'put_oi_chng',
+                 'call_volume', 'put_volume', 'iv']
+SNAPSHOT_FIELDS = ['spot', 'forward']
+INITIAL_CAPACITY = 64
+
+
+class ChainStore:
+    """Snapshots of one symbol/expiry; open with ChainStore(symbol, expiry)"""
+
+    def __init__(self, symbol, expiry, root=ROOT, mode='r+'):
+        self.path = os.path.join(root, symbol, expiry)
+        self.mode = mode
+        meta_path = os.path.join(self.path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.strikes = np.array(meta['strikes'], dtype=np.float64)
+            self.count, self.capacity = meta['count'], meta['capacity']
+        else:
+            self.strikes = np.array([], dtype=np.float64)
+            self.count, self.capacity = 0, 0
+        self._maps = {}
+
+    def __len__(self):
+        return self.count
+
+    def _file(self, name):
+        return os.path.join(self.path, f'{name}.npy')
+
+    def _map(self, name):
+        if name not in self._maps:
+            mode = 'r' if self.mode == 'r' else 'r+'
+            self._maps[name] = np.load(self._file(name), mmap_mode=mode)
+        return self._maps[name]
+
+    def _write_meta(self):
+        meta = {'strikes': self.strikes.tolist(), 'count': self.count, 'capacity': self.capacity,
+                'strike_fields': STRIKE_FIELDS, 'snapshot_fields': SNAPSHOT_FIELDS}
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))
+
+    def _allocate(self, capacity, strikes):
+        """(Re)create every file with `capacity` rows over `strikes`, copying existing rows"""
+        os.makedirs(self.path, exist_ok=True)
+        old_columns = np.searchsorted(strikes, self.strikes)
+        layout = [('times', np.int64, ())] + \
+                 [(f, np.float64, ()) for f in SNAPSHOT_FIELDS] + \
+                 [(f, np.float32, (len(strikes),)) for f in STRIKE_FIELDS]
+        for name, dtype, width in layout:
+            new = np.full((capacity,) + width, np.nan if dtype != np.int64 else 0, dtype=dtype)
+            if self.count:
+                old = self._map(name)[:self.count]
+                if width:
+                    new[:self.count, old_columns] = old
+                else:
+                    new[:self.count] = old
+            self._maps.pop(name, None)
+            tmp = self._file(name) + '.tmp'
+            np.save(tmp, new)  # np.save appends .npy
+            os.replace(tmp + '.npy', self._file(name))
+        self.capacity, self.strikes = capacity, strikes
+        self._write_meta()
+
+    def append(self, timestamp, strikes, columns, spot=np.nan, forward=np.nan):
+        """Add one snapshot; `columns` maps STRIKE_FIELDS to arrays aligned with `strikes`"""
+        strikes = np.asarray(strikes, dtype=np.float64)
+        if self.count and timestamp <= int(self._map('times')[self.count - 1]):
+            return False  # already stored
+        union = np.union1d(self.strikes, strikes)
+        if len(union) != len(self.strikes) or self.count == self.capacity:
+            capacity = max(self.capacity * 2 if self.count == self.capacity else self.capacity, INITIAL_CAPACITY)
+            self._allocate(capacity, union)
+
+        row, cols = self.count, np.searchsorted(self.strikes, strikes)
+        self._map('times')[row] = int(timestamp)
+        self._map('spot')[row] = spot
+        self._map('forward')[row] = forward
+        for name in STRIKE_FIELDS:
+            values = columns.get(name)
+            if values is not None:
+                self._map(name)[row, cols] = values
+        for m in self._maps.values():
+            m.flush()
+        self.count += 1
+        self._write_meta()
+        return True
+
+    @property
+    def times(self):
+        return self._map('times')[:self.count] if self.count else np.array([], dtype=np.int64)
+
+    def field(self, name):
+        """[snapshots x strikes] view of a strike field, or [snapshots] of a snapshot field"""
+        return self._map(name)[:self.count]
+
+    def history(self, name, strike):
+        """(times, values) of one strike's field across all snapshots, as views into the files"""
+        i = int(np.searchsorted(self.strikes, strike))
+        if i == len(self.strikes) or self.strikes[i] != strike:
+            raise KeyError(f"Strike {strike} not in {self.path}")
+        return self.times, self.field(name)[:, i]
+
+    def snapshot(self, timestamp):
+        """{field: row} of the last snapshot at or before `timestamp`"""
+        row = int(np.searchsorted(self.times, timestamp, side='right')) - 1
+        if row < 0:
+            raise KeyError(f"No snapshot at or before {timestamp}")
+        return {name: self.field(name)[row] for name in ['times'] + SNAPSHOT_FIELDS + STRIKE_FIELDS}
+
+
+def list_stores(root=ROOT):
+    """[(symbol, expiry)] of every store under `root`"""
+    if not os.path.isdir(root):
+        return []
+    return [(symbol, expiry) for symbol in sorted(os.listdir(root))
+            for expiry in sorted(os.listdir(os.path.join(root, symbol)))
+            if os.path.exists(os.path.join(root, symbol, expiry, 'meta.json'))]
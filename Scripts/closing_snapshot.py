@@ -0,0 +1,109 @@
+"""
+Fortnight closing snapshot: resolves the tracked index names against Data/BSE.csv
+and Data/nse_all_indices.csv and writes Data/QuarterlyClosing.csv.
+
+Each source is read once into a hash index keyed by exact and by normalized
+(case/whitespace-folded) name, so every lookup is a dict hit. Lookup order per
+name is BSE exact, NSE exact, BSE normalized, NSE normalized.
+
+    python Scripts/closing_snapshot.py                     # current CSVs
+    python Scripts/closing_snapshot.py --date 2026-01-01   # as committed at end of that IST day
+"""
+import argparse
+import csv
+import io
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from registry import load_registry, normalize
+
+SOURCES = ["Data/BSE.csv", "Data/nse_all_indices.csv"]
+OUTPUT = "Data/QuarterlyClosing.csv"
+
+CLOSING_INDICES = load_registry().names("fortnight_closing")
+
+
+def ist_now():
+    return datetime.utcnow() + timedelta(hours=5, minutes=30)
+
+
+def read_source(path, at=None):
+    """(CSV text, IST commit time) of `path` as last committed at or before the IST datetime `at`;
+    without `at`, the current file and no commit time"""
+    if at is None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return f.read(), None
+        except FileNotFoundError:
+            return "", None
+    before = at.strftime("%Y-%m-%dT%H:%M:%S+05:30")
+    sha, _, committed = subprocess.run(
+        ["git", "log", "-1", "--format=%H %ct", f"--before={before}", "--", path],
+        capture_output=True, text=True,
+    ).stdout.strip().partition(" ")
+    if not sha:
+        return "", None
+    text = subprocess.run(["git", "show", f"{sha}:{path}"], capture_output=True, text=True).stdout
+    return text, datetime.utcfromtimestamp(int(committed)) + timedelta(hours=5, minutes=30)
+
+
+def load_index(text):
+    """Build {exact name: value} and {normalized name: value} from the first two columns"""
+    exact, folded = {}, {}
+    reader = csv.reader(io.StringIO(text))
+    next(reader, None)  # header
+    for row in reader:
+        if len(row) < 2 or not row[0].strip():
+            continue
+        value = row[1].strip()
+        exact.setdefault(row[0], value)
+        folded.setdefault(normalize(row[0]), value)
+    return exact, folded
+
+
+def resolve(names, indexes):
+    """Resolve every name in one pass; returns [(name, value or 'N/A')]"""
+    results = []
+    for name in names:
+        key = normalize(name)
+        value = next((exact[name] for exact, _ in indexes if exact.get(name)), None)
+        if value is None:
+            value = next((folded[key] for _, folded in indexes if folded.get(key)), "N/A")
+        results.append((name, value))
+    return results
+
+
+def write_snapshot(results, path=OUTPUT, as_of=None):
+    """Write the resolved values, stamped with `as_of` (IST) or the current time"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("Index_Name,Closing_Value\n")
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        writer.writerows(results)
+        writer.writerow(["Update Time (IST):", (as_of or ist_now()).strftime("%d-%b %H:%M")])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the fortnight closing snapshot")
+    parser.add_argument("--date", help="YYYY-MM-DD: read the sources as committed by the end of this IST day")
+    parser.add_argument("--time", default="23:59", help="HH:MM IST cut-off used with --date")
+    parser.add_argument("--output", default=OUTPUT)
+    args = parser.parse_args()
+
+    at = datetime.strptime(f"{args.date} {args.time}", "%Y-%m-%d %H:%M") if args.date else None
+    sources = [read_source(path, at) for path in SOURCES]
+    indexes = [load_index(text) for text, _ in sources]
+    results = resolve(CLOSING_INDICES, indexes)
+    # A historical snapshot is as of the newest source commit it read (or its cut-off), not of today
+    committed = [when for _, when in sources if when is not None]
+    write_snapshot(results, args.output, max(committed) if committed else at)
+
+    for name, value in results:
+        print(f"Looking for: '{name}' -> Found: '{value}'")
+    print(f"Snapshot written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Index constituent tracker with vectorized breadth analytics.
+
+Every index in the registry's breadth_indices group is fetched concurrently from
+NSE's equity-stockIndices endpoint and kept as parallel NumPy columns, one array
+per field. Breadth is then computed over whole columns at once:
+
+  - advances / declines / unchanged and % of stocks above previous close
+  - each stock's contribution to the index move, in index points, from its
+    free-float market cap weight at the previous close
+  - distance from the 52 week high and low
+"""
+import requests
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+import pytz
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from registry import load_registry
+from instrument import failure
+from http_policy import get
+
+INDEX_URL = "https://www.nseindia.com/api/equity-stockIndices?index={index}"
+NEAR_EXTREME_PCT = 5.0  # within this % of the 52 week high/low counts as "near"
+
+headers = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0'
+}
+
+
+def _column(rows, key):
+    return np.array([row.get(key) if isinstance(row.get(key), (int, float)) else np.nan for row in rows],
+                    dtype=np.float64)
+
+
+class Constituents:
+    """All constituents of one index as columns aligned on `symbols`"""
+
+    FIELDS = {
+        'ltp': 'lastPrice', 'prev_close': 'previousClose', 'change': 'change', 'pchange': 'pChange',
+        'year_high': 'yearHigh', 'year_low': 'yearLow', 'ffmc': 'ffmc',
+    }
+
+    def __init__(self, index, symbols, columns, index_last=np.nan, index_prev=np.nan):
+        self.index = index
+        self.symbols = symbols
+        self.position = {symbol: i for i, symbol in enumerate(symbols)}
+        for name in self.FIELDS:
+            setattr(self, name, columns[name])
+        self.index_last = index_last
+        self.index_prev = index_prev
+
+    @classmethod
+    def from_payload(cls, index, data):
+        rows = data.get('data', [])
+        # The index itself comes back as the first row (priority 1)
+        index_row = next((r for r in rows if r.get('priority') == 1 or r.get('symbol') == index), {})
+        stocks = [r for r in rows if r is not index_row and r.get('symbol')]
+        columns = {name: _column(stocks, key) for name, key in cls.FIELDS.items()}
+        meta = data.get('metadata', {})
+        return cls(
+            index,
+            np.array([r['symbol'] for r in stocks], dtype=object),
+            columns,
+            float(index_row.get('lastPrice', meta.get('last', np.nan))),
+            float(index_row.get('previousClose', meta.get('previousClose', np.nan))),
+        )
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def select(self, symbols):
+        """Row positions of `symbols` (those present), in the order given"""
+        return np.array([self.position[s] for s in symbols if s in self.position], dtype=np.intp)
+
+    def weights(self):
+        """Free-float weights at the previous close; equal weights if ffmc is missing"""
+        ffmc_prev = self.ffmc / (1.0 + self.pchange / 100.0)
+        if not np.isfinite(ffmc_prev).any() or np.nansum(ffmc_prev) <= 0:
+            return np.full(len(self), 1.0 / max(len(self), 1))
+        ffmc_prev = np.where(np.isfinite(ffmc_prev), ffmc_prev, 0.0)
+        return ffmc_prev / ffmc_prev.sum()
+
+    def contributions(self):
+        """Index points each constituent added to today's move"""
+        base = self.index_prev if np.isfinite(self.index_prev) else np.nan
+        return base * self.weights() * np.nan_to_num(self.pchange) / 100.0
+
+    def distance_from_high(self):
+        return (self.ltp / self.year_high - 1.0) * 100.0
+
+    def distance_from_low(self):
+        return (self.ltp / self.year_low - 1.0) * 100.0
+
+    def breadth(self):
+        pchange = self.pchange[np.isfinite(self.pchange)]
+        advances = int((pchange > 0).sum())
+        declines = int((pchange < 0).sum())
+        contrib = self.contributions()
+        order = np.argsort(np.nan_to_num(contrib))
+        from_high, from_low = self.distance_from_high(), self.distance_from_low()
+        return {
+            'Index': self.index,
+            'Stocks': len(self),
+            'Adv': advances,
+            'Dec': declines,
+            'Unch': len(pchange) - advances - declines,
+            '% Up': round(100.0 * advances / len(pchange), 2) if len(pchange) else np.nan,
+            'A/D': round(advances / declines, 2) if declines else np.nan,
+            'Move': round(float(np.nansum(contrib)), 2),
+            'Top +': self.symbols[order[-1]] if len(self) else '',
+            'Top -': self.symbols[order[0]] if len(self) else '',
+            'Near Hi': int((from_high >= -NEAR_EXTREME_PCT).sum()),
+            'Near Lo': int((from_low <= NEAR_EXTREME_PCT).sum()),
+            'Med From Hi %': round(float(np.nanmedian(from_high)), 2) if len(self) else np.nan,
+        }
+
+    def table(self):
+        """Per-stock analytics as a DataFrame, largest contributors first"""
+        df = pd.DataFrame({
+            'Index': self.index,
+            'Symbol': self.symbols,
+            'LTP': self.ltp,
+            '%': np.round(self.pchange, 2),
+            'Weight %': np.round(self.weights() * 100.0, 2),
+            'Contrib': np.round(self.contributions(), 2),
+            'From Hi %': np.round(self.distance_from_high(), 2),
+            'From Lo %': np.round(self.distance_from_low(), 2),
+        })
+        return df.sort_values('Contrib', ascending=False, key=abs)
+
+
+def fetch_index(session, index):
+    try:
+        response = get(INDEX_URL.format(index=quote(index)), session=session)
+        response.raise_for_status()
+        return Constituents.from_payload(index, response.json())
+    except (requests.RequestException, ValueError) as e:
+        failure('nse', index, e)
+        return None
+
+
+def fetch_all(indices=None):
+    """{index name: Constituents} for every index fetched successfully"""
+    indices = indices or load_registry().symbols('breadth_indices')
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=len(indices)) as pool:
+        session.headers.update(headers)
+        results = pool.map(lambda index: fetch_index(session, index), indices)
+        return {index: c for index, c in zip(indices, results) if c is not None}
+
+
+def write_breadth(engines, breadth_file='Data/Breadth.csv', constituents_file='Data/Constituents.csv'):
+    os.makedirs('Data', exist_ok=True)
+    timestamp = datetime.now(pytz.timezone('Asia/Kolkata')).strftime("%d-%b %H:%M")
+
+    summary = pd.DataFrame([c.breadth() for c in engines.values()])
+    summary.to_csv(breadth_file, index=False)
+    with open(breadth_file, 'a') as f:
+        f.write(',' * (len(summary.columns) - 2) + f'Update Time:,{timestamp}\n')
+
+    tables = [c.table() for c in engines.values()]
+    (pd.concat(tables) if tables else pd.DataFrame()).to_csv(constituents_file, index=False)
+
+
+if __name__ == "__main__":
+    engines = fetch_all()
+    write_breadth(engines)
+    for c in engines.values():
+        b = c.breadth()
+        print(f"{b['Index']}: {b['Adv']}/{b['Dec']} adv/dec, move {b['Move']} pts")
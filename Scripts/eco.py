@@ -1,6 +1,35 @@
-import requests, pandas as pd, os, pytz
+"""
+Economic calendar from the Sensibull events API, kept in a local event store.
+
+Events live in Data/eco_events.db, keyed by (date, country, title) and indexed
+by date and by impact. Each run fetches only the near window (NEAR_DAYS either
+side of today) and, once every FAR_REFRESH, the full ±FAR_DAYS window. Fetched
+events are merged in place: new events are inserted, and a changed actual,
+expected, previous, time or impact updates the stored row, and events older
+than FAR_DAYS are pruned. Data/Economic.csv is then rendered from the store.
+The store is not committed; the workflow keeps it in the Actions cache, and a
+missing store is rebuilt by the next full-window fetch.
+
+    python Scripts/eco.py                       # sync and write Economic.csv
+    python Scripts/eco.py --upcoming            # high-impact events in the next 7 days
+    python Scripts/eco.py --upcoming --days 3 --impact medium
+"""
+import argparse
+import requests, pandas as pd, os, sqlite3, sys, pytz
 from datetime import datetime, timedelta
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from instrument import failure, start
+from http_policy import post
+
+EVENTS_URL = "https://oxide.sensibull.com/v1/compute/market_global_events"
+DB_PATH = 'Data/eco_events.db'
+COUNTRIES = ["India", "China", "Japan", "Euro Area", "USA"]
+NEAR_DAYS = 2                       # fetched on every run: where actuals get filled in
+FAR_DAYS = 15                       # the window Economic.csv shows
+FAR_REFRESH = timedelta(hours=12)   # how often the full window is re-fetched
+IST = pytz.timezone('Asia/Kolkata')
+
 headers = {
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
     'Accept-Encoding': 'gzip, deflate, br, zstd',
@@ -11,19 +40,134 @@ headers = {
     'Cache-Control': 'no-store, no-cache, must-revalidate, max-age=0, no-transform'
 }
 
-today = datetime.now()
-payload = {
-    "from_date": (today - timedelta(days=15)).strftime("%Y-%m-%d"),
-    "to_date": (today + timedelta(days=15)).strftime("%Y-%m-%d"),
-    "countries": ["India", "China", "Japan", "Euro Area", "USA"],
-    "impacts": []
-}
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    date TEXT NOT NULL,
+    country TEXT NOT NULL,
+    title TEXT NOT NULL,
+    time TEXT,
+    impact TEXT,
+    actual TEXT,
+    expected TEXT,
+    previous TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (date, country, title)
+);
+CREATE INDEX IF NOT EXISTS events_date ON events (date, time);
+CREATE INDEX IF NOT EXISTS events_impact ON events (impact, date, time);
+CREATE TABLE IF NOT EXISTS syncs (
+    name TEXT PRIMARY KEY,
+    synced_at TEXT NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO events (date, country, title, time, impact, actual, expected, previous, updated_at)
+VALUES (:date, :country, :title, :time, :impact, :actual, :expected, :previous, :updated_at)
+ON CONFLICT (date, country, title) DO UPDATE SET
+    time = excluded.time, impact = excluded.impact, actual = excluded.actual,
+    expected = excluded.expected, previous = excluded.previous, updated_at = excluded.updated_at
+WHERE events.time IS NOT excluded.time OR events.impact IS NOT excluded.impact
+    OR events.actual IS NOT excluded.actual OR events.expected IS NOT excluded.expected
+    OR events.previous IS NOT excluded.previous
+"""
+
+
+def open_store(path=DB_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def fetch_events(from_date, to_date):
+    """Events between two YYYY-MM-DD dates, or None if the request failed"""
+    payload = {"from_date": from_date, "to_date": to_date, "countries": COUNTRIES, "impacts": []}
+    try:
+        data = post(EVENTS_URL, headers=headers, json=payload).json()
+        return data.get('payload', {}).get('data', []) if data.get('success') else None
+    except (requests.RequestException, ValueError) as e:
+        failure('sensibull', f"{from_date}..{to_date}", e)
+        return None
+
+
+def impact_level(impact):
+    """'high', 'medium' or 'low' when recognisable, else the impact lowercased"""
+    impact = impact.lower()
+    return next((level for level in ('high', 'medium', 'low') if level in impact), impact)
+
+
+def event_row(item, now):
+    def text(key):
+        value = item.get(key)
+        return '' if value is None else str(value)
+    return {
+        'date': text('date'), 'country': text('country'), 'title': text('title'),
+        'time': text('time')[:5], 'impact': impact_level(text('impact')),
+        'actual': text('actual'), 'expected': text('expected'), 'previous': text('previous'),
+        'updated_at': now,
+    }
+
+
+def merge_events(conn, items, from_date, to_date, now):
+    """Upsert fetched events; events the API no longer lists in the window, and events older than
+    FAR_DAYS, are dropped. Returns (inserted/updated, removed)"""
+    rows = [event_row(item, now) for item in items if item.get('date') and item.get('title')]
+    before = conn.total_changes
+    with conn:
+        conn.executemany(UPSERT, rows)
+        changed = conn.total_changes - before
+        fetched = {(r['date'], r['country'], r['title']) for r in rows}
+        stale = [tuple(r) for r in conn.execute(
+            "SELECT date, country, title FROM events WHERE date BETWEEN ? AND ?", (from_date, to_date))
+            if tuple(r) not in fetched]
+        conn.executemany("DELETE FROM events WHERE date = ? AND country = ? AND title = ?", stale)
+        cutoff = (datetime.fromisoformat(now) - timedelta(days=FAR_DAYS)).strftime("%Y-%m-%d")
+        pruned = conn.execute("DELETE FROM events WHERE date < ?", (cutoff,)).rowcount
+    return changed, len(stale) + pruned
+
+
+def last_sync(conn, window):
+    row = conn.execute("SELECT synced_at FROM syncs WHERE name = ?", (window,)).fetchone()
+    return datetime.fromisoformat(row['synced_at']) if row else None
+
+
+def sync(conn, now=None):
+    """Fetch the far window when it is due, else the near one; returns which, or None if the fetch failed"""
+    now = now or datetime.now(IST)
+    last_far = last_sync(conn, 'far')
+    window, days = ('far', FAR_DAYS) if last_far is None or now - last_far >= FAR_REFRESH else ('near', NEAR_DAYS)
+    from_date = (now - timedelta(days=days)).strftime("%Y-%m-%d")
+    to_date = (now + timedelta(days=days)).strftime("%Y-%m-%d")
+
+    items = fetch_events(from_date, to_date)
+    if items is None:
+        print(f"Economic calendar: {window} window {from_date}..{to_date} not fetched, keeping stored events")
+        return None
+    changed, removed = merge_events(conn, items, from_date, to_date, now.isoformat(timespec='seconds'))
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO syncs (name, synced_at) VALUES (?, ?)",
+                     (window, now.isoformat(timespec='seconds')))
+    print(f"Economic calendar: {window} window {from_date}..{to_date}, {len(items)} events, "
+          f"{changed} new or updated, {removed} removed")
+    return window
+
+
+def events_between(conn, from_date, to_date):
+    return conn.execute(
+        "SELECT * FROM events WHERE date BETWEEN ? AND ? ORDER BY date, time", (from_date, to_date)).fetchall()
+
+
+def upcoming(conn, impact='high', days=7, now=None):
+    """Events of one impact from now to `days` ahead, served from the (impact, date, time) index"""
+    now = now or datetime.now(IST)
+    return conn.execute(
+        "SELECT * FROM events WHERE impact = ? AND (date > ? OR (date = ? AND time >= ?)) AND date <= ? "
+        "ORDER BY date, time",
+        (impact_level(impact), now.strftime("%Y-%m-%d"), now.strftime("%Y-%m-%d"), now.strftime("%H:%M"),
+         (now + timedelta(days=days)).strftime("%Y-%m-%d"))).fetchall()
 
-try:
-    data = requests.post("https://oxide.sensibull.com/v1/compute/market_global_events", headers=headers, json=payload, timeout=10).json()
-    raw_data = data.get('payload', {}).get('data', []) if data.get('success') else []
-except:
-    raw_data = []
 
 def impact_to_stars(impact):
     if "high" in impact.lower(): return "★★★"
@@ -31,31 +175,58 @@ def impact_to_stars(impact):
     if "low" in impact.lower(): return "★"
     return impact.capitalize()
 
-records = []
-for item in raw_data:
-    date_str = item.get('date', '')
-    try:
-        formatted_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d %b")
-    except:
-        formatted_date = date_str
-    area = item.get('country', '')
-    if area == "Euro Area":
-        area = "Euro"
+
+def write_calendar(conn, now=None, path='Data/Economic.csv'):
+    now = now or datetime.now(IST)
+    records = []
+    for event in events_between(conn, (now - timedelta(days=FAR_DAYS)).strftime("%Y-%m-%d"),
+                                (now + timedelta(days=FAR_DAYS)).strftime("%Y-%m-%d")):
+        try:
+            formatted_date = datetime.strptime(event['date'], "%Y-%m-%d").strftime("%d %b")
+        except ValueError:
+            formatted_date = event['date']
+        area = event['country']
+        if area == "Euro Area":
+            area = "Euro"
+        records.append({
+            'Date': formatted_date,
+            'Time': event['time'],
+            'Area': area,
+            'Title': event['title'],
+            'Imp.': impact_to_stars(event['impact']),
+            'Actual': event['actual'],
+            'Exp.': event['expected'],
+            'Prev.': event['previous']
+        })
+
     records.append({
-        'Date': formatted_date,
-        'Time': item.get('time', '')[:5] if item.get('time') else '',
-        'Area': area,
-        'Title': item.get('title', ''),
-        'Imp.': impact_to_stars(item.get('impact', '')),
-        'Actual': item.get('actual', ''),
-        'Exp.': item.get('expected', ''),
-        'Prev.': item.get('previous', '')
+        'Date': '', 'Time': '', 'Area': '', 'Title': '', 'Imp.': '', 'Actual': '',
+        'Exp.': 'Update Time:', 'Prev.': now.strftime('%d-%b %H:%M')
     })
 
-records.append({
-    'Date': '', 'Time': '', 'Area': '', 'Title': '', 'Imp.': '', 'Actual': '',
-    'Exp.': 'Update Time:', 'Prev.': datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%d-%b %H:%M')
-})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame(records).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the economic calendar and write Data/Economic.csv")
+    parser.add_argument('--upcoming', action='store_true', help='list upcoming events from the store and exit')
+    parser.add_argument('--impact', default='high')
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    conn = open_store()
+    if args.upcoming:
+        for event in upcoming(conn, args.impact, args.days):
+            print(f"{event['date']} {event['time']:>5}  {event['country']:<10} {event['title']}"
+                  + (f"  (exp {event['expected']}, prev {event['previous']})" if event['expected'] else ""))
+        return
+
+    start()
+    sync(conn)
+    write_calendar(conn)
+    conn.close()
+
 
-os.makedirs('Data', exist_ok=True)
-pd.DataFrame(records).to_csv('Data/Economic.csv', index=False)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Persistent SQLite index of watchlist email.
+
+Folders are synced incrementally by UID, so each run only downloads messages that
+arrived since the last one. Subjects, senders and previews go into an FTS5 table
+(plain LIKE matching when the local SQLite lacks FTS5).
+The index is not committed; the workflow keeps it in the Actions cache, and a
+missing index is rebuilt by a full sync.
+
+    python Scripts/email_index.py --sender dispe.burdwan --keyword report --since 2026-01-01
+"""
+import argparse
+import email
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from fetch_emails import (IST, PREVIEW_BYTES, clean_text, decode_text, extract_email,
+                          get_body, split_fetch_response)
+
+DB_PATH = 'Data/email_index.db'
+EMAIL_FOLDERS = [f.strip() for f in os.getenv('EMAIL_FOLDERS', 'INBOX').split(',') if f.strip()]
+SYNC_BATCH = 200
+PREVIEW_CHARS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    name TEXT PRIMARY KEY,
+    uidvalidity INTEGER NOT NULL,
+    last_uid INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL,
+    uid INTEGER NOT NULL,
+    sent_at INTEGER,
+    sender TEXT COLLATE NOCASE,
+    sender_short TEXT COLLATE NOCASE,
+    subject TEXT,
+    preview TEXT,
+    UNIQUE (folder, uid)
+);
+CREATE INDEX IF NOT EXISTS messages_sent_at ON messages (sent_at);
+CREATE INDEX IF NOT EXISTS messages_sender_short ON messages (sender_short, sent_at);
+CREATE INDEX IF NOT EXISTS messages_sender ON messages (sender, sent_at);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    subject, sender, preview, content='messages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, subject, sender, preview)
+    VALUES (new.id, new.subject, new.sender, new.preview);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, subject, sender, preview)
+    VALUES ('delete', old.id, old.subject, old.sender, old.preview);
+END;
+"""
+
+SYNC_QUERY = f'(UID BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.{PREVIEW_BYTES}>)'
+
+
+def open_index(path=DB_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    try:
+        conn.executescript(FTS_SCHEMA)
+    except sqlite3.OperationalError:
+        pass  # no FTS5 in this SQLite build, search() falls back to LIKE
+    return conn
+
+
+def has_fts(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+    ).fetchone() is not None
+
+
+def message_record(folder, uid, raw):
+    """Parse raw (possibly truncated) message bytes into an index row"""
+    msg = email.message_from_bytes(raw)
+    try:
+        sent_at = int(email.utils.parsedate_to_datetime(msg.get('Date', '')).timestamp())
+    except Exception:
+        sent_at = None
+    sender = decode_text(msg.get('From', ''))
+    match = re.search(r'<([^>]+)>', sender)
+    address = (match.group(1) if match else sender).strip().lower()
+    preview = ' '.join(get_body(msg).split())[:PREVIEW_CHARS]
+    return (folder, uid, sent_at, address, extract_email(sender).strip(),
+            decode_text(msg.get('Subject', '')).strip(), preview)
+
+
+def sync_folder(mail, conn, folder, batch=SYNC_BATCH):
+    """Pull every message with a UID above the stored high-water mark; returns the count added"""
+    typ, _ = mail.select(f'"{folder}"', readonly=True)
+    if typ != 'OK':
+        print(f"Skipping folder {folder}: select failed")
+        return 0
+    _, validity = mail.response('UIDVALIDITY')
+    uidvalidity = int(validity[0]) if validity and validity[0] else 0
+
+    row = conn.execute('SELECT uidvalidity, last_uid FROM folders WHERE name = ?', (folder,)).fetchone()
+    last_uid = 0
+    if row is not None and row['uidvalidity'] == uidvalidity:
+        last_uid = row['last_uid']
+    elif row is not None:
+        print(f"UIDVALIDITY changed for {folder}, re-indexing")
+        conn.execute('DELETE FROM messages WHERE folder = ?', (folder,))
+
+    _, data = mail.uid('SEARCH', f'UID {last_uid + 1}:*')
+    # "n:*" always matches the newest message, even when it is already indexed
+    uids = [int(u) for u in (data[0] or b'').split() if int(u) > last_uid]
+
+    added = 0
+    for i in range(0, len(uids), batch):
+        chunk = uids[i:i + batch]
+        _, msg_data = mail.uid('FETCH', ','.join(map(str, chunk)), SYNC_QUERY)
+        records = [message_record(folder, uid, raw)
+                   for uid, raw in split_fetch_response(msg_data, by_uid=True).items()]
+        conn.executemany(
+            'INSERT OR IGNORE INTO messages (folder, uid, sent_at, sender, sender_short, subject, preview) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', records)
+        added += len(records)
+
+    if uids:
+        last_uid = max(uids)
+    conn.execute('INSERT OR REPLACE INTO folders (name, uidvalidity, last_uid) VALUES (?, ?, ?)',
+                 (folder, uidvalidity, last_uid))
+    conn.commit()
+    return added
+
+
+def sync(mail, conn, folders=None):
+    """Sync several folders; returns {folder: messages added}"""
+    return {folder: sync_folder(mail, conn, folder) for folder in (folders or EMAIL_FOLDERS)}
+
+
+def _epoch(value, end_of_day=False):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d')
+        if end_of_day:
+            value = value.replace(hour=23, minute=59, second=59)
+    if value.tzinfo is None:
+        value = IST.localize(value)
+    return int(value.timestamp())
+
+
+def search(conn, sender=None, keyword=None, since=None, until=None, folders=None, limit=20):
+    """Newest-first messages matching every given filter; dates are IST dates or datetimes"""
+    clauses, params, join = [], [], ''
+    if sender:
+        clauses.append('(m.sender_short = ? OR m.sender = ?)')
+        params += [sender, sender.lower()]
+    if keyword:
+        if has_fts(conn):
+            join = 'JOIN messages_fts f ON f.rowid = m.id'
+            clauses.append('messages_fts MATCH ?')
+            # Column filter on the group, so every word (not just the first) must be in the subject
+            params.append('subject : (' + ' '.join('"' + w.replace('"', '""') + '"' for w in keyword.split()) + ')')
+        else:
+            for word in keyword.split():
+                clauses.append('m.subject LIKE ?')
+                params.append(f'%{word}%')
+    if since is not None:
+        clauses.append('m.sent_at >= ?')
+        params.append(_epoch(since))
+    if until is not None:
+        clauses.append('m.sent_at <= ?')
+        params.append(_epoch(until, end_of_day=True))
+    if folders:
+        clauses.append(f"m.folder IN ({','.join('?' * len(folders))})")
+        params += list(folders)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    params.append(limit)
+    return conn.execute(
+        f'SELECT m.* FROM messages m {join} {where} ORDER BY m.sent_at DESC, m.id DESC LIMIT ?', params
+    ).fetchall()
+
+
+def latest(conn, limit=20, folders=None):
+    return search(conn, folders=folders, limit=limit)
+
+
+def to_row(record):
+    """Index row -> [Date-Time, From, Subject, Body_Preview] as written to Data/email.csv"""
+    date_time = ''
+    if record['sent_at'] is not None:
+        date_time = datetime.fromtimestamp(record['sent_at'], IST).strftime('%d %b %H:%M')
+    return [date_time, clean_text(record['sender_short']), clean_text(record['subject']),
+            clean_text(record['preview'][:200])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search the local email index')
+    parser.add_argument('--sender')
+    parser.add_argument('--keyword', help='words that must appear in the subject')
+    parser.add_argument('--since', help='YYYY-MM-DD (IST)')
+    parser.add_argument('--until', help='YYYY-MM-DD (IST)')
+    parser.add_argument('--folder', action='append')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = open_index(args.db)
+    start = time.perf_counter()
+    rows = search(conn, args.sender, args.keyword, args.since, args.until, args.folder, args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for r in rows:
+        print(' | '.join([r['folder']] + to_row(r)[:3]))
+    print(f"{len(rows)} messages in {elapsed:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
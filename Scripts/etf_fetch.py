@@ -1,19 +1,28 @@
-import requests, pandas as pd, os, pytz
+import pandas as pd, os, sys, pytz
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from registry import load_registry
+from instrument import failure, start, timer
+from http_policy import get
+
+start()
+
 headers = {'User-Agent': 'Mozilla/5.0'}
 url = "https://www.nseindia.com/api/etf"
-target_symbols = ["NIFTYBEES", "METALIETF", "PVTBANIETF", "ALPHA", "GOLDBEES", "SILVERBEES", "PHARMABEES", "ITBEES", "BANKBEES"]
+target_symbols = load_registry().symbols('etf', 'nse_etf')
+wanted = set(target_symbols)
 
 try:
-    data = requests.get(url, headers=headers).json()
-except:
+    data = get(url, headers=headers).json()
+except Exception as e:
+    failure('nse_etf', 'api', e)
     data = {}
 
 symbol_dict = {}
 for item in data.get('data', []):
     symbol = item.get('symbol')
-    if symbol in target_symbols:
+    if symbol in wanted:
         per = item.get('per', '-')
         percent = f"{per}%" if per != '-' and per is not None else '-'
         symbol_dict[symbol] = {
@@ -31,6 +40,7 @@ for symbol in target_symbols:
     if symbol in symbol_dict:
         records.append(symbol_dict[symbol])
     else:
+        failure('nse_etf', symbol)
         records.append({
             'SYMBOL': symbol,
             'LTP': '-', 'CHNG': '-', '%': '-',
@@ -43,4 +53,5 @@ records.append({
 })
 
 os.makedirs('Data', exist_ok=True)
-pd.DataFrame(records).to_csv('Data/etf.csv', index=False)
+with timer('write'):
+    pd.DataFrame(records).to_csv('Data/etf.csv', index=False)
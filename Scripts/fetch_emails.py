@@ -3,6 +3,21 @@ from datetime import datetime
 from email.header import decode_header
 
 IST = pytz.timezone('Asia/Kolkata')
+IMAP_HOST = os.getenv('IMAP_HOST', 'imap.yandex.com')
+IMAP_PORT = int(os.getenv('IMAP_PORT', '993'))
+IMAP_SSL = os.getenv('IMAP_SSL', '1') != '0'
+EMAIL_COUNT = int(os.getenv('EMAIL_COUNT', '20'))
+FETCH_MODE = os.getenv('EMAIL_FETCH_MODE', 'full')  # full | batch | headers
+PREVIEW_BYTES = 2048
+
+# One FETCH per message (full) or one FETCH for the whole id set (batch/headers).
+# "headers" only pulls the header block plus the first PREVIEW_BYTES of the body,
+# which is enough for the 200 character preview and skips attachments entirely.
+FETCH_QUERIES = {
+    'full': '(RFC822)',
+    'batch': '(RFC822)',
+    'headers': f'(BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.{PREVIEW_BYTES}>)',
+}
 
 def decode_text(text):
     if not text: return ""
@@ -25,61 +40,109 @@ def format_date(date_str):
 def clean_text(text):
     return text.replace(',', ' ').replace('\n', ' ').replace('\r', ' ').strip() if text else ''
 
+def decode_payload(part):
+    payload = part.get_payload(decode=True) or b''
+    try: return payload.decode('utf-8', errors='ignore')
+    except: return payload.decode('latin-1', errors='ignore')
+
+def get_body(msg):
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.get_content_type() == 'text/plain' and 'attachment' not in str(part.get('Content-Disposition')):
+                return decode_payload(part)
+        return ''
+    return decode_payload(msg)
+
+def parse_message(msg):
+    """Turn a parsed message into a [Date-Time, From, Subject, Body_Preview] row"""
+    date_time = clean_text(format_date(msg.get('Date', '')))
+    from_raw = decode_text(msg.get('From', ''))
+    from_short = clean_text(extract_email(from_raw))
+    subject = clean_text(decode_text(msg.get('Subject', '')))
+    body_clean = clean_text(get_body(msg)[:200])
+    return [date_time, from_short, subject, body_clean]
+
+def split_fetch_response(msg_data, by_uid=False):
+    """Group a multi-message FETCH response into {sequence number or UID: raw bytes}"""
+    messages, current = [], None
+    for item in msg_data:
+        head, literal = item if isinstance(item, tuple) else (item, b'')
+        start = re.match(rb'(\d+) \(', head)
+        if start:
+            current = {'seq': int(start.group(1)), 'uid': None, 'raw': b''}
+            messages.append(current)
+        if current is None:
+            continue
+        uid = re.search(rb'UID (\d+)', head)
+        if uid:
+            current['uid'] = int(uid.group(1))
+        current['raw'] += literal
+    key = 'uid' if by_uid else 'seq'
+    return {m[key]: m['raw'] for m in messages if m[key] is not None}
+
+def connect(user, pwd, host=IMAP_HOST, port=IMAP_PORT, use_ssl=IMAP_SSL):
+    mail = imaplib.IMAP4_SSL(host, port) if use_ssl else imaplib.IMAP4(host, port)
+    mail.login(user, pwd)
+    return mail
+
+def fetch_messages(mail, count=EMAIL_COUNT, mode=FETCH_MODE):
+    """Fetch the latest `count` INBOX messages, newest first"""
+    if mode not in FETCH_QUERIES:
+        raise ValueError(f"Unknown fetch mode: {mode}")
+    mail.select('INBOX')
+    _, messages = mail.search(None, 'ALL')
+    email_ids = messages[0].split()[-count:]
+    if not email_ids:
+        return []
+
+    if mode == 'full':
+        raw = []
+        for eid in email_ids:
+            _, msg_data = mail.fetch(eid, FETCH_QUERIES[mode])
+            raw.append(msg_data[0][1])
+    else:
+        _, msg_data = mail.fetch(b','.join(email_ids), FETCH_QUERIES[mode])
+        by_seq = split_fetch_response(msg_data)
+        raw = [by_seq[int(eid)] for eid in email_ids if int(eid) in by_seq]
+
+    return [email.message_from_bytes(data) for data in reversed(raw)]
+
+def write_csv(emails_data, path='Data/email.csv'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if os.path.exists(path):
+        os.remove(path)
+        print(f"🗑️ Deleted old file")
+
+    update_time = clean_text(datetime.now(IST).strftime('%d %b %H:%M'))
+    rows = emails_data + [['', '', 'Update Time', update_time]]
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Date-Time', 'From', 'Subject', 'Body_Preview'])
+        writer.writerows(rows)
+
 def fetch_emails():
     user, pwd = os.getenv('YANDEX_EMAIL'), os.getenv('YANDEX_APP_PASSWORD')
     if not user or not pwd: sys.exit('ERROR: Missing credentials')
 
+    # Imported here because email_index builds on the helpers above
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    import email_index
+
     try:
-        mail = imaplib.IMAP4_SSL('imap.yandex.com', 993)
-        mail.login(user, pwd)
-        mail.select('INBOX')
-        
-        _, messages = mail.search(None, 'ALL')
-        email_ids = messages[0].split()[-20:]
-        
-        emails_data = []
-        for eid in reversed(email_ids):
-            _, msg_data = mail.fetch(eid, '(RFC822)')
-            msg = email.message_from_bytes(msg_data[0][1])
-            
-            date_time = clean_text(format_date(msg.get('Date', '')))
-            from_raw = decode_text(msg.get('From', ''))
-            from_short = clean_text(extract_email(from_raw))
-            subject = clean_text(decode_text(msg.get('Subject', '')))
-            
-            body = ''
-            if msg.is_multipart():
-                for part in msg.walk():
-                    if part.get_content_type() == 'text/plain' and 'attachment' not in str(part.get('Content-Disposition')):
-                        try: body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                        except: body = part.get_payload(decode=True).decode('latin-1', errors='ignore')
-                        break
-            else:
-                try: body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-                except: body = msg.get_payload(decode=True).decode('latin-1', errors='ignore')
-            
-            body_clean = clean_text(body[:200])
-            emails_data.append([date_time, from_short, subject, body_clean])
-        
-        os.makedirs('Data', exist_ok=True)
-        
-        old_csv = 'Data/email.csv'
-        if os.path.exists(old_csv):
-            os.remove(old_csv)
-            print(f"🗑️ Deleted old file")
-        
-        update_time = clean_text(datetime.now(IST).strftime('%d %b %H:%M'))
-        emails_data.append(['', '', 'Update Time', update_time])
-        
-        with open('Data/email.csv', 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Date-Time', 'From', 'Subject', 'Body_Preview'])
-            writer.writerows(emails_data)
-        
-        print(f"✅ Saved {len(emails_data)-1} emails + update row (newest first)")
-        mail.close()
+        mail = connect(user, pwd)
+        conn = email_index.open_index()
+        added = email_index.sync(mail, conn)
         mail.logout()
-        
+        print(f"📥 Indexed new messages: {added}")
+
+        emails_data = [email_index.to_row(r) for r in email_index.latest(conn, EMAIL_COUNT)]
+        write_csv(emails_data)
+        conn.close()
+
+        print(f"✅ Saved {len(emails_data)} emails + update row (newest first)")
+
     except Exception as e:
         sys.exit(f'ERROR: {e}')
 
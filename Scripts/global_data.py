@@ -1,22 +1,14 @@
-import requests, pandas as pd, os, pytz
+import pandas as pd, os, sys, pytz
 from datetime import datetime
 
-headers = {'User-Agent': 'Mozilla/5.0'}
-commodity_symbols = [
-    {"name": "Dow Jones", "symbol": "OANDA:US30USD"},
-    {"name": "S&P 500", "symbol": "CME_MINI:ES1!"},
-    {"name": "NASDAQ 100", "symbol": "CME_MINI:NQ1!"},
-    {"name": "VIX", "symbol": "CBOE:VX1!"},
-    {"name": "Dollar Index", "symbol": "TVC:DXY"},
-    {"name": "US10Y", "symbol": "TVC:US10Y"},
-    {"name": "Nikkei 225", "symbol": "CME:NKD1!"},
-    {"name": "Euro Stoxx 50", "symbol": "TVC:SX5E"},
-    {"name": "DAX", "symbol": "EUREX:FDAX1!"},
-    {"name": "FTSE 100", "symbol": "TVC:UKX"},
-    {"name": "Bitcoin", "symbol": "CRYPTO:BTCUSD"},
-    {"name": "USD/INR", "symbol": "FX_IDC:USDINR"},
-    {"name": "USD/JPY", "symbol": "OANDA:USDJPY"}
-]
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from registry import load_registry
+from tv_quotes import fetch_tv_quotes
+from instrument import failure, start, timer
+
+start()
+
+commodity_symbols = [{"name": i.name, "symbol": i.symbol} for i in load_registry().group('global_data', 'tradingview')]
 
 def format_value(value, key, name):
     if value is None: return "0"
@@ -28,12 +20,15 @@ def format_value(value, key, name):
             val = float(value)
             return str(int(val))
         return str(float(value))
-    except: return "0"
+    except (TypeError, ValueError):
+        failure('tradingview', name)
+        return "0"
 
 commodity_data = []
+quotes = fetch_tv_quotes(c['symbol'] for c in commodity_symbols)
 for c in commodity_symbols:
-    try:
-        data = requests.get(f"https://scanner.tradingview.com/symbol?symbol={c['symbol']}&fields=close[1],change_abs,price_52_week_high,price_52_week_low,close,change&no_404=true", headers=headers, timeout=5).json()
+    data = quotes.get(c['symbol'])
+    if data is not None:
         commodity_data.append({
             'Index': c["name"],
             'LTP': format_value(data.get('close'), 'LTP', c["name"]),
@@ -43,7 +38,7 @@ for c in commodity_symbols:
             'Yr Hi': format_value(data.get('price_52_week_high'), 'Yr Hi', c["name"]),
             'Yr Lo': format_value(data.get('price_52_week_low'), 'Yr Lo', c["name"])
         })
-    except:
+    else:
         commodity_data.append({
             'Index': c["name"],
             'LTP': "0", 'Chng': "0", '%': "0.00%",
@@ -56,4 +51,5 @@ commodity_data.append({
 })
 
 os.makedirs('Data', exist_ok=True)
-pd.DataFrame(commodity_data).to_csv('Data/GLOBAL_DATA.csv', index=False)
+with timer('write'):
+    pd.DataFrame(commodity_data).to_csv('Data/GLOBAL_DATA.csv', index=False)
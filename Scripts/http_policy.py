@@ -0,0 +1,222 @@
+"""
+Request policy shared by the fetchers: latency budgets, hedged requests,
+retries with backoff and circuit breakers, per data source.
+
+    from http_policy import get, post
+    response = get("https://www.nseindia.com/api/allIndices", session=session, headers=headers)
+
+The source (nse, bse, tradingview, ...) is found from the URL's host and its
+Policy decides how the call is made:
+
+  - every attempt gets the source's timeout, cut to what is left of its budget,
+    so no call can take longer than the budget however the source misbehaves
+  - with hedging on, a duplicate request goes out when the first has not
+    answered after the source's recent p95 latency; the first answer wins
+  - timeouts, connection errors, 429 and 5xx are retried with exponential
+    backoff and full jitter while the budget lasts
+  - a source failing BREAKER_FAILURES calls in a row is skipped for the rest of
+    the run: calls raise SourceDown at once. A run is the scheduler invocation
+    or workflow run (HTTP_RUN_ID / GITHUB_RUN_ID), so scripts later in the same
+    run skip the source too; without a run id the breaker is per process.
+
+Recent latencies and breaker state are kept in Data/http_policy_state.json,
+which the workflow carries between runs in the Actions cache rather than in git.
+"""
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+import requests
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import instrument
+
+STATE_PATH = os.environ.get('HTTP_POLICY_STATE', os.path.join('Data', 'http_policy_state.json'))
+RUN_ID = os.environ.get('HTTP_RUN_ID') or (
+    f"gh-{os.environ['GITHUB_RUN_ID']}-{os.environ.get('GITHUB_RUN_ATTEMPT', '1')}" if os.environ.get('GITHUB_RUN_ID') else None)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+BREAKER_FAILURES = 2   # consecutive failed calls that open a source's breaker
+LATENCY_SAMPLES = 50   # recent latencies kept per source for the hedge delay
+MIN_SAMPLES = 5        # below this the hedge fires at half the timeout
+
+# timeout: seconds per attempt; budget: seconds per call, retries included;
+# backoff: base seconds, doubled per retry
+Policy = namedtuple('Policy', 'timeout budget attempts hedge backoff')
+
+POLICIES = {
+    'nse': Policy(5, 15, 3, True, 0.5),
+    'bse': Policy(10, 20, 3, True, 0.5),
+    'tradingview': Policy(5, 12, 3, True, 0.3),
+    'sensibull': Policy(10, 20, 3, True, 0.5),
+    'amfi': Policy(30, 60, 3, False, 1.0),   # multi-MB snapshots: a duplicate would only compete for bandwidth
+    'nsdl': Policy(30, 45, 2, False, 1.0),
+    'rates': Policy(10, 15, 2, False, 0.5),
+    'default': Policy(10, 20, 2, False, 0.5),
+}
+
+HOSTS = {
+    'www.nseindia.com': 'nse',
+    'api.bseindia.com': 'bse',
+    'scanner.tradingview.com': 'tradingview',
+    'oxide.sensibull.com': 'sensibull',
+    'www.amfiindia.com': 'amfi',
+    'www.fpi.nsdl.co.in': 'nsdl',
+    'techfanetechnologies.github.io': 'rates',
+}
+
+
+class SourceDown(requests.ConnectionError):
+    """The source's circuit breaker is open for this run"""
+
+
+_lock = threading.Lock()
+_state = {}
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='http-policy')
+
+
+def source_of(url):
+    return HOSTS.get(urlsplit(url).hostname or '', 'default')
+
+
+def _load():
+    if _state:
+        return _state
+    try:
+        with open(STATE_PATH) as f:
+            saved = json.load(f)
+    except (FileNotFoundError, ValueError):
+        saved = {}
+    _state['latency'] = saved.get('latency', {})
+    # Breakers only carry over within the same run
+    _state['breakers'] = {s: b for s, b in saved.get('breakers', {}).items() if RUN_ID and b.get('run') == RUN_ID}
+    atexit.register(save_state)
+    return _state
+
+
+def save_state(path=None):
+    path = path or STATE_PATH
+    with _lock:
+        if not _state:
+            return
+        data = {'latency': _state['latency'],
+                'breakers': {s: b for s, b in _state['breakers'].items() if b.get('run')}}
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+    except OSError as e:
+        print(f"Could not write request policy state {path}: {e}")
+
+
+def hedge_delay(source, policy):
+    """Recent p95 latency of `source`, or half the timeout until enough samples exist"""
+    with _lock:
+        samples = sorted(_load()['latency'].get(source, []))
+    if len(samples) < MIN_SAMPLES:
+        return policy.timeout / 2
+    return min(max(samples[int(0.95 * (len(samples) - 1))], 0.2), policy.timeout)
+
+
+def is_open(source):
+    with _lock:
+        return _load()['breakers'].get(source, {}).get('open', False)
+
+
+def _succeeded(source, seconds):
+    with _lock:
+        state = _load()
+        samples = state['latency'].setdefault(source, [])
+        samples.append(round(seconds, 3))
+        del samples[:-LATENCY_SAMPLES]
+        state['breakers'].pop(source, None)
+
+
+def _failed(source):
+    with _lock:
+        breaker = _load()['breakers'].setdefault(source, {'run': RUN_ID, 'failures': 0, 'open': False})
+        breaker['failures'] += 1
+        opened = not breaker['open'] and breaker['failures'] >= BREAKER_FAILURES
+        breaker['open'] = breaker['open'] or opened
+    if opened:
+        instrument.incr('http.breaker_open')
+        print(f"{source}: {BREAKER_FAILURES} failed calls in a row, skipping it for the rest of the run")
+
+
+def _hedged(send, hedge_after):
+    """Send once; if no answer within `hedge_after` seconds, send again and take the first good answer"""
+    first = _pool.submit(send)
+    done, _ = wait([first], timeout=hedge_after)
+    if done:
+        return first.result()
+    instrument.incr('http.hedges')
+    pending = {first, _pool.submit(send)}
+    error, fallback = None, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except requests.RequestException as e:
+                error = e
+                continue
+            if response.status_code not in RETRY_STATUS:
+                return response
+            fallback = response
+    if fallback is not None:
+        return fallback
+    raise error
+
+
+def request(method, url, session=None, source=None, **kwargs):
+    """requests-style call under the source's policy; raises SourceDown if its breaker is open"""
+    source = source or source_of(url)
+    policy = POLICIES.get(source, POLICIES['default'])
+    if is_open(source):
+        instrument.incr('http.skipped')
+        raise SourceDown(f"{source} is down for this run, skipped {url}")
+
+    kwargs.pop('timeout', None)
+    caller = session or requests
+    deadline = time.monotonic() + policy.budget
+    error, response = None, None
+    for attempt in range(policy.attempts):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        timeout = min(policy.timeout, remaining)
+
+        def send():
+            return caller.request(method, url, timeout=timeout, **kwargs)
+
+        try:
+            response = _hedged(send, min(hedge_delay(source, policy), timeout)) if policy.hedge else send()
+        except requests.RequestException as e:
+            error, response = e, None
+        else:
+            if response.status_code not in RETRY_STATUS:
+                _succeeded(source, response.elapsed.total_seconds())
+                return response
+            error = requests.HTTPError(f"HTTP {response.status_code} from {source}", response=response)
+
+        pause = min(policy.backoff * 2 ** attempt, 8.0) * random.random()
+        if attempt + 1 < policy.attempts and time.monotonic() + pause < deadline:
+            instrument.incr('http.retries')
+            time.sleep(pause)
+    _failed(source)
+    if response is not None:
+        return response
+    raise error or requests.Timeout(f"{source}: budget of {policy.budget}s exhausted for {url}")
+
+
+def get(url, session=None, source=None, **kwargs):
+    return request('GET', url, session, source, **kwargs)
+
+
+def post(url, session=None, source=None, **kwargs):
+    return request('POST', url, session, source, **kwargs)
@@ -0,0 +1,237 @@
+"""
+Record and replay the HTTP traffic of the fetchers, for offline benchmarks.
+
+Every fetcher talks HTTP through requests, so both modes hook
+requests.Session.send and need no change in the scripts themselves:
+
+    python Scripts/http_replay.py record Scripts/nseindices.py
+        runs the script against the live endpoints and saves every response
+        under FIXTURE_DIR/<host>/<key>.json
+
+    python Scripts/http_replay.py serve --latency 0.08 --jitter 0.04 --error-rate 0.02
+        serves the saved responses from a local stand-in server
+
+    python Scripts/http_replay.py run --server http://127.0.0.1:8765 Scripts/nseindices.py
+        runs the script with every request redirected to that server
+
+A request is matched on method, URL and body; when that exact request was never
+recorded (URLs carrying today's date, say) the newest response recorded for the
+same method, host and path is served instead, and with nothing recorded there
+the server answers 404. Injected errors are 503s.
+
+    with ReplayServer(load_fixtures(), latency=0.05) as server:
+        install(server.url)
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import runpy
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+FIXTURE_DIR = os.environ.get('HTTP_FIXTURES', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'Data', 'fixtures', 'http'))
+SKIP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+
+def request_key(method, url, body=b''):
+    body = body.encode() if isinstance(body, str) else (body or b'')
+    return hashlib.sha1(b'\n'.join([method.upper().encode(), url.encode(), body])).hexdigest()[:20]
+
+
+def route_key(method, url):
+    parts = urlsplit(url)
+    return f"{method.upper()} {parts.hostname}{parts.path}"
+
+
+def save_fixture(response, directory=FIXTURE_DIR):
+    """Write one requests.Response (and its request) as a fixture file"""
+    request = response.request
+    host = urlsplit(request.url).hostname or 'unknown'
+    fixture = {
+        'method': request.method,
+        'url': request.url,
+        'key': request_key(request.method, request.url, request.body),
+        'recorded': time.time(),
+        'status': response.status_code,
+        'headers': {k: v for k, v in response.headers.items() if k.lower() not in SKIP_HEADERS},
+        'body': base64.b64encode(response.content).decode(),
+    }
+    os.makedirs(os.path.join(directory, host), exist_ok=True)
+    with open(os.path.join(directory, host, fixture['key'] + '.json'), 'w') as f:
+        json.dump(fixture, f)
+
+
+def load_fixtures(directory=FIXTURE_DIR):
+    """{'exact': {key: fixture}, 'route': {method host/path: newest fixture}}"""
+    exact, route = {}, {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(root, name)) as f:
+                fixture = json.load(f)
+            fixture['content'] = base64.b64decode(fixture.pop('body'))
+            exact[fixture['key']] = fixture
+            loose = route_key(fixture['method'], fixture['url'])
+            if loose not in route or route[loose]['recorded'] < fixture['recorded']:
+                route[loose] = fixture
+    return {'exact': exact, 'route': route}
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _serve(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = unquote(self.path.lstrip('/'))
+        server.count('requests', 1)
+        server.count('bytes_received', len(body))
+
+        delay = server.latency + (server.rng.uniform(-server.jitter, server.jitter) if server.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if server.error_rate and server.rng.random() < server.error_rate:
+            server.count('errors', 1)
+            return self._respond(503, {'Content-Type': 'text/plain'}, b'injected error')
+
+        fixture = server.fixtures['exact'].get(request_key(self.command, url, body)) \
+            or server.fixtures['route'].get(route_key(self.command, url))
+        if fixture is None:
+            server.count('misses', 1)
+            return self._respond(404, {'Content-Type': 'text/plain'}, f'no fixture for {url}'.encode())
+        self._respond(fixture['status'], fixture['headers'], fixture['content'])
+
+    def _respond(self, status, headers, content):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+        self.server.count('bytes_sent', len(content))
+
+    do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Threaded stand-in for every recorded endpoint, bound to an ephemeral localhost port"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, fixtures, latency=0.0, jitter=0.0, error_rate=0.0, seed=None, host='127.0.0.1', port=0):
+        super().__init__((host, port), _ReplayHandler)
+        self.fixtures = fixtures
+        self.latency = latency        # seconds added to every response
+        self.jitter = jitter          # +/- uniform seconds around the latency
+        self.error_rate = error_rate  # share of requests answered with a 503
+        self.rng = random.Random(seed)
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset_stats()
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def count(self, key, amount):
+        with self._lock:
+            self.stats[key] += amount
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {'requests': 0, 'bytes_sent': 0, 'bytes_received': 0, 'errors': 0, 'misses': 0}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def install(server=None, record=None):
+    """Redirect every requests call to `server`, or save every response under `record`"""
+    import requests
+
+    send = requests.Session.send
+
+    def replay_send(self, request, **kwargs):
+        if server is not None:
+            request = request.copy()
+            request.url = f"{server}/{quote(request.url, safe='')}"
+        response = send(self, request, **kwargs)
+        if record is not None and not kwargs.get('stream'):
+            save_fixture(response, record)
+        return response
+
+    replay_send._instrumented = getattr(send, '_instrumented', False)
+    requests.Session.send = replay_send
+
+
+def run_script(script, args=(), server=None, record=None):
+    """Run a fetcher in this process as __main__ with HTTP redirected or recorded"""
+    install(server, record)
+    sys.argv = [script, *args]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    runpy.run_path(script, run_name='__main__')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record HTTP fixtures or replay them from a local server")
+    sub = parser.add_subparsers(dest='command', required=True)
+    record = sub.add_parser('record', help='run a script and save its responses')
+    record.add_argument('--fixtures', default=FIXTURE_DIR)
+    record.add_argument('script')
+    record.add_argument('args', nargs=argparse.REMAINDER)
+    serve = sub.add_parser('serve', help='serve the saved responses')
+    serve.add_argument('--fixtures', default=FIXTURE_DIR)
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency', type=float, default=0.0)
+    serve.add_argument('--jitter', type=float, default=0.0)
+    serve.add_argument('--error-rate', type=float, default=0.0)
+    serve.add_argument('--seed', type=int)
+    run = sub.add_parser('run', help='run a script against a replay server')
+    run.add_argument('--server', required=True)
+    run.add_argument('script')
+    run.add_argument('args', nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        run_script(args.script, args.args, record=args.fixtures)
+    elif args.command == 'run':
+        run_script(args.script, args.args, server=args.server.rstrip('/'))
+    else:
+        fixtures = load_fixtures(args.fixtures)
+        server = ReplayServer(fixtures, args.latency, args.jitter, args.error_rate, args.seed, port=args.port)
+        print(f"Serving {len(fixtures['exact'])} fixtures on {server.url}")
+        try:
+            server.start()._thread.join()
+        except KeyboardInterrupt:
+            server.stop()
+            print(json.dumps(server.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+In-process IMAP4rev1 stand-in used to exercise fetch_emails.py without the live
+Yandex account. Serves a synthetic mailbox over plain TCP on localhost and counts
+the bytes that cross the wire.
+
+    with LocalImapServer(build_mailbox(5000)) as server:
+        mail = imaplib.IMAP4(server.host, server.port)
+"""
+import random
+import re
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email import policy
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+SENDERS = [
+    ("Samagra Shiksha Mission", "ssmpurbabardhaman@gmail.com"),
+    ("DI of Schools", "dispe.burdwan@gmail.com"),
+    ("WBTBCL Delivery", "wbtbcldelivery@wbtbcl.in"),
+    ("NSE Alerts", "alerts@nseindia.com"),
+    ("AMFI", "noreply@amfiindia.com"),
+]
+WORDS = ("report allotment football match order circular meeting training notice "
+         "schedule challan books dispatch attachment please update sheet urgent").split()
+
+FETCH_ITEM = re.compile(r'BODY(?:\.PEEK)?\[[^\]]*\](?:<\d+(?:\.\d+)?>)?|[A-Z0-9.]+', re.I)
+
+
+def _sentence(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def build_message(i, rng, start=None, attachment_bytes=0):
+    """Build one synthetic RFC822 message as CRLF bytes"""
+    start = start or datetime(2026, 1, 1, tzinfo=timezone.utc)
+    name, addr = SENDERS[i % len(SENDERS)]
+    msg = EmailMessage(policy=policy.SMTP)
+    msg['From'] = f'{name} <{addr}>'
+    msg['To'] = 'watchlist@yandex.com'
+    msg['Subject'] = f'{i}-{_sentence(rng, rng.randint(3, 9))}'
+    msg['Date'] = format_datetime(start + timedelta(minutes=7 * i))
+    msg['Message-ID'] = f'<stub-{i}@localhost>'
+    msg.set_content('\n'.join(_sentence(rng, rng.randint(8, 20)) + '.' for _ in range(rng.randint(3, 12))))
+    msg.add_alternative(f"<html><body><p>{_sentence(rng, 40)}</p></body></html>", subtype='html')
+    if attachment_bytes:
+        msg.add_attachment(rng.randbytes(attachment_bytes), maintype='application',
+                           subtype='pdf', filename=f'circular_{i}.pdf')
+    return msg.as_bytes()
+
+
+def build_mailbox(count=5000, seed=42, attachment_ratio=0.3, attachment_bytes=60_000):
+    """Deterministic list of `count` messages, a share of them carrying a PDF attachment"""
+    rng = random.Random(seed)
+    return [
+        build_message(i, rng, attachment_bytes=attachment_bytes if rng.random() < attachment_ratio else 0)
+        for i in range(1, count + 1)
+    ]
+
+
+def parse_sequence_set(spec, last, star_wins=False):
+    """
+    Expand an IMAP sequence set like '1,4:6,9:*' into a sorted list.
+
+    With star_wins, 'n:*' always includes the last message even when n > last,
+    which is how real servers answer UID ranges (RFC 3501 section 6.4.8).
+    """
+    numbers = set()
+    for part in spec.split(','):
+        lo, _, hi = part.partition(':')
+        star = '*' in (lo, hi)
+        lo = last if lo == '*' else int(lo)
+        hi = lo if not hi else last if hi == '*' else int(hi)
+        lo, hi = min(lo, hi), max(lo, hi)
+        numbers.update(range(max(lo, 1), min(hi, last) + 1))
+        if star and star_wins and last:
+            numbers.add(last)
+    return sorted(numbers)
+
+
+def split_arguments(text):
+    """Split command arguments, keeping quoted strings and parenthesised lists whole"""
+    args, i = [], 0
+    while i < len(text):
+        if text[i] == ' ':
+            i += 1
+        elif text[i] == '"':
+            j = i + 1
+            while j < len(text) and text[j] != '"':
+                j += 2 if text[j] == '\\' else 1
+            args.append(text[i + 1:j].replace('\\"', '"').replace('\\\\', '\\'))
+            i = j + 1
+        elif text[i] == '(':
+            depth, j = 0, i
+            while j < len(text):
+                depth += {'(': 1, ')': -1}.get(text[j], 0)
+                j += 1
+                if depth == 0:
+                    break
+            args.append(text[i:j])
+            i = j
+        else:
+            j = text.find(' ', i)
+            j = len(text) if j == -1 else j
+            args.append(text[i:j])
+            i = j
+    return args
+
+
+def message_section(raw, section):
+    """Return the bytes of BODY[section] for a raw message"""
+    split = raw.find(b'\r\n\r\n')
+    header, text = (raw, b'') if split == -1 else (raw[:split + 4], raw[split + 4:])
+    section = section.upper()
+    if section == '':
+        return raw
+    if section == 'HEADER':
+        return header
+    if section == 'TEXT':
+        return text
+    if section.startswith('HEADER.FIELDS'):
+        wanted = set(section[section.index('(') + 1:section.rindex(')')].split())
+        lines, keep = [], False
+        for line in header.split(b'\r\n'):
+            if line[:1] in (b' ', b'\t'):
+                if keep:
+                    lines.append(line)
+                continue
+            keep = line.split(b':', 1)[0].decode('ascii', 'ignore').upper() in wanted
+            if keep:
+                lines.append(line)
+        return b'\r\n'.join(lines) + b'\r\n\r\n'
+    raise ValueError(f'Unsupported section {section}')
+
+
+class _ImapHandler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        # Without this, Nagle + delayed ACK adds ~40ms to every small reply and
+        # the per-message round trips of the "full" mode measure the kernel, not the client.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send(self, data):
+        self.wfile.write(data)
+        self.server.count('bytes_sent', len(data))
+
+    def handle(self):
+        self.selected = None
+        self.send(b'* OK [CAPABILITY IMAP4rev1] watchlist IMAP stub ready\r\n')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            self.server.count('bytes_received', len(line))
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            tag, _, rest = line.decode('utf-8', 'replace').rstrip('\r\n').partition(' ')
+            command, _, args = rest.partition(' ')
+            handler = getattr(self, f'do_{command.upper()}', None)
+            try:
+                if handler is None:
+                    self.send(f'{tag} BAD unknown command {command}\r\n'.encode())
+                elif handler(tag, args) is False:
+                    break
+            except Exception as e:
+                self.send(f'{tag} BAD {e}\r\n'.encode())
+
+    def do_CAPABILITY(self, tag, args):
+        self.send(f'* CAPABILITY IMAP4rev1\r\n{tag} OK CAPABILITY completed\r\n'.encode())
+
+    def do_NOOP(self, tag, args):
+        self.send(f'{tag} OK NOOP completed\r\n'.encode())
+
+    def do_LOGIN(self, tag, args):
+        user, pwd = split_arguments(args)[:2]
+        if self.server.credentials and (user, pwd) != self.server.credentials:
+            self.send(f'{tag} NO [AUTHENTICATIONFAILED] invalid credentials\r\n'.encode())
+        else:
+            self.send(f'{tag} OK LOGIN completed\r\n'.encode())
+
+    def do_LIST(self, tag, args):
+        lines = ''.join(f'* LIST (\\HasNoChildren) "/" "{name}"\r\n' for name in self.server.folders)
+        self.send(f'{lines}{tag} OK LIST completed\r\n'.encode())
+
+    def do_SELECT(self, tag, args):
+        name = split_arguments(args)[0]
+        folder = next((f for f in self.server.folders if f.upper() == name.upper()), None)
+        if folder is None:
+            self.send(f'{tag} NO no such mailbox\r\n'.encode())
+            return
+        self.selected = self.server.folders[folder]
+        uidvalidity = self.server.uidvalidity.get(folder, 1)
+        self.send(f'* {len(self.selected)} EXISTS\r\n* 0 RECENT\r\n* FLAGS (\\Seen)\r\n'
+                  f'* OK [UIDVALIDITY {uidvalidity}] UIDs valid\r\n'
+                  f'* OK [UIDNEXT {len(self.selected) + 1}] predicted next UID\r\n'
+                  f'{tag} OK [READ-WRITE] SELECT completed\r\n'.encode())
+
+    do_EXAMINE = do_SELECT
+
+    def do_SEARCH(self, tag, args, uid=False):
+        if self.selected is None:
+            self.send(f'{tag} NO no mailbox selected\r\n'.encode())
+            return
+        # Messages are never expunged here, so UID == sequence number.
+        criteria = args.split()
+        last = len(self.selected)
+        if len(criteria) >= 2 and criteria[0].upper() == 'UID':
+            ids = parse_sequence_set(criteria[1], last, star_wins=True)
+        else:
+            ids = list(range(1, last + 1))
+        found = ''.join(f' {i}' for i in ids)
+        self.send(f'* SEARCH{found}\r\n{tag} OK {"UID " if uid else ""}SEARCH completed\r\n'.encode())
+
+    def do_FETCH(self, tag, args, uid=False):
+        if self.selected is None:
+            self.send(f'{tag} NO no mailbox selected\r\n'.encode())
+            return
+        spec, _, items = args.partition(' ')
+        items = FETCH_ITEM.findall(items)
+        if uid and not any(item.upper() == 'UID' for item in items):
+            items.insert(0, 'UID')
+        for seq in parse_sequence_set(spec, len(self.selected), star_wins=uid):
+            self.send(self.fetch_response(seq, self.selected[seq - 1], items))
+            self.server.count('messages_fetched', 1)
+        self.send(f'{tag} OK {"UID " if uid else ""}FETCH completed\r\n'.encode())
+
+    def do_UID(self, tag, args):
+        command, _, rest = args.partition(' ')
+        handler = {'FETCH': self.do_FETCH, 'SEARCH': self.do_SEARCH}.get(command.upper())
+        if handler is None:
+            self.send(f'{tag} BAD unsupported UID command {command}\r\n'.encode())
+        else:
+            handler(tag, rest, uid=True)
+
+    def fetch_response(self, seq, raw, items):
+        parts = []
+        for item in items:
+            upper = item.upper()
+            if upper == 'UID':
+                parts.append(f'UID {seq}'.encode())
+            elif upper == 'RFC822.SIZE':
+                parts.append(f'RFC822.SIZE {len(raw)}'.encode())
+            elif upper == 'FLAGS':
+                parts.append(b'FLAGS (\\Seen)')
+            elif upper in ('RFC822', 'RFC822.HEADER', 'RFC822.TEXT') or upper.startswith('BODY'):
+                if upper.startswith('RFC822'):
+                    name, data = upper, message_section(raw, {'RFC822': '', 'RFC822.HEADER': 'HEADER',
+                                                              'RFC822.TEXT': 'TEXT'}[upper])
+                else:
+                    section = item[item.index('[') + 1:item.index(']')]
+                    data = message_section(raw, section)
+                    name = f'BODY[{section}]'
+                    partial = re.search(r'<(\d+)(?:\.(\d+))?>$', item)
+                    if partial:
+                        start = int(partial.group(1))
+                        length = int(partial.group(2)) if partial.group(2) else len(data)
+                        data = data[start:start + length]
+                        name += f'<{start}>'
+                parts.append(f'{name} {{{len(data)}}}\r\n'.encode() + data)
+        return f'* {seq} FETCH ('.encode() + b' '.join(parts) + b')\r\n'
+
+    def do_CLOSE(self, tag, args):
+        self.selected = None
+        self.send(f'{tag} OK CLOSE completed\r\n'.encode())
+
+    def do_LOGOUT(self, tag, args):
+        self.send(f'* BYE logging out\r\n{tag} OK LOGOUT completed\r\n'.encode())
+        return False
+
+
+class LocalImapServer(socketserver.ThreadingTCPServer):
+    """Threaded IMAP stand-in bound to an ephemeral localhost port"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailbox, credentials=None, latency=0.0, host='127.0.0.1', port=0):
+        super().__init__((host, port), _ImapHandler)
+        # A bare list is served as INBOX; a dict maps folder name -> list of raw messages
+        self.folders = mailbox if isinstance(mailbox, dict) else {'INBOX': mailbox}
+        self.uidvalidity = {name: 1 for name in self.folders}
+        self.credentials = credentials
+        self.latency = latency  # seconds added to every command round trip
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset_stats()
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def append(self, folder, raw):
+        """Deliver a message; it gets the next UID in that folder"""
+        with self._lock:
+            self.folders.setdefault(folder, []).append(raw)
+            self.uidvalidity.setdefault(folder, 1)
+
+    def reset_uids(self, folder):
+        """Bump UIDVALIDITY, as a server does after rebuilding a folder"""
+        with self._lock:
+            self.uidvalidity[folder] = self.uidvalidity.get(folder, 1) + 1
+
+    def count(self, key, amount):
+        with self._lock:
+            self.stats[key] += amount
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {'bytes_sent': 0, 'bytes_received': 0, 'messages_fetched': 0}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
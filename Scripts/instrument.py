@@ -0,0 +1,199 @@
+"""
+Lightweight run instrumentation: timers, counters, failures and HTTP timings.
+
+Call start() once at the top of a script. From then on every requests call in
+the process (requests.get, sessions, tv_quotes, ...) is timed per host:
+
+    dns       name resolution
+    connect   TCP connect (new connections only; reused ones record 0)
+    ttfb      request sent to response headers, including TLS setup
+    download  reading the body
+
+and at exit a JSON report is written to Data/reports/<script>.json with those
+timings, the timer/counter/observation stats recorded by the script and the
+per-source, per-symbol failure counts and any per-item notes.
+
+    with timer('parse'):
+        ...
+    failure('tradingview', symbol)
+    observe('iv.iterations', n)
+"""
+import atexit
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+REPORT_DIR = os.environ.get('REPORT_DIR', os.path.join('Data', 'reports'))
+
+_lock = threading.Lock()
+_local = threading.local()
+_state = {'started': None, 'script': None, 'http': {}, 'timers': {}, 'counters': {},
+          'observations': {}, 'failures': {}, 'notes': {}}
+
+
+def _stats(bucket, name, value):
+    s = bucket.get(name)
+    if s is None:
+        bucket[name] = {'n': 1, 'total': value, 'min': value, 'max': value}
+    else:
+        s['n'] += 1
+        s['total'] += value
+        s['min'] = min(s['min'], value)
+        s['max'] = max(s['max'], value)
+
+
+def observe(name, value):
+    """Record one sample of a value (min/max/mean are reported)"""
+    with _lock:
+        _stats(_state['observations'], name, float(value))
+
+
+def incr(name, n=1):
+    with _lock:
+        _state['counters'][name] = _state['counters'].get(name, 0) + n
+
+
+def failure(source, symbol='', error=None):
+    """Count a failed fetch or parse of `symbol` from `source`"""
+    with _lock:
+        symbols = _state['failures'].setdefault(source, {})
+        symbols[symbol] = symbols.get(symbol, 0) + 1
+    if error is not None:
+        print(f"{source} {symbol}: {error}")
+
+
+def note(section, key, value):
+    """Record a per-item fact for the report, e.g. which source answered for a symbol"""
+    with _lock:
+        _state['notes'].setdefault(section, {})[key] = value
+
+
+@contextmanager
+def timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _stats(_state['timers'], name, (time.perf_counter() - start) * 1000)
+
+
+def _record_http(host, status, nbytes, dns, connect, ttfb, download):
+    with _lock:
+        h = _state['http'].setdefault(host, {'requests': 0, 'errors': 0, 'bytes': 0, 'status': {}})
+        h['requests'] += 1
+        h['bytes'] += nbytes
+        if status is None or status >= 400:
+            h['errors'] += 1
+        key = str(status or 'error')
+        h['status'][key] = h['status'].get(key, 0) + 1
+        for name, value in (('dns_ms', dns), ('connect_ms', connect), ('ttfb_ms', ttfb), ('download_ms', download)):
+            if value is not None:
+                _stats(h, name, value * 1000)
+
+
+def _patch_requests():
+    import requests
+    from urllib3.util import connection
+
+    if getattr(requests.Session.send, '_instrumented', False):
+        return
+    create_connection = connection.create_connection
+    send = requests.Session.send
+
+    def timed_create_connection(address, *args, **kwargs):
+        host, port = address
+        start = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        finally:
+            resolved = time.perf_counter()
+            _local.dns = getattr(_local, 'dns', 0.0) + resolved - start
+        error = None
+        for info in infos:
+            try:
+                sock = create_connection((info[4][0], port), *args, **kwargs)
+                break
+            except OSError as e:
+                error = e
+        else:
+            raise error or OSError(f"No addresses for {host}")
+        _local.connect = getattr(_local, 'connect', 0.0) + time.perf_counter() - resolved
+        return sock
+
+    def timed_send(self, request, **kwargs):
+        _local.dns = _local.connect = 0.0
+        host = urlsplit(request.url).hostname or '?'
+        start = time.perf_counter()
+        try:
+            response = send(self, request, **kwargs)
+        except Exception:
+            _record_http(host, None, 0, _local.dns, _local.connect, None, None)
+            raise
+        total = time.perf_counter() - start
+        headers_at = response.elapsed.total_seconds()
+        streamed = kwargs.get('stream', False)
+        _record_http(host, response.status_code, 0 if streamed else len(response.content),
+                     _local.dns, _local.connect, max(headers_at - _local.dns - _local.connect, 0.0),
+                     None if streamed else max(total - headers_at, 0.0))
+        return response
+
+    timed_send._instrumented = True
+    connection.create_connection = timed_create_connection
+    requests.Session.send = timed_send
+
+
+def start(script=None):
+    """Begin recording for this process; the report is written at exit"""
+    if _state['started'] is not None:
+        return
+    _state['started'] = time.time()
+    _state['script'] = script or os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0]
+    _patch_requests()
+    atexit.register(write_report)
+
+
+def _finish(stats, digits=2):
+    out = {}
+    for name, s in stats.items():
+        out[name] = {'n': s['n'], 'total': round(s['total'], digits), 'mean': round(s['total'] / s['n'], digits),
+                     'min': round(s['min'], digits), 'max': round(s['max'], digits)}
+    return out
+
+
+def report():
+    """The run report as a dict"""
+    started = _state['started'] or time.time()
+    with _lock:
+        http = {}
+        for host, h in _state['http'].items():
+            http[host] = {k: v for k, v in h.items() if not k.endswith('_ms')}
+            http[host].update(_finish({k: v for k, v in h.items() if k.endswith('_ms')}))
+        return {
+            'script': _state['script'],
+            'started': (datetime.utcfromtimestamp(started) + timedelta(hours=5, minutes=30)).strftime('%Y-%m-%d %H:%M:%S IST'),
+            'duration_ms': round((time.time() - started) * 1000, 1),
+            'http': http,
+            'timers_ms': _finish(_state['timers']),
+            'counters': dict(_state['counters']),
+            'observations': _finish(_state['observations'], 4),
+            'failures': {source: dict(symbols) for source, symbols in _state['failures'].items()},
+            'failure_count': sum(sum(symbols.values()) for symbols in _state['failures'].values()),
+            'notes': {section: dict(items) for section, items in _state['notes'].items()},
+        }
+
+
+def write_report(path=None):
+    path = path or os.path.join(REPORT_DIR, f"{_state['script'] or 'run'}.json")
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report(), f, indent=1, sort_keys=True)
+    except OSError as e:
+        print(f"Could not write run report {path}: {e}")
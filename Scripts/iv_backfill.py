@@ -0,0 +1,173 @@
+"""
+Back-compute IV and Greeks over every committed version of Data/Option.csv.
+
+The git history of the chain file is streamed oldest first: commit ids come from
+`git log` and file contents from one long-running `git cat-file --batch`, so only
+the current chunk of snapshots is ever held in memory. Each snapshot's time is
+its "Update Time" row (IST, year taken from the commit), and its TTE follows
+CalcIvGreeks' calendar-day convention: time to 15:30 on the expiry date / 365.
+The forward is re-estimated from the stored LTPs by put-call parity, and rates
+come from the current cached T-bill curve (historical curves are not kept).
+
+Snapshots are solved CHUNK at a time with iv_batch and appended to
+Data/IV_History.csv; a rerun resumes after the last snapshot already written.
+
+    python Scripts/iv_backfill.py
+    python Scripts/iv_backfill.py --since 2025-06-01 --workers 4
+"""
+import argparse
+import csv
+import io
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+import numpy as np
+import pytz
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from iv_batch import ChainBatch, run_batch
+from iv_calculator import time_to_expiry
+from nifty_options import expiry_to_datetime, synthetic_forward
+from rate_provider import get_curve
+
+SOURCE = 'Data/Option.csv'
+OUTPUT = 'Data/IV_History.csv'
+CHUNK = 500  # snapshots solved per batch; bounds memory
+IST = pytz.timezone('Asia/Kolkata')
+COLUMNS = ['Time', 'Expiry', 'Spot', 'Forward', 'TTE', 'Strike', 'CallIV', 'PutIV', 'IV',
+           'CallDelta', 'PutDelta', 'Theta', 'Vega', 'Gamma']
+
+
+def history(path=SOURCE, since=None):
+    """Yield (commit time, file text) for each commit touching `path`, oldest first"""
+    cmd = ['git', 'log', '--reverse', '--format=%H %ct', '--', path]
+    if since:
+        cmd[2:2] = [f'--since={since}']
+    log = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    cat = subprocess.Popen(['git', 'cat-file', '--batch'], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        for line in log.stdout:
+            sha, timestamp = line.split()
+            cat.stdin.write(f'{sha}:{path}\n'.encode())
+            cat.stdin.flush()
+            header = cat.stdout.readline().split()
+            if len(header) < 3 or header[1] != b'blob':
+                continue  # file deleted in this commit
+            text = cat.stdout.read(int(header[2])).decode('utf-8', 'replace')
+            cat.stdout.read(1)  # trailing newline
+            yield datetime.fromtimestamp(int(timestamp), IST), text
+    finally:
+        cat.stdin.close()
+        cat.wait()
+        log.wait()
+
+
+def parse_snapshot(text, committed):
+    """(time, expiry, spot, strikes, call LTP, put LTP) of one Option.csv version, or None"""
+    strikes, calls, puts = [], [], []
+    expiry = spot = stamp = None
+    for row in csv.DictReader(io.StringIO(text)):
+        put_ltp = row.get('PUT LTP') or ''
+        if put_ltp.startswith('Expiry:'):
+            expiry, spot = put_ltp.split(':', 1)[1].strip(), float(row['STRIKE'])
+        elif row.get('PUT OI CHNG') == 'Update Time':
+            stamp = row.get('PUT OI')
+        elif row.get('STRIKE'):
+            try:
+                strikes.append(float(row['STRIKE']))
+                calls.append(float(row['CALL LTP'] or 'nan'))   # blank: never traded, no IV
+                puts.append(float(put_ltp or 'nan'))
+            except ValueError:
+                continue
+    if not (expiry and strikes):
+        return None
+
+    taken = committed
+    if stamp:
+        try:
+            parsed = datetime.strptime(f'{stamp} {committed.year}', '%d-%b %H:%M %Y')
+            taken = IST.localize(parsed)
+            if taken > committed + timedelta(days=1):  # written in December, committed in January
+                taken = IST.localize(parsed.replace(year=committed.year - 1))
+        except ValueError:
+            pass
+    return taken, expiry, spot, np.array(strikes), np.array(calls), np.array(puts)
+
+
+def last_written(path=OUTPUT):
+    """Time of the last snapshot already in `path`, or None"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, 'rb') as f:
+        f.seek(max(os.path.getsize(path) - 4096, 0))
+        last = f.read().decode().strip().splitlines()[-1].split(',')[0]
+    try:
+        return IST.localize(datetime.strptime(last, '%Y-%m-%d %H:%M'))
+    except ValueError:
+        return None
+
+
+def cell(value, digits):
+    return '' if np.isnan(value) else round(float(value), digits)
+
+
+def solve_chunk(snapshots, writer, workers):
+    curve = get_curve()
+    batch = ChainBatch()
+    solved_at = {}   # snapshot index: (forward, T) it was solved with
+    for i, (taken, expiry, spot, strikes, calls, puts) in enumerate(snapshots):
+        forward, used = synthetic_forward(strikes, calls, puts, spot)
+        forward = forward if used else spot
+        T = time_to_expiry(expiry_to_datetime(expiry), taken)
+        if T > 0:
+            batch.add(i, strikes, calls, puts, forward, T, float(curve.rate(T)))
+            solved_at[i] = (forward, T)
+    results = run_batch(batch, workers)
+    for i, out in results.items():
+        taken, expiry, spot, strikes = snapshots[i][:4]
+        forward, T = solved_at[i]
+        time_text = taken.strftime('%Y-%m-%d %H:%M')
+        for j, strike in enumerate(strikes):
+            writer.writerow([time_text, expiry, spot, round(forward, 2), round(T, 6), strike,
+                             *(cell(out[name][j] * 100, 2) for name in ('call_iv', 'put_iv', 'iv')),
+                             *(cell(out[name][j], 6) for name in ('CallDelta', 'PutDelta', 'Theta', 'Vega', 'Gamma'))])
+    return len(results)
+
+
+def backfill(output=OUTPUT, since=None, workers=1, chunk=CHUNK):
+    resume = last_written(output)
+    new_file = resume is None
+    seen, pending, solved, skipped = resume, [], 0, 0
+    with open(output, 'a' if resume else 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        if new_file:
+            writer.writerow(COLUMNS)
+        for committed, text in history(since=since):
+            snapshot = parse_snapshot(text, committed)
+            # Unchanged snapshots are committed again whenever another file changes
+            if snapshot is None or (seen is not None and snapshot[0] <= seen):
+                skipped += 1
+                continue
+            seen = snapshot[0]
+            pending.append(snapshot)
+            if len(pending) == chunk:
+                solved += solve_chunk(pending, writer, workers)
+                pending = []
+        if pending:
+            solved += solve_chunk(pending, writer, workers)
+    print(f"IV back-fill: {solved} snapshots solved, {skipped} skipped, written to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute IV and Greeks over Data/Option.csv history")
+    parser.add_argument('--since', help='only commits after this date (git --since syntax)')
+    parser.add_argument('--workers', type=int, default=1, help='processes for iv_batch (default 1)')
+    parser.add_argument('--chunk', type=int, default=CHUNK)
+    parser.add_argument('--output', default=OUTPUT)
+    args = parser.parse_args()
+    backfill(args.output, args.since, args.workers, args.chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Process-pool batch runner for IV and Greeks over many chains.
+
+Chains (one symbol/expiry/snapshot each) are packed end to end into a single
+float64 block in shared memory. The block is cut into shards along chain
+boundaries, balanced by row count, and each worker process solves its shard in
+place with the vectorized Black-76 helpers, writing into a second shared block.
+Nothing but shard bounds crosses the process boundary, so no DataFrames or
+arrays are pickled, and the results are read back as views per chain.
+
+    batch = ChainBatch()
+    batch.add(('NIFTY', '28-OCT-2025'), strikes, call_ltp, put_ltp, forward, T)
+    results = run_batch(batch, workers=4)   # {key: {'iv': ..., 'CallDelta': ...}}
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from iv_calculator import black76_greeks, implied_vol
+
+INPUTS = ['strike', 'call', 'put', 'forward', 'T', 'r']
+OUTPUTS = ['call_iv', 'put_iv', 'iv', 'CallDelta', 'PutDelta', 'Theta', 'Vega', 'Gamma']
+SHARDS_PER_WORKER = 4  # smaller shards even out uneven chains across workers
+
+_worker = {}
+
+
+class ChainBatch:
+    """Chains queued for one run; each is a set of strikes at one forward and TTE"""
+
+    def __init__(self):
+        self.keys, self.parts = [], []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, strikes, call_prices, put_prices, forward, T, r=0.0):
+        strikes = np.asarray(strikes, dtype=np.float64)
+        part = np.empty((len(INPUTS), len(strikes)))
+        part[0], part[1], part[2] = strikes, call_prices, put_prices
+        part[3], part[4], part[5] = forward, T, r
+        self.keys.append(key)
+        self.parts.append(part)
+
+    @property
+    def rows(self):
+        return sum(p.shape[1] for p in self.parts)
+
+    def offsets(self):
+        return np.concatenate([[0], np.cumsum([p.shape[1] for p in self.parts])]).astype(np.intp)
+
+
+def solve_block(inputs, outputs):
+    """IV of both legs, OTM-leg IV and its Greeks for the columns of `inputs`, written into `outputs`"""
+    strike, call, put, forward, T, r = inputs
+    # Untraded legs (LTP 0 or NaN) have no IV, and so no Greeks when they are the OTM leg
+    call_iv = implied_vol(np.where(call > 0, call, np.nan), forward, strike, T, r, True)
+    put_iv = implied_vol(np.where(put > 0, put, np.nan), forward, strike, T, r, False)
+    iv = np.where(strike >= forward, call_iv, put_iv)
+    greeks = black76_greeks(forward, strike, T, iv, r)
+    outputs[0], outputs[1], outputs[2] = call_iv, put_iv, iv
+    for row, name in enumerate(OUTPUTS[3:], start=3):
+        outputs[row] = greeks[name]
+
+
+def shard_bounds(offsets, shards):
+    """[(start, stop)] row ranges on chain boundaries with roughly equal row counts"""
+    total = offsets[-1]
+    targets = np.linspace(0, total, shards + 1)[1:-1]
+    cuts = offsets[np.searchsorted(offsets, targets)]
+    edges = np.unique(np.concatenate([[0], cuts, [total]]))
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def _attach(in_name, out_name, rows):
+    blocks = [shared_memory.SharedMemory(name=in_name), shared_memory.SharedMemory(name=out_name)]
+    _worker['blocks'] = blocks
+    _worker['in'] = np.ndarray((len(INPUTS), rows), dtype=np.float64, buffer=blocks[0].buf)
+    _worker['out'] = np.ndarray((len(OUTPUTS), rows), dtype=np.float64, buffer=blocks[1].buf)
+
+
+def _solve_shard(bounds):
+    start, stop = bounds
+    with np.errstate(all='ignore'):
+        solve_block(_worker['in'][:, start:stop], _worker['out'][:, start:stop])
+    return stop - start
+
+
+def run_batch(batch, workers=None):
+    """{key: {output name: array over that chain's strikes}} for every chain in `batch`"""
+    if not len(batch):
+        return {}
+    workers = workers or os.cpu_count() or 1
+    offsets, rows = batch.offsets(), batch.rows
+
+    if workers == 1:
+        inputs, outputs = np.concatenate(batch.parts, axis=1), np.empty((len(OUTPUTS), rows))
+        with np.errstate(all='ignore'):
+            solve_block(inputs, outputs)
+    else:
+        shm_in = shared_memory.SharedMemory(create=True, size=len(INPUTS) * rows * 8)
+        shm_out = shared_memory.SharedMemory(create=True, size=len(OUTPUTS) * rows * 8)
+        try:
+            inputs = np.ndarray((len(INPUTS), rows), dtype=np.float64, buffer=shm_in.buf)
+            np.concatenate(batch.parts, axis=1, out=inputs)
+            shards = shard_bounds(offsets, workers * SHARDS_PER_WORKER)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                     initargs=(shm_in.name, shm_out.name, rows)) as pool:
+                list(pool.map(_solve_shard, shards))
+            outputs = np.ndarray((len(OUTPUTS), rows), dtype=np.float64, buffer=shm_out.buf).copy()
+            del inputs
+        finally:
+            for shm in (shm_in, shm_out):
+                shm.close()
+                shm.unlink()
+
+    return {key: {name: outputs[row, offsets[i]:offsets[i + 1]] for row, name in enumerate(OUTPUTS)}
+            for i, key in enumerate(batch.keys)}
@@ -1,27 +1,23 @@
 import datetime
+import math
+import os
 import scipy.stats
 import numpy as np
 from scipy.stats import norm
+from scipy.special import ndtr
 from enum import Enum, IntEnum
 from scipy.optimize import brentq
 from datetime import datetime as dt, timedelta
 from numpy import abs as ABS, exp as EXP, log as LOG, sqrt as SQRT
 from typing import Tuple, List, Dict, Literal, Union, Any
 
+import instrument
+from market_calendar import HOLIDAYS
+from rate_provider import get_curve
+
 NORM_CDF = norm.cdf
 NORM_PDF = norm.pdf
 
-# Indian Holidays 2025&2026 (Updated)
-HOLIDAYS = [
-    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10",
-    "2025-04-14", "2025-04-18", "2025-05-01", "2025-08-15",
-    "2025-08-27", "2025-10-02", "2025-10-21", "2025-10-22",
-    "2025-11-05", "2025-12-25", "2026-01-26", "2026-03-03", 
-    "2026-03-26", "2026-03-31", "2026-04-03", "2026-04-14", 
-    "2026-05-01", "2026-05-28", "2026-06-26", "2026-09-14", 
-    "2026-10-02", "2026-10-20", "2026-11-10", "2026-11-24", 
-    "2026-12-25"
-]
 CURRENTYEAR = str(dt.now().year)
 NEXTYEAR = str(dt.now().year + 1)
 
@@ -57,12 +53,36 @@ class FromDateType(IntEnum):
     DYNAMIC = 1
 
 
+class ChainContext:
+    """Per-chain Black-76 inputs shared by every strike: forward, TTE, rate and derived terms"""
+
+    __slots__ = ('F', 'T', 'r', 'discount', 'sqrt_T')
+
+    def __init__(self, F: float, T: float, r: float) -> None:
+        self.F = F
+        self.T = T
+        self.r = r
+        self.discount = math.exp(-r * T)
+        self.sqrt_T = SQRT(T)  # numpy scalar: T <= 0 gives inf/nan as before, not ZeroDivisionError
+
+
 class CalcIvGreeks:
-    """Main class for calculating Implied Volatility and Greeks using Black-76 model"""
-    
+    """Main class for calculating Implied Volatility and Greeks using Black-76 model
+
+    Build one instance per chain and evaluate every strike through
+    GetImpVolAndGreeks(); forward, TTE, rate and discount factor live in a
+    ChainContext computed once. Move to the next snapshot with update().
+    """
+
+    __slots__ = (
+        'dateFuture', 'datePast', 'datePastType', 'dayCountType', 'tryMatchWith',
+        'F', 'S', 'K0', 'C0', 'P0', 'r', 'original_C0', 'original_P0', 'K', 'C', 'P', 'T', 'ctx',
+    )
+
     TD64S = "timedelta64[s]"
     IV_LOWER_BOUND = 1e-11
     SECONDS_IN_A_DAY = np.timedelta64(1, "D").astype(TD64S)
+    INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
 
     def __init__(
         self,
@@ -89,28 +109,33 @@ class CalcIvGreeks:
         )
         self.dayCountType = dayCountType
         self.tryMatchWith = tryMatchWith
-        self.F = FuturePrice  # Futures price is primary input for Black-76
-        self.K0 = AtmStrike
-        self.C0 = max(AtmStrikeCallPrice, 0.05)  # Minimum price of 5 paisa
-        self.P0 = max(AtmStrikePutPrice, 0.05)   # Minimum price of 5 paisa
         self.r = interestRate / 100  # Interest rate only for discounting
-        
-        # For Black-76: Always use futures price
-        self.S = self.F  # Black-76: F is used in place of S*exp(rT)
-        
-        # Store original prices for reference
-        self.original_C0 = AtmStrikeCallPrice
-        self.original_P0 = AtmStrikePutPrice
-        
+        self.K = self.C = self.P = None
+
         if StrikePrice is not None:
             self.K = StrikePrice
         if StrikeCallPrice is not None:
             self.C = max(StrikeCallPrice, 0.05) if StrikeCallPrice else 0.05
         if StrikePutPrice is not None:
             self.P = max(StrikePutPrice, 0.05) if StrikePutPrice else 0.05
-        
+
+        self._set_chain(FuturePrice, AtmStrike, AtmStrikeCallPrice, AtmStrikePutPrice)
+
+    def _set_chain(self, FuturePrice, AtmStrike, AtmStrikeCallPrice, AtmStrikePutPrice) -> None:
+        """Chain-level state: ATM quotes, TTE and the shared pricing context"""
+        self.F = FuturePrice  # Futures price is primary input for Black-76
+        self.S = self.F  # Black-76: F is used in place of S*exp(rT)
+        self.K0 = AtmStrike
+        self.C0 = max(AtmStrikeCallPrice, 0.05)  # Minimum price of 5 paisa
+        self.P0 = max(AtmStrikePutPrice, 0.05)   # Minimum price of 5 paisa
+
+        # Store original prices for reference
+        self.original_C0 = AtmStrikeCallPrice
+        self.original_P0 = AtmStrikePutPrice
+
         self.T = self.get_tte()
-        
+        self.ctx = ChainContext(self.F, self.T, self.r)
+
         # Validate ATM prices are reasonable
         self._validate_atm_prices()
 
@@ -136,37 +161,21 @@ class CalcIvGreeks:
         AtmStrikeCallPrice: float,
         AtmStrikePutPrice: float,
         FromDateTime: Union[dt, None] = None,
+        interestRate: Union[float, None] = None,
     ) -> None:
+        """Move the instance to the next snapshot of the same expiry"""
         if FromDateTime is not None:
             self.datePast = FromDateTime
             self.datePastType = FromDateType.FIXED
-        
-        self.F = FuturePrice
-        self.S = self.F  # Update S to current futures price
-        self.K0 = AtmStrike
-        self.C0 = max(AtmStrikeCallPrice, 0.05)
-        self.P0 = max(AtmStrikePutPrice, 0.05)
-        self.T = self.get_tte()
+        if interestRate is not None:
+            self.r = interestRate / 100
+
+        self._set_chain(FuturePrice, AtmStrike, AtmStrikeCallPrice, AtmStrikePutPrice)
 
     @staticmethod
-    def getRiskFreeIntrRate() -> float:
-        import pandas as pd
-        import requests
-        
-        try:
-            return (
-                pd.json_normalize(
-                    requests.get(
-                        "https://techfanetechnologies.github.io"
-                        + "/risk_free_interest_rate/RiskFreeInterestRate.json"
-                    ).json()
-                )
-                .query('GovernmentSecurityName == "364 day T-bills"')
-                .reset_index()
-                .Percent[0]
-            )
-        except:
-            return 6.0  # Default 6% if fetch fails
+    def getRiskFreeIntrRate(T: Union[float, None] = None) -> float:
+        """T-bill rate in percent for time to expiry T (years); the 364 day rate by default"""
+        return round(float(get_curve().rate(364 / 365 if T is None else T)) * 100, 4)
 
     @staticmethod
     def find_atm_strike(all_strikes: List[float], future_price: float) -> float:
@@ -341,45 +350,53 @@ class CalcIvGreeks:
         """Black-76 d1 calculation"""
         if sigma > self.IV_LOWER_BOUND:
             # Black-76: d1 = [ln(F/K) + (σ²/2)T] / (σ√T)
-            return (LOG(self.F / self.K) + (sigma**2 / 2) * self.T) / (sigma * SQRT(self.T))
+            ctx = self.ctx
+            return (math.log(ctx.F / self.K) + (sigma * sigma / 2) * ctx.T) / (sigma * ctx.sqrt_T)
         return np.inf if self.F > self.K else -np.inf
 
     def BS_d2(self, sigma: float):
-        return self.BS_d1(sigma) - (sigma * SQRT(self.T))
+        return self.BS_d1(sigma) - (sigma * self.ctx.sqrt_T)
+
+    def _pdf(self, d: float) -> float:
+        return self.INV_SQRT_2PI * math.exp(-0.5 * d * d)
 
     def BS_CallPricing(self, sigma: float):
         """Black-76 call pricing"""
-        return EXP(-self.r * self.T) * (NORM_CDF(self.BS_d1(sigma)) * self.F - NORM_CDF(self.BS_d2(sigma)) * self.K)
+        d1 = self.BS_d1(sigma)
+        d2 = d1 - sigma * self.ctx.sqrt_T
+        return self.ctx.discount * (ndtr(d1) * self.ctx.F - ndtr(d2) * self.K)
 
     def BS_PutPricing(self, sigma: float):
         """Black-76 put pricing"""
-        return EXP(-self.r * self.T) * (NORM_CDF(-self.BS_d2(sigma)) * self.K - NORM_CDF(-self.BS_d1(sigma)) * self.F)
+        d1 = self.BS_d1(sigma)
+        d2 = d1 - sigma * self.ctx.sqrt_T
+        return self.ctx.discount * (ndtr(-d2) * self.K - ndtr(-d1) * self.ctx.F)
 
     def DeltaCall(self, sigma: float):
         """Black-76 call delta = exp(-rT) * N(d1)"""
-        return EXP(-self.r * self.T) * NORM_CDF(self.BS_d1(sigma))
+        return self.ctx.discount * ndtr(self.BS_d1(sigma))
 
     def DeltaPut(self, sigma: float):
         """Black-76 put delta = exp(-rT) * [N(d1) - 1]"""
-        return EXP(-self.r * self.T) * (NORM_CDF(self.BS_d1(sigma)) - 1)
+        return self.ctx.discount * (ndtr(self.BS_d1(sigma)) - 1)
 
     def Gamma(self, sigma: float) -> float:
         """Black-76 gamma = exp(-rT) * N'(d1) / (F * σ * √T)"""
         if sigma > self.IV_LOWER_BOUND:
-            return EXP(-self.r * self.T) * NORM_PDF(self.BS_d1(sigma)) / (self.F * sigma * SQRT(self.T))
+            return self.ctx.discount * self._pdf(self.BS_d1(sigma)) / (self.ctx.F * sigma * self.ctx.sqrt_T)
         return 0
 
     def Vega(self, sigma: float) -> float:
         """Black-76 vega = exp(-rT) * F * √T * N'(d1)"""
-        return EXP(-self.r * self.T) * NORM_PDF(self.BS_d1(sigma)) * self.F * SQRT(self.T)
+        return self.ctx.discount * self._pdf(self.BS_d1(sigma)) * self.ctx.F * self.ctx.sqrt_T
 
     def ThetaCall(self, sigma: float) -> float:
         """Black-76 call theta"""
-        return -EXP(-self.r * self.T) * (self.F * sigma * NORM_PDF(self.BS_d1(sigma)) / (2 * SQRT(self.T))) - self.r * self.BS_CallPricing(sigma)
+        return -self.ctx.discount * (self.ctx.F * sigma * self._pdf(self.BS_d1(sigma)) / (2 * self.ctx.sqrt_T)) - self.r * self.BS_CallPricing(sigma)
 
     def ThetaPut(self, sigma: float) -> float:
         """Black-76 put theta"""
-        return -EXP(-self.r * self.T) * (self.F * sigma * NORM_PDF(self.BS_d1(sigma)) / (2 * SQRT(self.T))) + self.r * self.BS_PutPricing(sigma)
+        return -self.ctx.discount * (self.ctx.F * sigma * self._pdf(self.BS_d1(sigma)) / (2 * self.ctx.sqrt_T)) + self.r * self.BS_PutPricing(sigma)
 
     def RhoCall(self, sigma: float) -> float:
         """Black-76 call rho = -T * CallPrice"""
@@ -391,19 +408,22 @@ class CalcIvGreeks:
 
     def ImplVolWithBrent(self, OptionLtp, PricingFunction):
         try:
-            ImplVol = brentq(
+            ImplVol, result = brentq(
                 lambda sigma: OptionLtp - PricingFunction(sigma),
                 0.001,  # Lower bound
                 5.0,    # Upper bound (500% IV)
                 xtol=1e-12,
-                maxiter=100
+                maxiter=100,
+                full_output=True
             )
+            instrument.observe('iv.brent_iterations', result.iterations)
             return (
                 ImplVol
                 if ImplVol > self.IV_LOWER_BOUND
                 else self.IV_LOWER_BOUND
             )
         except Exception:
+            instrument.incr('iv.brent_failures')
             return self.IV_LOWER_BOUND
 
     def CallImplVol(self):
@@ -466,7 +486,7 @@ class CalcIvGreeks:
             **_,
             **{
                 "CallDelta": Delta,
-                "PutDelta": round(Delta - EXP(-self.r * self.T), 4),
+                "PutDelta": round(Delta - self.ctx.discount, 4),
                 "Theta": round((self.ThetaPut(StrikeIV) / 365), 4),
                 "Vega": round((self.Vega(StrikeIV) / 100), 4),
                 "Gamma": round(self.Gamma(StrikeIV), 6),
@@ -474,3 +494,174 @@ class CalcIvGreeks:
                 "RhoPut": round(self.RhoPut(PutIV) / 100, 4),
             },
         }
+
+
+# Vectorized Black-76 helpers: every argument broadcasts, so a whole chain
+# (or several expiries at once) is priced and solved in a few array passes.
+
+IV_MIN = 0.001  # Same bracket as CalcIvGreeks.ImplVolWithBrent
+IV_MAX = 5.0
+
+
+def time_to_expiry(expiry: dt, now: Union[dt, None] = None) -> float:
+    """Calendar-day TTE in years to 15:30 on the expiry date, as CalcIvGreeks does by default"""
+    now = dt.now(expiry.tzinfo) if now is None else now
+    close = dt.combine(expiry.date(), datetime.time(15, 30, 0), tzinfo=expiry.tzinfo)
+    return (close - now).total_seconds() / 86400.0 / DayCountType.CALENDARDAYS.value
+
+
+def black76_d1(F, K, T, sigma):
+    return (LOG(F / K) + 0.5 * sigma * sigma * T) / (sigma * SQRT(T))
+
+
+def black76_price_numpy(F, K, T, sigma, r=0.0, is_call=True):
+    """Black-76 option price; is_call may be a boolean array"""
+    F, K, T, sigma, r = map(np.asarray, (F, K, T, sigma, r))
+    d1 = black76_d1(F, K, T, sigma)
+    d2 = d1 - sigma * SQRT(T)
+    df = EXP(-r * T)
+    call = df * (F * ndtr(d1) - K * ndtr(d2))
+    put = df * (K * ndtr(-d2) - F * ndtr(-d1))
+    return np.where(is_call, call, put)
+
+
+def black76_vega_numpy(F, K, T, sigma, r=0.0):
+    """dPrice/dsigma (per 1.00 of vol, same for calls and puts)"""
+    F, K, T, sigma, r = map(np.asarray, (F, K, T, sigma, r))
+    return EXP(-r * T) * F * SQRT(T) * NORM_PDF(black76_d1(F, K, T, sigma))
+
+
+def implied_vol_numpy(price, F, K, T, r=0.0, is_call=True, tol=1e-8, max_iter=50, return_iterations=False):
+    """
+    Vectorized Black-76 implied volatility.
+
+    Newton steps on vega, falling back to bisection whenever a step leaves the
+    [IV_MIN, IV_MAX] bracket. Prices outside the no-arbitrage bounds give NaN, and
+    so do strikes that do not converge within max_iter or whose root lies outside
+    [IV_MIN, IV_MAX] (the steps stall at one of its ends).
+    """
+    price, F, K, T, r, is_call = np.broadcast_arrays(*map(np.asarray, (price, F, K, T, r, is_call)))
+    shape = price.shape
+    price, F, K, T, r, is_call = (np.atleast_1d(a) for a in (price, F, K, T, r, is_call))
+    price = price.astype(np.float64)
+    df = EXP(-r * T)
+    intrinsic = df * np.where(is_call, np.maximum(F - K, 0.0), np.maximum(K - F, 0.0))
+    upper = df * np.where(is_call, F, K)
+    valid = (price > intrinsic) & (price < upper) & (T > 0) & (F > 0) & (K > 0)
+
+    lo = np.full(price.shape, IV_MIN)
+    hi = np.full(price.shape, IV_MAX)
+    # Brenner-Subrahmanyam starting point, kept inside the bracket
+    safe_T = np.where(T > 0, T, 1.0)
+    sigma = np.clip(np.sqrt(2.0 * np.pi / safe_T) * price / np.where(F > 0, F, 1.0), 0.05, 2.0)
+    active = valid.copy()
+    converged = np.zeros(price.shape, dtype=bool)
+
+    iterations = 0
+    while active.any() and iterations < max_iter:
+        iterations += 1
+        idx = np.nonzero(active)
+        s, f, k, t, rr, c = sigma[idx], F[idx], K[idx], T[idx], r[idx], is_call[idx]
+        diff = black76_price_numpy(f, k, t, s, rr, c) - price[idx]
+        done = np.abs(diff) < tol
+        ok = done.copy()
+        # Price is increasing in sigma, so the sign of diff moves one side of the bracket
+        lo[idx] = np.where(diff < 0, s, lo[idx])
+        hi[idx] = np.where(diff > 0, s, hi[idx])
+        vega = black76_vega_numpy(f, k, t, s, rr)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = s - diff / vega
+        bisect = ~np.isfinite(step) | (step <= lo[idx]) | (step >= hi[idx])
+        new_sigma = np.where(bisect, 0.5 * (lo[idx] + hi[idx]), step)
+        collapsed = np.abs(new_sigma - s) < tol * 1e-2
+        # Steps stalling at a limit of the bracket mean the root lies beyond it
+        ok |= collapsed & (s - IV_MIN > tol) & (IV_MAX - s > tol)
+        done |= collapsed
+        converged[idx] = ok
+        sigma[idx] = np.where(done, s, new_sigma)
+        still = active[idx] & ~done
+        active[idx] = still
+
+    iv = np.where(valid & converged, sigma, np.nan).reshape(shape)
+    return (iv, iterations) if return_iterations else iv
+
+
+# Backend switch: "numba" runs the compiled ufuncs in iv_kernels, "numpy" the
+# functions above, "auto" (default) numba when it is installed. Set IV_BACKEND
+# in the environment or call set_backend(); the choice is resolved on first use.
+
+BACKENDS = ('auto', 'numba', 'numpy')
+_backend = {'requested': os.environ.get('IV_BACKEND', 'auto').lower(), 'kernels': None, 'resolved': False}
+
+
+def set_backend(name: str = 'auto') -> str:
+    """Select the kernel backend; returns the one actually in use"""
+    name = name.lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown IV backend {name!r}, expected one of {BACKENDS}")
+    kernels = None
+    if name != 'numpy':
+        try:
+            import iv_kernels as kernels
+        except ImportError:
+            if name == 'numba':
+                raise
+    _backend.update(requested=name, kernels=kernels, resolved=True)
+    return get_backend()
+
+
+def get_backend() -> str:
+    if not _backend['resolved']:
+        set_backend(_backend['requested'])
+    return 'numba' if _backend['kernels'] else 'numpy'
+
+
+def _kernels():
+    get_backend()
+    return _backend['kernels']
+
+
+def black76_price(F, K, T, sigma, r=0.0, is_call=True):
+    """Black-76 option price; is_call may be a boolean array"""
+    kernels = _kernels()
+    if kernels is None:
+        return black76_price_numpy(F, K, T, sigma, r, is_call)
+    return kernels.black76_price(F, K, T, sigma, r, np.asarray(is_call, dtype=bool))
+
+
+def black76_vega(F, K, T, sigma, r=0.0):
+    """dPrice/dsigma (per 1.00 of vol, same for calls and puts)"""
+    kernels = _kernels()
+    if kernels is None:
+        return black76_vega_numpy(F, K, T, sigma, r)
+    return kernels.black76_vega(F, K, T, sigma, r)
+
+
+def implied_vol(price, F, K, T, r=0.0, is_call=True, tol=1e-8, max_iter=50, return_iterations=False):
+    """Vectorized Black-76 implied volatility on the selected backend; NaN outside no-arbitrage bounds"""
+    kernels = _kernels()
+    if kernels is None:
+        iv, iterations = implied_vol_numpy(price, F, K, T, r, is_call, tol, max_iter, True)
+    else:
+        iv, per_strike = kernels.implied_vol(price, F, K, T, r, np.asarray(is_call, dtype=bool), tol, max_iter)
+        iterations = int(np.max(per_strike, initial=0))
+    instrument.observe('iv.iterations', iterations)
+    instrument.incr('iv.strikes', np.size(iv))
+    return (iv, iterations) if return_iterations else iv
+
+
+def black76_greeks(F, K, T, sigma, r=0.0):
+    """Greeks at `sigma` scaled like GetImpVolAndGreeks: theta per day (put), vega per vol point"""
+    F, K, T, sigma, r = map(np.asarray, (F, K, T, sigma, r))
+    df = EXP(-r * T)
+    d1 = black76_d1(F, K, T, sigma)
+    pdf = NORM_PDF(d1)
+    call_delta = df * ndtr(d1)
+    put = black76_price(F, K, T, sigma, r, False)
+    return {
+        'CallDelta': call_delta,
+        'PutDelta': call_delta - df,
+        'Theta': (-df * F * sigma * pdf / (2 * SQRT(T)) + r * put) / 365,
+        'Vega': df * F * SQRT(T) * pdf / 100,
+        'Gamma': df * pdf / (F * sigma * SQRT(T)),
+    }
@@ -0,0 +1,89 @@
+"""
+Numba-compiled Black-76 kernels used by iv_calculator's "numba" backend.
+
+Each kernel is a NumPy ufunc (price, vega) or generalized ufunc (implied vol with
+its iteration count), so it broadcasts over arrays exactly like the NumPy
+versions while running one native loop with no temporaries. Importing this
+module requires numba (pip install numba); iv_calculator falls back to NumPy
+when it is missing.
+"""
+import math
+from numba import boolean, float64, guvectorize, int64, njit, vectorize
+
+IV_MIN = 0.001
+IV_MAX = 5.0
+INV_SQRT2 = 1.0 / math.sqrt(2.0)
+INV_SQRT2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+@njit(cache=True)
+def _ndtr(x):
+    return 0.5 * math.erfc(-x * INV_SQRT2)
+
+
+@njit(cache=True)
+def _price(F, K, T, sigma, r, is_call):
+    sqrt_t = math.sqrt(T)
+    d1 = (math.log(F / K) + 0.5 * sigma * sigma * T) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    df = math.exp(-r * T)
+    if is_call:
+        return df * (F * _ndtr(d1) - K * _ndtr(d2))
+    return df * (K * _ndtr(-d2) - F * _ndtr(-d1))
+
+
+@njit(cache=True)
+def _vega(F, K, T, sigma, r):
+    sqrt_t = math.sqrt(T)
+    d1 = (math.log(F / K) + 0.5 * sigma * sigma * T) / (sigma * sqrt_t)
+    return math.exp(-r * T) * F * sqrt_t * INV_SQRT2PI * math.exp(-0.5 * d1 * d1)
+
+
+@vectorize([float64(float64, float64, float64, float64, float64, boolean)], cache=True)
+def black76_price(F, K, T, sigma, r, is_call):
+    return _price(F, K, T, sigma, r, is_call)
+
+
+@vectorize([float64(float64, float64, float64, float64, float64)], cache=True)
+def black76_vega(F, K, T, sigma, r):
+    return _vega(F, K, T, sigma, r)
+
+
+@guvectorize([(float64, float64, float64, float64, float64, boolean, float64, int64, float64[:], int64[:])],
+             '(),(),(),(),(),(),(),()->(),()', cache=True)
+def implied_vol(price, F, K, T, r, is_call, tol, max_iter, iv, iterations):
+    """Same Newton-with-bisection scheme as iv_calculator.implied_vol, one strike at a time"""
+    iterations[0] = 0
+    iv[0] = math.nan
+    if not (T > 0 and F > 0 and K > 0):
+        return
+    df = math.exp(-r * T)
+    intrinsic = df * (max(F - K, 0.0) if is_call else max(K - F, 0.0))
+    upper = df * (F if is_call else K)
+    if not (intrinsic < price < upper):
+        return
+
+    lo, hi = IV_MIN, IV_MAX
+    sigma = min(max(math.sqrt(2.0 * math.pi / T) * price / F, 0.05), 2.0)
+    n = 0
+    converged = False
+    while n < max_iter:
+        n += 1
+        diff = _price(F, K, T, sigma, r, is_call) - price
+        if abs(diff) < tol:
+            converged = True
+            break
+        if diff < 0:
+            lo = sigma
+        else:
+            hi = sigma
+        vega = _vega(F, K, T, sigma, r)
+        step = sigma - diff / vega if vega > 0 else math.nan
+        if not (lo < step < hi):
+            step = 0.5 * (lo + hi)
+        if abs(step - sigma) < tol * 1e-2:
+            converged = sigma - IV_MIN > tol and IV_MAX - sigma > tol   # stalled at a limit: root beyond it
+            break
+        sigma = step
+    iv[0] = sigma if converged else math.nan
+    iterations[0] = n
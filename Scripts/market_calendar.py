@@ -0,0 +1,30 @@
+"""
+NSE trading calendar shared by the fetchers, the IV engine and the scheduler.
+"""
+from datetime import date, datetime, timedelta
+
+# NSE trading holidays 2025 & 2026
+HOLIDAYS = [
+    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10",
+    "2025-04-14", "2025-04-18", "2025-05-01", "2025-08-15",
+    "2025-08-27", "2025-10-02", "2025-10-21", "2025-10-22",
+    "2025-11-05", "2025-12-25", "2026-01-26", "2026-03-03",
+    "2026-03-26", "2026-03-31", "2026-04-03", "2026-04-14",
+    "2026-05-01", "2026-05-28", "2026-06-26", "2026-09-14",
+    "2026-10-02", "2026-10-20", "2026-11-10", "2026-11-24",
+    "2026-12-25"
+]
+
+HOLIDAY_DATES = frozenset(datetime.strptime(h, "%Y-%m-%d").date() for h in HOLIDAYS)
+
+
+def is_trading_day(day: date) -> bool:
+    """Weekday that is not an NSE holiday"""
+    return day.weekday() < 5 and day not in HOLIDAY_DATES
+
+
+def previous_trading_day(day: date) -> date:
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
@@ -1,43 +1,41 @@
+"""
+Daily AMFI NAV for the tracked funds, plus a per-scheme NAV history.
+
+Every NAV date is one AMFI all_for_date snapshot. The tracked funds' NAVs are
+kept in Data/NAV_History.csv, one row per NAV date and one column per fund. A
+date counts as stored once every tracked fund has a NAV for it, so the
+workflow's retries during the day fetch only a date that is still missing or
+incomplete, and do nothing once it is in.
+
+    python Scripts/nav_fetch.py                          # daily: missing recent dates
+    python Scripts/nav_fetch.py --backfill 2025-01-01    # every missing date since then
+    python Scripts/nav_fetch.py --backfill 2025-01-01 --to 2025-06-30 --workers 4
+
+NAV dates are NSE trading days (market_calendar); back-fill dates are fetched
+concurrently with at most --workers requests in flight.
+"""
+import argparse
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import pytz
 import os
+import sys
 from pathlib import Path
 
-HOLIDAYS = [
-    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10",
-    "2025-04-14", "2025-04-18", "2025-05-01", "2025-08-15",
-    "2025-08-27", "2025-10-02", "2025-10-21", "2025-10-22",
-    "2025-11-05", "2025-12-26", "2026-01-27", "2026-03-04", 
-    "2026-03-27", "2026-04-01", "2026-04-04", "2026-04-15", 
-    "2026-05-02", "2026-05-29", "2026-06-27", "2026-09-15", 
-    "2026-10-03", "2026-10-21", "2026-11-11", "2026-11-25", 
-    "2026-12-26"
-]
-
-target_funds = [
-    "Aditya Birla Sun Life PSU Equity Fund-Direct Plan-Growth",
-    "Axis Focused Fund - Direct Plan - Growth Option",
-    "Axis Large & Mid Cap Fund - Direct Plan - Growth",
-    "Axis Large Cap Fund - Direct Plan - Growth",
-    "Axis Small Cap Fund - Direct Plan - Growth",
-    "ICICI Prudential Banking and PSU Debt Fund - Direct Plan -  Growth",
-    "ICICI Prudential Corporate Bond Fund - Direct Plan - Growth",
-    "ICICI Prudential Gilt Fund - Direct Plan - Growth",
-    "ICICI Prudential Nifty 50 Index Fund - Direct Plan Cumulative Option",
-    "ICICI PRUDENTIAL SILVER ETF FUND OF FUND - Direct Plan - Growth",
-    "ICICI Prudential Technology Fund - Direct Plan -  Growth",
-    "Mahindra Manulife Consumption Fund - Direct Plan -Growth",
-    "Mirae Asset Arbitrage Fund Direct Growth",
-    "Mirae Asset ELSS Tax Saver Fund - Direct Plan - Growth",
-    "Mirae Asset Healthcare Fund Direct Growth",
-    "Nippon India Gold Savings Fund - Direct Plan Growth Plan - Growth Option",
-    "Nippon India Nifty Next 50 Junior BeES FoF - Direct Plan - Growth Plan - Growth Option",
-    "Nippon India Nivesh Lakshya Long Duration Fund- Direct Plan- Growth Option",
-    "quant ELSS Tax Saver Fund - Growth Option - Direct Plan",
-    "SBI GILT FUND - DIRECT PLAN - GROWTH"
-]
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from registry import load_registry
+from market_calendar import is_trading_day
+from instrument import failure, start
+from http_policy import get
+
+NAV_URL = "https://www.amfiindia.com/api/nav-history?query_type=all_for_date&from_date={date}"
+HISTORY_PATH = 'Data/NAV_History.csv'
+LOOKBACK_DAYS = 7  # the daily run also completes any NAV date missed in the last week
+MAX_WORKERS = 4    # concurrent all_for_date requests during a back-fill
+
+target_funds = load_registry().names('nav_funds')
 
 def extract_name(full):
     """Extract display name from full fund name"""
@@ -51,17 +49,19 @@ def extract_name(full):
         result = full.split('-')[0]
     return ' '.join(result.split()).upper()
 
+display_names = [extract_name(fund) for fund in target_funds]
+
 def load_old_data():
     """Load existing NAV data from CSV if exists"""
     csv_path = Path('Data/Daily_NAV.csv')
     old_data = {}
-    
+
     if csv_path.exists():
         try:
             df_old = pd.read_csv(csv_path)
             # Exclude the timestamp row
             df_funds = df_old[~df_old['Fund Name'].str.contains('LAST UPDATED', na=False)]
-            
+
             for _, row in df_funds.iterrows():
                 fund_name = row['Fund Name']
                 # Only store if we have valid NAV data (not '-')
@@ -73,113 +73,153 @@ def load_old_data():
             print(f"Loaded old data for {len(old_data)} funds")
         except Exception as e:
             print(f"Error loading old data: {e}")
-    
+
     return old_data
 
-def main():
-    ist = pytz.timezone('Asia/Kolkata')
-    today = datetime.now(ist)
-    
-    # Check if today is holiday or weekend
-    if today.weekday() in [0, 6] or today.strftime('%Y-%m-%d') in HOLIDAYS:
-        print(f"{today.strftime('%Y-%m-%d')} is holiday/weekend. Exiting.")
-        exit()
-    
-    # Load old data before fetching new data
-    old_data = load_old_data()
-    
-    # Calculate target date for NAV fetch
-    if today.weekday() == 0:  # Monday
-        target_date = today - timedelta(days=3)
-    elif today.weekday() == 6:  # Sunday (shouldn't happen due to check above)
-        target_date = today - timedelta(days=2)
-    else:  # Tuesday to Friday
-        target_date = today - timedelta(days=1)
-    
-    target_date_str = target_date.strftime('%Y-%m-%d')
-    print(f"Fetching NAV data for date: {target_date_str}")
-    
-    # Fetch new NAV data from API
-    url = f"https://www.amfiindia.com/api/nav-history?query_type=all_for_date&from_date={target_date_str}"
-    
+def nav_dates(first, last):
+    """NAV dates (NSE trading days) from `first` to `last`, inclusive, as YYYY-MM-DD"""
+    dates = []
+    day = first
+    while day <= last:
+        if is_trading_day(day):
+            dates.append(day.strftime('%Y-%m-%d'))
+        day += timedelta(days=1)
+    return dates
+
+def load_history(path=HISTORY_PATH):
+    """NAV history as a frame indexed by date (YYYY-MM-DD), one float column per fund"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame(columns=display_names, dtype='float64')
+    return pd.read_csv(path, index_col='Date', dtype={'Date': str})
+
+def save_history(history, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    history.sort_index().to_csv(path, index_label='Date')
+
+def stored_dates(history):
+    """Dates for which every tracked fund already has a NAV (funds never seen in the history don't count)"""
+    if history.empty:
+        return set()
+    columns = history.reindex(columns=display_names).dropna(axis=1, how='all')
+    return set(columns.index[columns.notna().all(axis=1)])
+
+def parse_navs(data):
+    """{display name: {'NAV', 'Update Time'}} for the tracked funds in one all_for_date payload"""
+    wanted_funds = set(target_funds)
+    navs = {}
+    for fund in data.get('data') or []:
+        for scheme in fund.get('schemes') or []:
+            for nav in scheme.get('navs') or []:
+                if nav.get('NAV_Name') in wanted_funds:
+                    time_str = nav.get('hNAV_Upload_display', '')
+                    navs[extract_name(nav['NAV_Name'])] = {
+                        'NAV': str(nav.get('hNAV_Amt', '-')).strip(),
+                        'Update Time': ' '.join(time_str.split()[:2]) if time_str else '-'
+                    }
+    return navs
+
+def fetch_date(session, date):
+    """Tracked funds' NAVs for one date, or None if the request failed"""
     try:
-        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=30)
+        response = get(NAV_URL.format(date=date), session=session)
         response.raise_for_status()
-        data = response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching API data: {e}")
-        exit()
-    
-    # Process new NAV data
-    display_names = [extract_name(fund) for fund in target_funds]
-    fund_mapping = dict(zip(display_names, target_funds))
-    
+        return parse_navs(response.json())
+    except (requests.RequestException, ValueError) as e:
+        failure('amfi', date, e)
+        return None
+
+def fetch_dates(dates, workers=MAX_WORKERS):
+    """{date: navs} for every date fetched, with at most `workers` requests in flight"""
+    if not dates:
+        return {}
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=max(1, min(workers, len(dates)))) as pool:
+        session.headers.update({'User-Agent': 'Mozilla/5.0'})
+        results = pool.map(lambda date: fetch_date(session, date), dates)
+        return {date: navs for date, navs in zip(dates, results) if navs is not None}
+
+def merge_history(history, fetched):
+    """History with the fetched NAVs added; a fund's existing NAV is kept if the new one is unusable"""
+    rows = {}
+    for date, navs in fetched.items():
+        values = pd.to_numeric(pd.Series({name: navs[name]['NAV'] for name in navs}, dtype=object), errors='coerce')
+        if values.notna().any():
+            rows[date] = values
+    if not rows:
+        return history
+    new = pd.DataFrame.from_dict(rows, orient='index')
+    merged = new.combine_first(history) if not history.empty else new
+    return merged.reindex(columns=display_names + [c for c in merged.columns if c not in display_names])
+
+def update_history(dates, workers=MAX_WORKERS, path=HISTORY_PATH):
+    """Fetch the dates in `dates` not yet fully stored; returns {date: navs} of what was fetched"""
+    history = load_history(path)
+    stored = stored_dates(history)
+    missing = [d for d in dates if d not in stored]
+    if not missing:
+        return {}
+    print(f"Fetching NAV data for {len(missing)} date(s): {missing[0]} .. {missing[-1]}")
+    fetched = fetch_dates(missing, workers)
+    for date in missing:
+        got = len(fetched.get(date, {}))
+        print(f"  {date}: {got}/{len(display_names)} funds" if date in fetched else f"  {date}: failed")
+    save_history(merge_history(history, fetched), path)
+    return fetched
+
+def write_daily(fetched, today):
+    """Rewrite Data/Daily_NAV.csv from the newest fetched NAVs, keeping old values for funds not fetched"""
+    old_data = load_old_data()
     new_nav_data = {}
-    if 'data' in data:
-        for fund in data['data']:
-            if 'schemes' in fund:
-                for scheme in fund['schemes']:
-                    if 'navs' in scheme:
-                        for nav in scheme['navs']:
-                            if nav['NAV_Name'] in target_funds:
-                                name = extract_name(nav['NAV_Name'])
-                                time_str = nav.get('hNAV_Upload_display', '')
-                                date_only = ' '.join(time_str.split()[:2]) if time_str else '-'
-                                new_nav_data[name] = {
-                                    'NAV': str(nav.get('hNAV_Amt', '-')).strip(),
-                                    'Update Time': date_only
-                                }
-    
+    for date in sorted(fetched):
+        new_nav_data.update(fetched[date])
     print(f"New data fetched for {len(new_nav_data)} funds")
-    
+
     # Prepare records - use new data if available, else retain old data
     records = []
-    funds_with_new_data = 0
-    funds_with_old_data = 0
-    funds_missing = 0
-    
     for name in display_names:
         if name in new_nav_data:
-            # Use new data
-            records.append({
-                'Fund Name': name,
-                'NAV': new_nav_data[name]['NAV'],
-                'Update Time': new_nav_data[name]['Update Time']
-            })
-            funds_with_new_data += 1
+            records.append({'Fund Name': name, **new_nav_data[name]})
         elif name in old_data:
-            # Retain old data
-            records.append({
-                'Fund Name': name,
-                'NAV': old_data[name]['NAV'],
-                'Update Time': old_data[name]['Update Time']
-            })
-            funds_with_old_data += 1
+            records.append({'Fund Name': name, **old_data[name]})
         else:
             # No data available at all
-            records.append({
-                'Fund Name': name,
-                'NAV': '-',
-                'Update Time': '-'
-            })
-            funds_missing += 1
-    
+            records.append({'Fund Name': name, 'NAV': '-', 'Update Time': '-'})
+
     # Add timestamp row
-    timestamp = today.strftime('%d-%b %H:%M')
     records.append({
         'Fund Name': '',
         'NAV': 'LAST UPDATED:',
-        'Update Time': timestamp
+        'Update Time': today.strftime('%d-%b %H:%M')
     })
-    
-    # Ensure Data directory exists
+
     os.makedirs('Data', exist_ok=True)
-    
-    # Save to CSV
-    df = pd.DataFrame(records)
-    df.to_csv('Data/Daily_NAV.csv', index=False)
-    
+    pd.DataFrame(records).to_csv('Data/Daily_NAV.csv', index=False)
     print(f"File saved: Data/Daily_NAV.csv")
 
+def main():
+    parser = argparse.ArgumentParser(description="Fetch AMFI NAVs for the tracked funds")
+    parser.add_argument('--backfill', metavar='YYYY-MM-DD', help='fetch every missing NAV date from this date')
+    parser.add_argument('--to', metavar='YYYY-MM-DD', help='last back-fill date (default: yesterday)')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    start()
+    ist = pytz.timezone('Asia/Kolkata')
+    today = datetime.now(ist)
+    yesterday = today.date() - timedelta(days=1)
+
+    if args.backfill:
+        last = datetime.strptime(args.to, '%Y-%m-%d').date() if args.to else yesterday
+        dates = nav_dates(datetime.strptime(args.backfill, '%Y-%m-%d').date(), last)
+    else:
+        # NAVs are published the evening after the NAV date, so the newest one is yesterday's
+        dates = nav_dates(today.date() - timedelta(days=LOOKBACK_DAYS), yesterday)
+
+    fetched = update_history(dates, args.workers)
+    if not fetched:
+        print(f"NAV history already holds every date up to {dates[-1] if dates else yesterday}. Exiting.")
+        return
+    if not args.backfill or not args.to:
+        write_daily(fetched, today)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,258 @@
+"""
+Return analytics for the tracked funds over Data/NAV_History.csv.
+
+NAVs are aligned on the history's NAV dates (a fund missing on a date carries
+its previous NAV) and every statistic is computed for all funds at once:
+
+  - 1D / 1W / 1M / 1Y returns and 3Y CAGR, from the NAV on or before each
+    horizon's start date
+  - annualised volatility of daily log returns over the last ROLLING_DAYS
+  - maximum drawdown since the start of the history
+  - correlation matrix of daily log returns over the same window
+
+The running peak, drawdown, the returns in the rolling window and their
+pairwise sums are kept in Data/nav_returns_state.json. A new NAV date adds one
+return row and drops the oldest, so it costs O(funds) (O(funds²) for the
+correlation sums) instead of a pass over the whole history. The state is
+rebuilt from scratch whenever the history changes behind it (a back-fill, a
+completed partial date in the last RECHECK_ROWS rows) or the fund list changes.
+
+    python Scripts/nav_returns.py            # incremental
+    python Scripts/nav_returns.py --rebuild  # recompute everything
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytz
+
+HISTORY_PATH = 'Data/NAV_History.csv'
+STATE_PATH = 'Data/nav_returns_state.json'
+RETURNS_PATH = 'Data/NAV_Returns.csv'
+CORRELATION_PATH = 'Data/NAV_Correlation.csv'
+ROLLING_DAYS = 252  # NAV dates in the volatility / correlation window
+YEAR_DAYS = 252     # NAV dates per year, for annualising volatility
+RECHECK_ROWS = 10   # trailing rows compared on load; nav_fetch only rewrites the last week
+HORIZONS = [
+    ('1W %', pd.DateOffset(weeks=1)),
+    ('1M %', pd.DateOffset(months=1)),
+    ('1Y %', pd.DateOffset(years=1)),
+    ('3Y CAGR %', pd.DateOffset(years=3)),
+]
+
+
+def load_history(path=HISTORY_PATH):
+    """(dates as datetime64[D], fund names, NAV matrix dates x funds)"""
+    df = pd.read_csv(path, index_col='Date').sort_index()
+    return np.array(df.index, dtype='datetime64[D]'), list(df.columns), df.to_numpy(dtype=np.float64)
+
+
+class ReturnState:
+    """Running peak, drawdown and rolling-window return sums for every fund"""
+
+    ARRAYS = ('recent', 'last_nav', 'peak', 'mdd', 'window', 'n', 'sx', 'sxx', 'sxy')
+
+    def __init__(self, funds, window=ROLLING_DAYS):
+        f = len(funds)
+        self.funds = list(funds)
+        self.window_size = window
+        self.rows = 0            # history rows folded in
+        self.last_date = None
+        self.recent = np.empty((0, f))       # raw NAVs of the last rows, to detect rewrites
+        self.last_nav = np.full(f, np.nan)   # carried-forward NAVs
+        self.peak = np.full(f, np.nan)
+        self.mdd = np.zeros(f)
+        self.window = np.empty((0, f))       # log returns in the window, oldest first
+        # Pairwise sums over the window where both funds have a return:
+        # n[i, j] count, sx[i, j] sum of x_i, sxx[i, j] sum of x_i², sxy[i, j] sum of x_i*x_j
+        self.n = np.zeros((f, f))
+        self.sx = np.zeros((f, f))
+        self.sxx = np.zeros((f, f))
+        self.sxy = np.zeros((f, f))
+
+    def _accumulate(self, r, sign):
+        present = ~np.isnan(r)
+        x = np.where(present, r, 0.0)
+        m = present.astype(np.float64)
+        self.n += sign * np.outer(m, m)
+        self.sx += sign * np.outer(x, m)
+        self.sxx += sign * np.outer(x * x, m)
+        self.sxy += sign * np.outer(x, x)
+
+    def add(self, date, row):
+        """Fold in one history row"""
+        nav = np.where(np.isnan(row), self.last_nav, row)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = np.log(nav / self.last_nav)
+            self.peak = np.fmax(self.peak, nav)
+            self.mdd = np.fmin(self.mdd, nav / self.peak - 1.0)
+        if self.rows:
+            self.window = np.vstack([self.window, r])
+            self._accumulate(r, 1.0)
+            if len(self.window) > self.window_size:
+                self._accumulate(self.window[0], -1.0)
+                self.window = self.window[1:]
+        self.last_nav = nav
+        self.recent = np.vstack([self.recent, row])[-RECHECK_ROWS:]
+        self.last_date = str(date)
+        self.rows += 1
+
+    @classmethod
+    def from_history(cls, dates, funds, navs, window=ROLLING_DAYS):
+        """State after every row of the history, computed in whole-array passes"""
+        state = cls(funds, window)
+        if len(dates) == 0:
+            return state
+        filled = pd.DataFrame(navs).ffill().to_numpy()
+        peak = np.fmax.accumulate(filled, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            state.mdd = np.fmin(np.nanmin(np.vstack([filled / peak - 1.0, np.zeros((1, len(funds)))]), axis=0), 0.0)
+            returns = np.log(filled[1:] / filled[:-1])
+        state.peak, state.last_nav = peak[-1], filled[-1]
+        state.window = returns[-window:]
+        present = ~np.isnan(state.window)
+        x = np.where(present, state.window, 0.0)
+        m = present.astype(np.float64)
+        state.n, state.sx, state.sxx, state.sxy = m.T @ m, x.T @ m, (x * x).T @ m, x.T @ x
+        state.recent = navs[-RECHECK_ROWS:]
+        state.rows, state.last_date = len(dates), str(dates[-1])
+        return state
+
+    def volatility(self):
+        """Annualised volatility of daily log returns over the window, per fund"""
+        n, s1, s2 = np.diag(self.n), np.diag(self.sx), np.diag(self.sxx)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (s2 - s1 * s1 / n) / (n - 1)
+            return np.where(n > 1, np.sqrt(np.maximum(var, 0.0) * YEAR_DAYS), np.nan)
+
+    def correlation(self):
+        n, sx, sxx, sxy = self.n, self.sx, self.sxx, self.sxy
+        sy, syy = sx.T, sxx.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = sxy - sx * sy / n
+            var_x = np.maximum(sxx - sx * sx / n, 0.0)
+            var_y = np.maximum(syy - sy * sy / n, 0.0)
+            corr = cov / np.sqrt(var_x * var_y)
+        corr = np.where(n > 2, np.clip(corr, -1.0, 1.0), np.nan)
+        np.fill_diagonal(corr, np.where(np.diag(n) > 2, 1.0, np.nan))
+        return corr
+
+    def matches(self, dates, funds, navs):
+        """True if the history still starts with the rows this state has folded in"""
+        if funds != self.funds or self.rows == 0 or self.rows > len(dates):
+            return False
+        k = len(self.recent)
+        return (str(dates[self.rows - 1]) == self.last_date
+                and np.array_equal(navs[self.rows - k:self.rows], self.recent, equal_nan=True))
+
+    def to_json(self):
+        data = {'funds': self.funds, 'window_size': self.window_size, 'rows': self.rows, 'last_date': self.last_date}
+        for name in self.ARRAYS:
+            data[name] = np.asarray(getattr(self, name)).tolist()
+        return data
+
+    @classmethod
+    def from_json(cls, data):
+        state = cls(data['funds'], data['window_size'])
+        state.rows, state.last_date = data['rows'], data['last_date']
+        for name in cls.ARRAYS:
+            setattr(state, name, np.array(data[name], dtype=np.float64))
+        state.window = state.window.reshape(-1, len(state.funds))
+        state.recent = state.recent.reshape(-1, len(state.funds))
+        return state
+
+
+def load_state(path=STATE_PATH):
+    try:
+        with open(path) as f:
+            return ReturnState.from_json(json.load(f))
+    except (FileNotFoundError, KeyError, TypeError, ValueError):
+        return None
+
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(state.to_json(), f)
+
+
+def update_state(dates, funds, navs, state=None, window=ROLLING_DAYS):
+    """Fold the rows of the history the state hasn't seen yet, rebuilding it if the history changed"""
+    if state is None or state.window_size != window or not state.matches(dates, funds, navs):
+        if state is not None:
+            print("NAV history changed since the last run; rebuilding return state")
+        state = ReturnState.from_history(dates, funds, navs, window)
+        print(f"Return state rebuilt at {state.last_date} from {len(dates)} NAV dates")
+        return state
+    new_rows = len(dates) - state.rows
+    for i in range(state.rows, len(dates)):
+        state.add(dates[i], navs[i])
+    print(f"Return state at {state.last_date}: {new_rows} new NAV date(s) folded in")
+    return state
+
+
+def carried_nav(navs, i):
+    """Each fund's last NAV on or before row i, walking back only until every fund has one"""
+    row = navs[i].astype(np.float64)
+    j = i
+    while j > 0 and np.isnan(row).any():
+        j -= 1
+        row = np.where(np.isnan(row), navs[j], row)
+    return row
+
+
+def horizon_returns(dates, navs, last_nav):
+    """{column: % return per fund} from the carried-forward NAV on or before each horizon's start"""
+    last = pd.Timestamp(dates[-1])
+    out = {'1D %': (last_nav / carried_nav(navs, len(dates) - 2) - 1.0) * 100 if len(dates) > 1
+           else np.full(len(last_nav), np.nan)}
+    for column, offset in HORIZONS:
+        start = np.datetime64((last - offset).date(), 'D')
+        i = np.searchsorted(dates, start, side='right') - 1
+        if i < 0 or dates[0] > start:
+            out[column] = np.full(len(last_nav), np.nan)
+            continue
+        growth = last_nav / carried_nav(navs, i)
+        years = (dates[-1] - dates[i]).astype(np.int64) / 365.0
+        out[column] = (growth ** (1.0 / years) - 1.0) * 100 if column.endswith('CAGR %') else (growth - 1.0) * 100
+    return out
+
+
+def write_outputs(state, returns, returns_path=RETURNS_PATH, correlation_path=CORRELATION_PATH):
+    timestamp = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%d-%b %H:%M')
+    table = pd.DataFrame({'Fund Name': state.funds, 'NAV': state.last_nav})
+    for column, values in returns.items():
+        table[column] = np.round(values, 2)
+    table['Vol %'] = np.round(state.volatility() * 100, 2)
+    table['Max DD %'] = np.round(state.mdd * 100, 2)
+    table.loc[len(table)] = [''] * (len(table.columns) - 2) + ['Update Time', timestamp]
+
+    os.makedirs(os.path.dirname(returns_path), exist_ok=True)
+    table.to_csv(returns_path, index=False)
+    pd.DataFrame(np.round(state.correlation(), 3), index=state.funds, columns=state.funds) \
+        .to_csv(correlation_path, index_label='Fund Name')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Returns, volatility, drawdown and correlation of the tracked funds")
+    parser.add_argument('--rebuild', action='store_true', help='ignore the cached state')
+    args = parser.parse_args()
+
+    if not os.path.exists(HISTORY_PATH):
+        print(f"{HISTORY_PATH} not found; run nav_fetch.py first")
+        return
+    dates, funds, navs = load_history()
+    if len(dates) == 0:
+        print("NAV history is empty")
+        return
+
+    state = update_state(dates, funds, navs, None if args.rebuild else load_state())
+    save_state(state)
+    write_outputs(state, horizon_returns(dates, navs, state.last_nav))
+    print(f"Files saved: {RETURNS_PATH}, {CORRELATION_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,40 @@
-import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import pytz
 import os
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0'
-}
+import sys
 
-url = "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%2050"
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from registry import load_registry
+from constituents import fetch_all, write_breadth
+from instrument import start, timer
 
-response = requests.get(url, headers=headers)
-data = response.json()
+start()
 
-target_symbols = [
-    "RELIANCE",
-    "HDFCBANK", 
-    "BHARTIARTL",
-    "TCS",
-    "ICICIBANK",
-    "SBIN",
-    "INFY",
-    "BAJFINANCE",
-    "LT",
-    "HINDUNILVR"
-]
+# NIFTY 50 comes from the same concurrent fetch as the other breadth indices
+engines = fetch_all()
+with timer('write'):
+    write_breadth(engines)
+nifty = engines.get("NIFTY 50")
+if nifty is None:
+    raise SystemExit("NIFTY 50 constituents unavailable")
+
+target_symbols = load_registry().symbols('nifty50_top10', 'nse_equity')
 
 symbol_dict = {}
-for item in data['data']:
-    symbol = item.get('symbol')
-    
-    if symbol in target_symbols:
-        pchange = item.get('pChange')
-        if pchange is not None:
-            percent_change_str = f"{pchange}%"
-        else:
-            percent_change_str = ""
-        
-        symbol_dict[symbol] = {
-            'Symbol': symbol,
-            'LTP': item.get('lastPrice'),
-            'Chng': item.get('change'),
-            '%': percent_change_str,
-            'Previous': item.get('previousClose'),
-            'Yr Hi': item.get('yearHigh'),
-            'Yr Lo': item.get('yearLow')
-        }
+for i in nifty.select(target_symbols):
+    symbol = nifty.symbols[i]
+    pchange = nifty.pchange[i]
+    symbol_dict[symbol] = {
+        'Symbol': symbol,
+        'LTP': nifty.ltp[i],
+        'Chng': nifty.change[i],
+        '%': f"{pchange}%" if np.isfinite(pchange) else "",
+        'Previous': nifty.prev_close[i],
+        'Yr Hi': nifty.year_high[i],
+        'Yr Lo': nifty.year_low[i]
+    }
 
 records = []
 for symbol in target_symbols:
@@ -1,26 +1,25 @@
 import requests
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, time, date
 import pytz
 import os
 import sys
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from iv_calculator import CalcIvGreeks, TryMatchWith
-
-# Define holidays (same as before)
-HOLIDAYS = [
-    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10",
-    "2025-04-14", "2025-04-18", "2025-05-01", "2025-08-15",
-    "2025-08-27", "2025-10-02", "2025-10-21", "2025-10-22",
-    "2025-11-05", "2025-12-25", "2026-01-26", "2026-03-03", 
-    "2026-03-26", "2026-03-31", "2026-04-03", "2026-04-14", 
-    "2026-05-01", "2026-05-28", "2026-06-26", "2026-09-14", 
-    "2026-10-02", "2026-10-20", "2026-11-10", "2026-11-24", 
-    "2026-12-25"
-]
-
-HOLIDAY_DATES = [datetime.strptime(holiday, "%Y-%m-%d").date() for holiday in HOLIDAYS]
+from iv_calculator import CalcIvGreeks, TryMatchWith, implied_vol, time_to_expiry
+from chain_store import ChainStore, STRIKE_FIELDS
+from vol_surface import VolSurface, fit_smile
+from option_analytics import summarize_chain, write_summary
+from registry import load_registry
+from market_calendar import HOLIDAYS, HOLIDAY_DATES
+from rate_provider import get_curve
+from instrument import failure, start, timer
+from http_policy import get
+
+SURFACE_EXPIRIES = 4  # nearest expiries fitted into Data/VolSurface.csv and Data/OptionSummary.csv
+
 
 def is_market_day():
     """Check if current day is a trading day (weekday and not a holiday)"""
@@ -85,6 +84,7 @@ def get_market_status_message():
     return f"Market open - {weekday}", True
 
 def main():
+    start()
     status_message, is_open = get_market_status_message()
     ist = pytz.timezone('Asia/Kolkata')
     current_time = datetime.now(ist).strftime('%Y-%m-%d %H:%M:%S IST')
@@ -103,7 +103,8 @@ def main():
     data, expiry = get_option_chain(expiry=expiry_date)
     
     if data:
-        df = create_option_chain_dataframe(data, expiry)
+        with timer('chain_iv'):
+            df = create_option_chain_dataframe(data, expiry)
         os.makedirs('Data', exist_ok=True)
         
         output_file = 'Data/Option.csv'
@@ -116,6 +117,19 @@ def main():
         print(f"Underlying: {data['records']['underlyingValue']}")
         print(f"Expiry: {expiry}")
         print(f"Rows: {len(df)}")
+
+        session = nse_session()
+        symbol_chains = {"NIFTY": fetch_chains("NIFTY", known={expiry: data}, session=session)}
+        with timer('surface'):
+            write_surface(build_surface(symbol_chains["NIFTY"]))
+        with timer('chain_store'):
+            store_chains("NIFTY", symbol_chains["NIFTY"])
+
+        others = [s for s in load_registry().symbols('option_chains') if s != "NIFTY"]
+        with ThreadPoolExecutor(max_workers=max(len(others), 1)) as pool:
+            symbol_chains.update(zip(others, pool.map(lambda s: fetch_chains(s, session=session), others)))
+        with timer('summary'):
+            write_summary(summarize_chains(symbol_chains))
     else:
         print("Failed to fetch option chain data")
 
@@ -126,61 +140,81 @@ headers = {
     'Referer': 'https://www.nseindia.com/option-chain'
 }
 
+FORWARD_STRIKES = 10     # nearest strikes to spot used for the synthetic forward
+FORWARD_MAD_CUTOFF = 3.0 # parity estimates further than this many MADs from the median are dropped
+
+def synthetic_forward(strikes, call_ltp, put_ltp, spot, call_bid=None, call_ask=None,
+                      put_bid=None, put_ask=None, call_volume=None, put_volume=None,
+                      n_strikes=FORWARD_STRIKES):
+    """Weighted median of K + C - P over the liquid strikes nearest the money.
+
+    Quotes are stale when a leg did not trade and has no two-sided book, or when its
+    LTP lies outside its bid/ask; a stale LTP is replaced by the mid when a book
+    exists and dropped otherwise. Only LTPs are required, so stored chains without
+    bid/ask/volume work too. Returns (forward, strikes used), or (nan, 0).
+    """
+    strikes = np.asarray(strikes, dtype=np.float64)
+    n = len(strikes)
+
+    def column(values, fill):
+        return np.full(n, fill) if values is None else np.asarray(values, dtype=np.float64)
+
+    def leg_price(ltp, bid, ask, volume):
+        ltp, bid, ask, volume = column(ltp, 0.0), column(bid, 0.0), column(ask, 0.0), column(volume, 1.0)
+        book = (bid > 0) & (ask >= bid)
+        mid = 0.5 * (bid + ask)
+        off_book = book & ((ltp < bid) | (ltp > ask))
+        price = np.where(off_book | (book & (ltp <= 0)), mid, ltp)
+        live = np.where(book, True, (volume > 0) & (ltp > 0))
+        spread = np.where(book, ask - bid, np.nan)
+        return price, live, spread
+
+    call, call_live, call_spread = leg_price(call_ltp, call_bid, call_ask, call_volume)
+    put, put_live, put_spread = leg_price(put_ltp, put_bid, put_ask, put_volume)
+
+    near = np.argsort(np.abs(strikes - spot))[:n_strikes]
+    near = near[call_live[near] & put_live[near]]
+    if not len(near):
+        return np.nan, 0
+
+    forwards = strikes[near] + call[near] - put[near]
+    # Tighter books and strikes closer to spot count more; LTP-only strikes get the median spread
+    spread = call_spread[near] + put_spread[near]
+    spread = np.where(np.isfinite(spread), spread, np.nanmedian(spread) if np.isfinite(spread).any() else 1.0)
+    width = max(np.abs(strikes[near] - spot).max(), 1.0)
+    weights = np.exp(-((strikes[near] - spot) / width) ** 2) / np.maximum(spread, 0.05)
+
+    median = np.median(forwards)
+    mad = np.median(np.abs(forwards - median))
+    keep = np.abs(forwards - median) <= FORWARD_MAD_CUTOFF * max(mad, 1e-6 * spot)
+    forwards, weights = forwards[keep], weights[keep]
+
+    order = np.argsort(forwards)
+    cumulative = np.cumsum(weights[order])
+    forward = forwards[order][np.searchsorted(cumulative, 0.5 * cumulative[-1])]
+    return float(forward), int(keep.sum())
+
+def chain_forward(a, spot):
+    """synthetic_forward() over the columns built by chain_arrays()"""
+    return synthetic_forward(a['strike'], a['call_ltp'], a['put_ltp'], spot,
+                             a['call_bid'], a['call_ask'], a['put_bid'], a['put_ask'],
+                             a['call_volume'], a['put_volume'])
+
 def get_future_price(symbol="NIFTY", data=None):
-    """Calculate synthetic future price using ATM put-call parity with 50-multiple strikes"""
+    """Synthetic future from put-call parity across the liquid near-money strikes"""
     try:
         if data is None:
             print("Warning: No option chain data available for future calculation")
             return 0
-            
-        # Get all strikes including 50-multiples
-        all_strikes = []
-        for item in data['records']['data']:
-            strike = item['strikePrice']
-            # Include both 50 and 100 multiples
-            if strike % 50 == 0:
-                all_strikes.append(strike)
-        
-        if not all_strikes:
-            print("Warning: No valid strikes found for future calculation")
-            return 0
-        
-        underlying_value = data['records']['underlyingValue']
-        
-        # Find ATM strike (closest to underlying value, can be 50-multiple)
-        atm_strike = min(all_strikes, key=lambda x: abs(x - underlying_value))
-        
-        # Find the data for ATM strike
-        atm_data = None
-        for item in data['records']['data']:
-            if item['strikePrice'] == atm_strike:
-                atm_data = item
-                break
-        
-        if atm_data is None:
-            print(f"Warning: No data found for ATM strike {atm_strike}")
+
+        forward, used = chain_forward(chain_arrays(data), data['records']['underlyingValue'])
+        if not used:
+            print("Warning: No liquid strikes found for future calculation")
             return 0
-        
-        # Get ATM call and put prices
-        ce_data = atm_data.get('CE', {})
-        pe_data = atm_data.get('PE', {})
-        
-        atm_call_price = ce_data.get('lastPrice', 0)
-        atm_put_price = pe_data.get('lastPrice', 0)
-        
-        # Apply minimum 5 paisa for calculation
-        calc_call_price = max(atm_call_price, 0.05)
-        calc_put_price = max(atm_put_price, 0.05)
-        
-        # Calculate synthetic future: F = K + C - P
-        synthetic_future = atm_strike + calc_call_price - calc_put_price
-        
-        print(f"Future Calculation: ATM Strike={atm_strike} (50-multiple), "
-              f"CE={calc_call_price:.2f}, PE={calc_put_price:.2f}, "
-              f"Future={synthetic_future:.2f}")
-        
-        return synthetic_future
-        
+
+        print(f"Future Calculation: {used} strikes, Future={forward:.2f}")
+        return forward
+
     except Exception as e:
         print(f"Error calculating synthetic future: {e}")
         return 0
@@ -223,13 +257,122 @@ def get_option_chain(symbol="NIFTY", expiry=None):
     
     session = requests.Session()
     session.headers.update(headers)
-    session.get("https://www.nseindia.com")
+    get("https://www.nseindia.com", session=session)
     
-    response = session.get(url)
+    response = get(url, session=session)
     data = response.json()
     
     return data, expiry
 
+def nse_session():
+    session = requests.Session()
+    session.headers.update(headers)
+    try:
+        get("https://www.nseindia.com", session=session)  # cookies for the API calls
+    except requests.RequestException as e:
+        failure('nse', 'home page', e)
+    return session
+
+def get_expiry_dates(symbol="NIFTY", session=None):
+    """Listed expiries for `symbol`, nearest first, formatted like get_next_tuesday()"""
+    session = session or nse_session()
+    try:
+        info = get(f"https://www.nseindia.com/api/option-chain-contract-info?symbol={symbol}", session=session).json()
+        dates = [datetime.strptime(d, '%d-%b-%Y') for d in info.get('expiryDates', [])]
+    except (requests.RequestException, ValueError) as e:
+        failure('nse', f"{symbol} expiries", e)
+        return []
+    return [d.strftime('%d-%b-%Y').upper() for d in sorted(dates)]
+
+def expiry_to_datetime(expiry_date):
+    expiry_datetime = datetime.strptime(expiry_date, '%d-%b-%Y').replace(hour=15, minute=30, second=0)
+    return pytz.timezone('Asia/Kolkata').localize(expiry_datetime)
+
+def chain_arrays(data):
+    """One pass over the chain records into parallel NumPy columns sorted by strike"""
+    records = sorted(data['records']['data'], key=lambda item: item['strikePrice'])
+    fields = {
+        'ltp': 'lastPrice', 'bid': 'buyPrice1', 'ask': 'sellPrice1', 'oi': 'openInterest',
+        'oi_chng': 'changeinOpenInterest', 'volume': 'totalTradedVolume',
+    }
+    arrays = {'strike': np.array([item['strikePrice'] for item in records], dtype=np.float64)}
+    for side, key in (('call', 'CE'), ('put', 'PE')):
+        legs = [item.get(key) or {} for item in records]
+        for name, field in fields.items():
+            arrays[f'{side}_{name}'] = np.array([leg.get(field) or 0 for leg in legs], dtype=np.float64)
+    return arrays
+
+def fetch_chains(symbol="NIFTY", expiries=None, known=None, session=None, limit=SURFACE_EXPIRIES):
+    """{expiry: chain} for the nearest `limit` expiries, fetched concurrently; `known` chains are reused"""
+    session = session or nse_session()
+    expiries = (expiries or get_expiry_dates(symbol, session) or list(known or []))[:limit]
+    chains = {e: d for e, d in (known or {}).items() if e in expiries}
+
+    def fetch(expiry):
+        try:
+            url = f"https://www.nseindia.com/api/option-chain-v3?type=Indices&symbol={symbol}&expiry={expiry}"
+            return expiry, get(url, session=session).json()
+        except (requests.RequestException, ValueError) as e:
+            failure('nse', f"{symbol} {expiry}", e)
+            return expiry, None
+
+    missing = [e for e in expiries if e not in chains]
+    with ThreadPoolExecutor(max_workers=max(len(missing), 1)) as pool:
+        chains.update({e: d for e, d in pool.map(fetch, missing) if d and d.get('records', {}).get('data')})
+    return {e: chains[e] for e in expiries if e in chains}
+
+def prepare_chain(expiry, chain, now):
+    """(columns, spot, forward, T) of one fetched chain"""
+    arrays = chain_arrays(chain)
+    spot = chain['records']['underlyingValue']
+    forward, used = chain_forward(arrays, spot)
+    return arrays, spot, (forward if used else spot), time_to_expiry(expiry_to_datetime(expiry), now)
+
+def build_surface(chains):
+    """Fit a smile for each expiry's chain and join them into a surface"""
+    now = datetime.now(pytz.timezone('Asia/Kolkata'))
+    curve = get_curve()
+    fits = []
+    for expiry, chain in chains.items():
+        arrays, spot, forward, T = prepare_chain(expiry, chain, now)
+        # Raw LTPs: fit_smile drops untraded (0) strikes itself
+        fits.append(fit_smile(expiry, T, forward, arrays['strike'], arrays['call_ltp'], arrays['put_ltp'],
+                              float(curve.rate(T))))
+    return VolSurface(fits)
+
+def store_chains(symbol, chains):
+    """Append each expiry's snapshot, with OTM-side IV per strike, to its ChainStore"""
+    now = datetime.now(pytz.timezone('Asia/Kolkata'))
+    curve = get_curve()
+    for expiry, chain in chains.items():
+        arrays, spot, forward, T = prepare_chain(expiry, chain, now)
+        is_call = arrays['strike'] >= forward
+        prices = np.where(is_call, arrays['call_ltp'], arrays['put_ltp']).astype(np.float64)
+        columns = {name: arrays[name] for name in STRIKE_FIELDS if name in arrays}
+        iv = implied_vol(prices, forward, arrays['strike'], T, float(curve.rate(T)), is_call) * 100
+        columns['iv'] = np.where(prices > 0, iv, np.nan)   # untraded strikes have no IV
+        ChainStore(symbol, expiry).append(int(now.timestamp()), arrays['strike'], columns, spot, forward)
+
+def summarize_chains(symbol_chains):
+    """OptionSummary rows for {symbol: {expiry: chain}}"""
+    rows = []
+    for symbol, chains in symbol_chains.items():
+        for expiry, chain in chains.items():
+            rows.append(summarize_chain(symbol, expiry, chain_arrays(chain), chain['records']['underlyingValue']))
+    return rows
+
+def write_surface(surface, output_file='Data/VolSurface.csv'):
+    rows = surface.term_structure()
+    if not rows:
+        print("Volatility surface: no expiry could be fitted")
+        return
+    df = pd.DataFrame(rows)
+    df.to_csv(output_file, index=False)
+    current_time = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%d-%b %H:%M')
+    with open(output_file, 'a') as f:
+        f.write(',' * (len(df.columns) - 2) + f'Update Time,{current_time}\n')
+    print(f"Volatility surface: {len(rows)} expiries, fit {df['Fit ms'].sum():.2f} ms total")
+
 def find_atm_strike_and_prices(df, future_price):
     """
     Find ATM strike based on future price with validation
@@ -278,20 +421,33 @@ def calculate_iv_for_dataframe(df, future_price, expiry_datetime):
     if atm_strike is None or future_price <= 0:
         return [''] * len(df)
     
-    print(f"ATM Calculation: Strike={atm_strike}, Future={future_price:.2f}, "
+    rate = CalcIvGreeks.getRiskFreeIntrRate(time_to_expiry(expiry_datetime))
+    print(f"ATM Calculation: Strike={atm_strike}, Future={future_price:.2f}, Rate={rate:.2f}%, "
           f"Call={atm_call_price:.2f}, Put={atm_put_price:.2f}")
     
+    # One calculator for the chain: forward, TTE, rate and discount are fixed
+    # for the expiry, only the strike and its prices change per row
+    calculator = CalcIvGreeks(
+        FuturePrice=future_price,
+        AtmStrike=atm_strike,
+        AtmStrikeCallPrice=atm_call_price,
+        AtmStrikePutPrice=atm_put_price,
+        ExpiryDateTime=expiry_datetime,
+        tryMatchWith=TryMatchWith.CUSTOM,
+        interestRate=rate
+    )
+    
     iv_values = []
     
-    for idx, row in df.iterrows():
-        if not isinstance(row['STRIKE'], (int, float)):
+    for strike, call_ltp, put_ltp in zip(df['STRIKE'], df['CALL LTP'], df['PUT LTP']):
+        if not isinstance(strike, (int, float)):
             iv_values.append('')
             continue
             
-        strike = float(row['STRIKE'])
+        strike = float(strike)
         
-        call_price = float(row['CALL LTP']) if row['CALL LTP'] not in ['', None] else 0
-        put_price = float(row['PUT LTP']) if row['PUT LTP'] not in ['', None] else 0
+        call_price = float(call_ltp) if call_ltp not in ['', None] else 0
+        put_price = float(put_ltp) if put_ltp not in ['', None] else 0
         
         # Skip if both prices are zero or invalid
         if (call_price <= 0 and put_price <= 0) or strike <= 0:
@@ -303,17 +459,6 @@ def calculate_iv_for_dataframe(df, future_price, expiry_datetime):
         calc_put_price = max(put_price, 0.05) if put_price > 0 else 0.05
         
         try:
-            # Initialize calculator with Black-76 parameters
-            calculator = CalcIvGreeks(
-                FuturePrice=future_price,
-                AtmStrike=atm_strike,
-                AtmStrikeCallPrice=atm_call_price,
-                AtmStrikePutPrice=atm_put_price,
-                ExpiryDateTime=expiry_datetime,
-                tryMatchWith=TryMatchWith.CUSTOM
-            )
-            
-            # Get IV and Greeks for this strike
             result = calculator.GetImpVolAndGreeks(
                 StrikePrice=strike,
                 StrikeCallPrice=calc_call_price,
@@ -0,0 +1,81 @@
+"""
+Option chain analytics from open interest and volume.
+
+Works on the parallel strike-sorted columns built by nifty_options.chain_arrays():
+
+  - max pain: the settlement strike that minimizes the total intrinsic value owed
+    to option holders, from a strikes x strikes payoff matrix
+  - put-call ratio by OI, by volume and by today's OI change
+  - OI walls: the strikes with the largest call and put open interest, and the
+    strikes where most OI was added today
+
+Every expiry of every symbol becomes one row of Data/OptionSummary.csv.
+"""
+import numpy as np
+import pandas as pd
+from datetime import datetime
+import pytz
+import os
+
+OUTPUT = 'Data/OptionSummary.csv'
+
+
+def max_pain(strikes, call_oi, put_oi):
+    """Strike at which option writers pay out the least; nan for an empty chain"""
+    if not len(strikes) or not (call_oi.sum() + put_oi.sum()):
+        return np.nan
+    # payout[i, j]: what the contracts at strike j are worth if the index settles at strike i
+    diff = strikes[:, None] - strikes[None, :]
+    payout = np.maximum(diff, 0.0) @ call_oi + np.maximum(-diff, 0.0) @ put_oi
+    return float(strikes[np.argmin(payout)])
+
+
+def ratio(put, call):
+    total = call.sum()
+    return round(float(put.sum() / total), 2) if total > 0 else np.nan
+
+
+def wall(strikes, values):
+    """(strike, value) of the largest entry of `values`"""
+    if not len(values) or values.max() <= 0:
+        return np.nan, 0
+    i = int(np.argmax(values))
+    return float(strikes[i]), int(values[i])
+
+
+def summarize_chain(symbol, expiry, a, spot):
+    strikes = a['strike']
+    call_wall, call_wall_oi = wall(strikes, a['call_oi'])
+    put_wall, put_wall_oi = wall(strikes, a['put_oi'])
+    call_add, call_add_oi = wall(strikes, a['call_oi_chng'])
+    put_add, put_add_oi = wall(strikes, a['put_oi_chng'])
+    return {
+        'Symbol': symbol,
+        'Expiry': expiry,
+        'Spot': spot,
+        'Max Pain': max_pain(strikes, a['call_oi'], a['put_oi']),
+        'PCR OI': ratio(a['put_oi'], a['call_oi']),
+        'PCR Vol': ratio(a['put_volume'], a['call_volume']),
+        'PCR OI Chng': ratio(a['put_oi_chng'], a['call_oi_chng']),
+        'Call Wall': call_wall,
+        'Call Wall OI': call_wall_oi,
+        'Put Wall': put_wall,
+        'Put Wall OI': put_wall_oi,
+        'Call OI Add': call_add,
+        'Call OI Added': call_add_oi,
+        'Put OI Add': put_add,
+        'Put OI Added': put_add_oi,
+    }
+
+
+def write_summary(rows, output_file=OUTPUT):
+    if not rows:
+        print("Option summary: no chains to summarize")
+        return
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    df = pd.DataFrame(rows)
+    df.to_csv(output_file, index=False)
+    current_time = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%d-%b %H:%M')
+    with open(output_file, 'a') as f:
+        f.write(',' * (len(df.columns) - 2) + f'Update Time,{current_time}\n')
+    print(f"Option summary: {len(rows)} chains written to {output_file}")
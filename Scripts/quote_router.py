@@ -0,0 +1,156 @@
+"""
+Quote router: every instrument is served by the fastest healthy source that has it.
+
+An instrument's candidate sources are its own registry row plus any row for the
+same name in the quote_alternates group. Candidates are ranked by health (an
+open http_policy circuit breaker sorts last), then by whether the source
+carries the fields the caller needs (only NSE has advances/declines), then by
+the source's recent median latency. Each source is asked once for all the instruments routed to it,
+and all sources are asked concurrently. An instrument falls back to its next
+candidate when its source answers without it, or has not answered after
+that source's hedge delay (its recent p95 latency); the first answer wins.
+
+    quotes = route(load_registry().group('nse_indices'), need=('advances',))
+    quotes['NIFTY 50'].ltp, quotes['NIFTY 50'].source
+
+Every quote records the source that answered; the run report counts answers
+per source (quote_router.<source>) and notes the source of each instrument.
+"""
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from statistics import median
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import http_policy
+from http_policy import get
+from instrument import failure, incr, note
+from registry import load_registry
+
+NSE_INDICES_URL = "https://www.nseindia.com/api/allIndices"
+ALTERNATES = 'quote_alternates'
+
+Quote = namedtuple('Quote', 'ltp chg pct prev year_high year_low advances declines source')
+
+headers = {'User-Agent': 'Mozilla/5.0'}
+
+
+def fetch_nse(symbols):
+    """{index name: Quote} from NSE allIndices"""
+    response = get(NSE_INDICES_URL, headers=headers)
+    response.raise_for_status()
+    data = response.json()
+    wanted = set(symbols)
+    return {
+        item['index']: Quote(item.get('last'), item.get('variation'), item.get('percentChange'),
+                             item.get('previousClose'), item.get('yearHigh'), item.get('yearLow'),
+                             int(item.get('advances') or 0), int(item.get('declines') or 0), 'nse')
+        for item in data.get('data', []) if item.get('index') in wanted
+    }
+
+
+def fetch_tradingview(symbols):
+    from tv_quotes import fetch_tv_quotes
+    return {
+        ticker: Quote(q.get('close'), q.get('change_abs'), q.get('change'), q.get('close[1]'),
+                      q.get('price_52_week_high'), q.get('price_52_week_low'), None, None, 'tradingview')
+        for ticker, q in fetch_tv_quotes(symbols).items()
+    }
+
+
+# fetch: symbols -> {symbol: Quote}; policy: http_policy source giving health and
+# latency; lacks: Quote fields the source always leaves None
+Source = namedtuple('Source', 'fetch policy lacks')
+
+SOURCES = {
+    'nse': Source(fetch_nse, 'nse', ()),
+    'tradingview': Source(fetch_tradingview, 'tradingview', ('advances', 'declines')),
+}
+
+
+def source_rank(source, need=()):
+    """(unhealthy, lacks needed fields, median latency) of a router source; unknown latency sorts last"""
+    spec = SOURCES[source]
+    with http_policy._lock:
+        samples = list(http_policy._load()['latency'].get(spec.policy, []))
+    return (http_policy.is_open(spec.policy), any(f in spec.lacks for f in need),
+            median(samples) if samples else float('inf'))
+
+
+def candidates(instruments, registry=None, need=()):
+    """{name: [(source, symbol), ...] best first} for instruments with at least one routable source"""
+    registry = registry or load_registry()
+    alternates = {}
+    for inst in registry.group(ALTERNATES):
+        alternates.setdefault(inst.name, []).append((inst.source, inst.symbol or inst.name))
+    ranks = {source: source_rank(source, need) for source in SOURCES}
+    routes = {}
+    for inst in instruments:
+        options = [(inst.source, inst.symbol or inst.name)] + alternates.get(inst.name, [])
+        options = list(dict.fromkeys(o for o in options if o[0] in SOURCES))
+        if options:
+            routes[inst.name] = sorted(options, key=lambda o: ranks[o[0]])
+    return routes
+
+
+def route(instruments, registry=None, need=()):
+    """{name: Quote} for every instrument some source answered for"""
+    routes = candidates(instruments, registry, need)
+    level = {name: 0 for name in routes}
+    quotes, futures = {}, {}
+    pool = ThreadPoolExecutor(max_workers=2 * len(SOURCES))
+
+    def launch(names):
+        by_source = {}
+        for name in names:
+            source, symbol = routes[name][level[name]]
+            by_source.setdefault(source, {})[symbol] = name
+        for source, wanted in by_source.items():
+            spec = SOURCES[source]
+            slow_after = http_policy.hedge_delay(spec.policy, http_policy.POLICIES.get(spec.policy, http_policy.POLICIES['default']))
+            future = pool.submit(spec.fetch, list(wanted))
+            futures[future] = (source, wanted, time.monotonic() + slow_after)
+
+    def fall_back(names):
+        """Move unanswered names on to their next candidate"""
+        names = [n for n in names if n not in quotes and level[n] + 1 < len(routes[n])]
+        for name in names:
+            level[name] += 1
+        if names:
+            incr('quote_router.fallbacks', len(names))
+            launch(names)
+
+    launch(list(routes))
+    escalated = set()
+    try:
+        while futures and len(quotes) < len(routes):
+            now = time.monotonic()
+            waits = [slow - now for f, (_, _, slow) in futures.items() if f not in escalated]
+            done, _ = wait(list(futures), timeout=max(min(waits), 0) if waits else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                source, wanted, _ = futures.pop(future)
+                try:
+                    answered = future.result()
+                except Exception as e:
+                    failure(f"router.{source}", 'fetch', e)
+                    answered = {}
+                for symbol, name in wanted.items():
+                    if symbol in answered and name not in quotes:
+                        quotes[name] = answered[symbol]
+                if future not in escalated:
+                    fall_back([n for n in wanted.values() if routes[n][level[n]][0] == source])
+            # Sources still busy past their p95: ask the alternates in parallel
+            now = time.monotonic()
+            for future, (source, wanted, slow) in list(futures.items()):
+                if future not in escalated and now >= slow:
+                    escalated.add(future)
+                    fall_back([n for n in wanted.values() if routes[n][level[n]][0] == source])
+    finally:
+        pool.shutdown(wait=False)
+
+    for name, quote in quotes.items():
+        incr(f"quote_router.{quote.source}")
+        note('quote_sources', name, quote.source)
+    return quotes
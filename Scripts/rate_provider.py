@@ -0,0 +1,102 @@
+"""
+Risk-free rate term structure from the Indian T-bill curve.
+
+The published T-bill yields (91, 182 and 364 day) are downloaded at most once a
+day into Data/risk_free_rates.json. Offline, or when the download fails, the
+last cached curve is used however old it is, and without any cache a flat
+DEFAULT_RATE. The curve is then held in memory for the rest of the process.
+
+Rates are interpolated linearly in days to expiry and held flat beyond the
+shortest and longest bill, so one call turns a vector of TTEs into a vector of
+continuously usable decimal rates:
+
+    curve = get_curve()
+    r = curve.rate(T)          # T in years, scalar or array
+"""
+import json
+import os
+import re
+from datetime import datetime, timedelta
+import numpy as np
+
+RATES_URL = "https://techfanetechnologies.github.io/risk_free_interest_rate/RiskFreeInterestRate.json"
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data', 'risk_free_rates.json')
+DEFAULT_RATE = 6.0  # percent, used only when no curve has ever been fetched
+TBILL = re.compile(r'(\d+)\s*day\s*t-?bills?', re.IGNORECASE)
+
+_curve = {}
+
+
+class RateCurve:
+    """Yields (percent) by tenor in days"""
+
+    __slots__ = ('days', 'rates', 'as_of', 'source')
+
+    def __init__(self, points, as_of, source):
+        points = sorted(points)
+        self.days = np.array([d for d, _ in points], dtype=np.float64)
+        self.rates = np.array([r for _, r in points], dtype=np.float64) / 100.0
+        self.as_of = as_of
+        self.source = source
+
+    def rate(self, T):
+        """Decimal rate for time(s) to expiry `T` in years"""
+        return np.interp(np.asarray(T, dtype=np.float64) * 365.0, self.days, self.rates)
+
+    def to_json(self):
+        return {'as_of': self.as_of, 'source': self.source,
+                'curve': [[int(d), round(float(r) * 100, 4)] for d, r in zip(self.days, self.rates)]}
+
+
+def ist_today():
+    return (datetime.utcnow() + timedelta(hours=5, minutes=30)).strftime('%Y-%m-%d')
+
+
+def parse_rates(records):
+    """[(days, percent)] of the T-bill rows in the published JSON"""
+    points = {}
+    for row in records:
+        match = TBILL.search(str(row.get('GovernmentSecurityName', '')))
+        try:
+            if match:
+                points[int(match.group(1))] = float(row['Percent'])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return sorted(points.items())
+
+
+def fetch_curve():
+    from http_policy import get
+    records = get(RATES_URL).json()
+    points = parse_rates(records if isinstance(records, list) else records.get('data', []))
+    if not points:
+        raise ValueError("No T-bill rates in the published data")
+    return RateCurve(points, ist_today(), RATES_URL)
+
+
+def load_cache(path=CACHE_PATH):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return RateCurve([tuple(p) for p in data['curve']], data.get('as_of'), data.get('source', path))
+    except (FileNotFoundError, KeyError, TypeError, ValueError):
+        return None
+
+
+def get_curve(refresh=False, path=CACHE_PATH):
+    """Today's curve: memory, then a same-day cache, then the network, then any cache, then DEFAULT_RATE"""
+    if _curve.get('curve') is not None and not refresh:
+        return _curve['curve']
+    cached = load_cache(path)
+    curve = cached if cached is not None and cached.as_of == ist_today() and not refresh else None
+    if curve is None:
+        try:
+            curve = fetch_curve()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(curve.to_json(), f, indent=1)
+        except Exception as e:
+            curve = cached or RateCurve([(364, DEFAULT_RATE)], None, 'default')
+            print(f"Risk-free rates unavailable ({e}); using {curve.source} curve as of {curve.as_of}")
+    _curve['curve'] = curve
+    return curve
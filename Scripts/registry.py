@@ -0,0 +1,64 @@
+"""
+Instrument registry: every tracked symbol lives in Data/instruments.csv.
+
+Columns are Group (which output a row belongs to, in output order), Name (display
+or lookup name), Source (which API serves it) and Symbol (the ticker that API
+expects). The loader builds hash indexes by group, source, symbol and normalized
+name once at startup, and drops duplicate rows within a group.
+"""
+import csv
+import os
+from collections import namedtuple
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data', 'instruments.csv')
+
+Instrument = namedtuple('Instrument', 'group name source symbol')
+
+
+def normalize(name):
+    return ' '.join(name.split()).casefold()
+
+
+class Registry:
+
+    def __init__(self, instruments):
+        self.instruments = []
+        self.by_group, self.by_source, self.by_symbol, self.by_name = {}, {}, {}, {}
+        seen = set()
+        for inst in instruments:
+            key = (inst.group, normalize(inst.name))
+            if key in seen:
+                print(f"Registry: duplicate {inst.name!r} in {inst.group}, ignored")
+                continue
+            seen.add(key)
+            self.instruments.append(inst)
+            self.by_group.setdefault(inst.group, []).append(inst)
+            self.by_source.setdefault(inst.source, []).append(inst)
+            if inst.symbol:
+                self.by_symbol.setdefault(inst.symbol, []).append(inst)
+            self.by_name.setdefault(normalize(inst.name), []).append(inst)
+
+    def group(self, group, source=None):
+        """Instruments of a group in output order, optionally only those from one source"""
+        return [i for i in self.by_group.get(group, []) if source is None or i.source == source]
+
+    def names(self, group):
+        return [i.name for i in self.group(group)]
+
+    def symbols(self, group, source=None):
+        """Deduplicated symbols a fetcher has to request for a group"""
+        return list(dict.fromkeys(i.symbol for i in self.group(group, source) if i.symbol))
+
+    def symbol_map(self, group, source=None):
+        """{name: symbol} for a group"""
+        return {i.name: i.symbol for i in self.group(group, source)}
+
+    def lookup(self, name):
+        return self.by_name.get(normalize(name), [])
+
+
+def load_registry(path=REGISTRY_PATH):
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = [Instrument(r['Group'].strip(), r['Name'], r['Source'].strip(), r['Symbol'].strip())
+                for r in csv.DictReader(f) if r['Group'].strip()]
+    return Registry(rows)
@@ -0,0 +1,151 @@
+"""
+Freshness scheduler for the watch-list fetchers.
+
+The workflow fires every 15 minutes; this decides which scripts actually have
+new data to fetch at that moment. Every source has an IST update window, a
+calendar (NSE trading days, weekdays or every day) and a minimum interval.
+Sources whose data settles after the close (closing prices, EOD boards) get one
+final run after their window ends. The time of each source's last successful
+run is kept in Data/scheduler_state.json, which the workflow commits with the
+data, so decisions carry over between runs.
+
+    python Scripts/scheduler.py                 # show what is due now
+    python Scripts/scheduler.py --run           # run what is due
+    python Scripts/scheduler.py --run --force   # run everything
+    python Scripts/scheduler.py --at "2026-01-09 15:45"
+
+In GitHub Actions the plain listing also sets the step output `due` (true/false),
+so the workflow can skip installing dependencies when nothing is due.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from market_calendar import is_trading_day
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join('Data', 'scheduler_state.json')
+GRACE = timedelta(minutes=3)  # cron start jitter
+
+Source = namedtuple('Source', 'script calendar start end interval post_close')
+
+# Windows are IST; interval in minutes; calendar is "nse", "weekdays" or "daily"
+SCHEDULE = [
+    Source('nseindices.py', 'weekdays', '06:30', '23:59', 15, False),  # GIFT NIFTY and FX trade beyond NSE hours
+    Source('nifty50_top10.py', 'nse', '09:15', '15:30', 15, True),
+    Source('etf_fetch.py', 'nse', '09:15', '15:30', 15, True),
+    Source('global_data.py', 'weekdays', '05:30', '23:59', 15, False),
+    Source('global_commodity.py', 'weekdays', '05:30', '23:59', 15, False),
+    Source('eco.py', 'daily', '06:00', '23:59', 60, False),
+    Source('cash.py', 'nse', '16:00', '21:30', 30, False),  # provisional FII/DII cash is published in the evening
+    Source('nifty_options.py', 'nse', '09:15', '15:40', 15, False),
+    Source('fetch_emails.py', 'daily', '06:00', '23:59', 30, False),
+    Source('BSE.py', 'nse', '09:15', '15:30', 15, True),
+]
+
+
+def ist_now():
+    return datetime.utcnow() + timedelta(hours=5, minutes=30)
+
+
+def parse_time(day, hhmm):
+    return datetime.combine(day, datetime.strptime(hhmm, '%H:%M').time())
+
+
+def calendar_open(calendar, day):
+    if calendar == 'nse':
+        return is_trading_day(day)
+    if calendar == 'weekdays':
+        return day.weekday() < 5
+    return True
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+
+
+def last_success(state, script):
+    entry = state.get(script, {})
+    return datetime.fromisoformat(entry['last_success']) if entry.get('last_success') else None
+
+
+def due(source, now, state):
+    """(due?, reason) for one source at IST time `now`"""
+    if not calendar_open(source.calendar, now.date()):
+        return False, 'closed today'
+    start, end = parse_time(now.date(), source.start), parse_time(now.date(), source.end)
+    last = last_success(state, source.script)
+    if start <= now <= end:
+        if last is None or now - last >= timedelta(minutes=source.interval) - GRACE:
+            return True, 'in window'
+        return False, f"ran {int((now - last).total_seconds() // 60)} min ago"
+    if source.post_close and now > end and (last is None or last < end):
+        return True, 'final run after close'
+    return False, 'outside window'
+
+
+def run_script(script):
+    start = time.perf_counter()
+    code = subprocess.call([sys.executable, os.path.join(SCRIPTS_DIR, script)])
+    return code, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fetchers whose sources have fresh data")
+    parser.add_argument('--run', action='store_true', help='run the due scripts (default: only list them)')
+    parser.add_argument('--force', action='store_true', help='treat every script as due')
+    parser.add_argument('--only', nargs='+', help='restrict to these scripts')
+    parser.add_argument('--at', help='pretend the IST time is "YYYY-MM-DD HH:MM"')
+    parser.add_argument('--state', default=STATE_FILE)
+    args = parser.parse_args()
+
+    now = datetime.strptime(args.at, '%Y-%m-%d %H:%M') if args.at else ist_now()
+    state = load_state(args.state)
+    sources = [s for s in SCHEDULE if not args.only or s.script in args.only]
+
+    plan = []
+    for source in sources:
+        is_due, reason = (True, 'forced') if args.force else due(source, now, state)
+        print(f"{source.script:<22} {'RUN ' if is_due else 'skip'}  {reason}")
+        if is_due:
+            plan.append(source)
+    if os.environ.get('GITHUB_OUTPUT'):
+        with open(os.environ['GITHUB_OUTPUT'], 'a') as f:
+            f.write(f"due={'true' if plan else 'false'}\n")
+    if not args.run:
+        return
+
+    # One run id for every script, so a source's open circuit breaker (http_policy) is shared
+    os.environ.setdefault('HTTP_RUN_ID', f"scheduler-{now:%Y%m%dT%H%M}")
+    failed = []
+    for source in plan:
+        print(f"--- {source.script}", flush=True)
+        code, seconds = run_script(source.script)
+        entry = state.setdefault(source.script, {})
+        entry.update(last_run=now.isoformat(timespec='minutes'), exit_code=code, seconds=round(seconds, 2))
+        if code == 0:
+            entry['last_success'] = now.isoformat(timespec='minutes')
+        else:
+            failed.append(source.script)
+        save_state(state, args.state)
+    print(f"Ran {len(plan)} of {len(sources)} scripts" + (f", failed: {', '.join(failed)}" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
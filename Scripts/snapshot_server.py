@@ -0,0 +1,411 @@
+"""
+Local snapshot server: the latest watch-list data from memory, over HTTP.
+
+Every feed (an output CSV of one fetcher) is parsed once when it changes and
+held in memory as ready-to-send JSON and CSV bodies with their ETags, so a read
+is a dict lookup and an unchanged feed costs a 304. Feeds are refreshed on
+their own cadence: a fetcher in the scheduler's SCHEDULE is re-run when the
+scheduler would consider it due (its IST window, calendar and interval), and
+every feed is reloaded as soon as its CSV changes on disk, whoever wrote it.
+
+    python Scripts/snapshot_server.py                       # fetch and serve on 127.0.0.1:8780
+    python Scripts/snapshot_server.py --watch-only          # only serve what lands in Data/
+    python Scripts/snapshot_server.py --port 9000 --feeds indices etf options
+
+    GET /                   feed list with update times and ETags
+    GET /<feed>.json        {"feed", "updated", "loaded", "columns", "rows": [{column: value}]}
+    GET /<feed>.csv         the CSV as written by the fetcher
+    GET /<feed>             same as .json
+    GET /events?feeds=indices,etf,global,options
+                            server-sent events: changes as they land
+
+Run from the repo root, like the fetchers. Requests with a matching
+If-None-Match get 304 Not Modified.
+
+/events first sends a `snapshot` event per subscribed feed (all feeds by
+default), {"f": feed, "u": update time, "columns": [...], "r": {key: row}},
+then a `diff` event whenever a feed reloads, carrying only what moved:
+
+    {"f": "indices", "u": "10-Jan 09:30",
+     "c": {"NIFTY 50": {"LTP": "25690", "%": "-0.72%"}},   changed fields
+     "a": {key: row}, "d": [key, ...],                    added and deleted rows
+     "o": [key, ...]}                                     new row order, only if it moved
+
+Rows are keyed by the feed's key columns joined with "|". A feed whose columns
+change gets a fresh snapshot event instead of a diff. Event ids are sequence
+numbers; a client reconnecting with Last-Event-ID is replayed the events it
+missed, or sent snapshots if they are no longer held.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timedelta
+from email.utils import formatdate
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from scheduler import SCHEDULE, SCRIPTS_DIR, STATE_FILE, due, ist_now, load_state
+
+# name: URL path; path: CSV the script writes; script: fetcher that refreshes it (None: file watch only);
+# key: columns identifying a row in diffs (default the first column)
+Feed = namedtuple('Feed', 'name path script key', defaults=(None,))
+
+FEEDS = [
+    Feed('indices', 'Data/nse_all_indices.csv', 'nseindices.py'),
+    Feed('top10', 'Data/nifty50_stocks_top10.csv', 'nifty50_top10.py'),
+    Feed('etf', 'Data/etf.csv', 'etf_fetch.py'),
+    Feed('global', 'Data/GLOBAL_DATA.csv', 'global_data.py'),
+    Feed('commodities', 'Data/GLOBAL_COMMODITIES.csv', 'global_commodity.py'),
+    Feed('bse', 'Data/BSE.csv', 'BSE.py'),
+    Feed('options', 'Data/Option.csv', 'nifty_options.py', ('STRIKE',)),
+    Feed('economic', 'Data/Economic.csv', 'eco.py', ('Date', 'Time', 'Area', 'Title')),
+    Feed('cash', 'Data/Cash.csv', 'cash.py'),
+    Feed('email', 'Data/email.csv', 'fetch_emails.py'),
+    Feed('nav', 'Data/Daily_NAV.csv', None),
+    Feed('fii', 'Data/FII.csv', None),
+    Feed('closing', 'Data/QuarterlyClosing.csv', None),
+]
+
+WATCH_INTERVAL = 1.0   # seconds between checks of the CSVs on disk
+FETCH_TICK = 30.0      # seconds between checks of which fetchers are due
+MAX_FETCHES = 3        # fetchers running at once
+HISTORY = 500          # events kept for clients resuming with Last-Event-ID
+KEEPALIVE = 15.0       # seconds of silence before an event stream gets a comment line
+QUEUE_SIZE = 256       # events a slow client may fall behind before it is dropped
+TRAILER_LABELS = ('update time', 'updated time', 'last updated')
+
+
+def split_trailer(rows):
+    """(data rows, update time) with the trailing "Update Time" row taken off"""
+    if rows:
+        cells = [c.strip() for c in rows[-1]]
+        for i, cell in enumerate(cells):
+            if cell.lower().startswith(TRAILER_LABELS):
+                return rows[:-1], next((c for c in cells[i + 1:] if c), None)
+    return rows, None
+
+
+class Snapshot:
+    """One parsed version of a feed, with the response bodies prebuilt"""
+
+    __slots__ = ('feed', 'columns', 'rows', 'keyed', 'updated', 'loaded', 'mtime', 'csv', 'json', 'etag')
+
+    def __init__(self, feed, content, mtime=None):
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        header, body = (rows[0], rows[1:]) if rows else ([], [])
+        body, self.updated = split_trailer([r for r in body if any(c.strip() for c in r)])
+        self.feed = feed
+        self.columns = header
+        self.rows = [dict(zip(header, r)) for r in body]
+        self.keyed, seen = {}, {}
+        key_columns = feed.key or header[:1]
+        for row in self.rows:
+            key = '|'.join(row.get(c, '') for c in key_columns)
+            seen[key] = seen.get(key, 0) + 1   # repeated keys become key#2, key#3, ... in file order
+            self.keyed[key if seen[key] == 1 else f"{key}#{seen[key]}"] = row
+        self.loaded = datetime.now().astimezone().isoformat(timespec='seconds')
+        self.mtime = mtime
+        self.csv = content
+        self.json = json.dumps({'feed': feed.name, 'updated': self.updated, 'loaded': self.loaded,
+                                'columns': self.columns, 'rows': self.rows},
+                               ensure_ascii=False, separators=(',', ':')).encode()
+        self.etag = hashlib.sha1(content).hexdigest()[:16]
+
+    def summary(self):
+        return {'updated': self.updated, 'loaded': self.loaded, 'rows': len(self.rows), 'etag': self.etag,
+                'json': f"/{self.feed.name}.json", 'csv': f"/{self.feed.name}.csv"}
+
+    def full(self):
+        return {'f': self.feed.name, 'u': self.updated, 'columns': self.columns, 'r': self.keyed}
+
+
+def diff(old, new):
+    """Compact diff taking snapshot `old` to `new` (see the module docstring)"""
+    changed, added = {}, {}
+    for key, row in new.keyed.items():
+        before = old.keyed.get(key)
+        if before is None:
+            added[key] = row
+            continue
+        fields = {c: v for c, v in row.items() if before.get(c) != v}
+        if fields:
+            changed[key] = fields
+    deleted = [k for k in old.keyed if k not in new.keyed]
+    out = {'f': new.feed.name}
+    if new.updated != old.updated:
+        out['u'] = new.updated
+    if changed:
+        out['c'] = changed
+    if added:
+        out['a'] = added
+    if deleted:
+        out['d'] = deleted
+    expected = [k for k in old.keyed if k in new.keyed] + list(added)
+    if list(new.keyed) != expected:
+        out['o'] = list(new.keyed)
+    return out
+
+
+def sse(event, seq, payload):
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return f"event: {event}\nid: {seq}\ndata: {data}\n\n".encode()
+
+
+class SnapshotServer:
+
+    def __init__(self, feeds=FEEDS, fetch=True):
+        self.feeds = {f.name: f for f in feeds}
+        self.fetch = fetch
+        self.snapshots = {}
+        self.schedule = {s.script: s for s in SCHEDULE}
+        self.state = load_state(STATE_FILE)   # last runs, so a fresh start does not re-fetch everything
+        self.running = set()
+        self.tasks = set()
+        self.fetch_slots = None
+        self.seq = 0
+        self.history = deque(maxlen=HISTORY)   # (seq, feed name, encoded event)
+        self.subscribers = {}                  # queue: feed names it wants
+
+    # -- snapshots --
+
+    def reload(self, feed, settle=True):
+        """Parse the feed's CSV if it changed on disk; True when a new snapshot was taken.
+
+        The fetchers write their CSVs in place, so with `settle` a file modified
+        within the last WATCH_INTERVAL is left for the next poll rather than read
+        half-written. Without it (the writer is known to have exited) it is read at once.
+        """
+        try:
+            stat = os.stat(feed.path)
+        except FileNotFoundError:
+            return False
+        if settle and time.time() - stat.st_mtime < WATCH_INTERVAL:
+            return False
+        mtime = (stat.st_mtime_ns, stat.st_size)
+        current = self.snapshots.get(feed.name)
+        if current is not None and current.mtime == mtime:
+            return False
+        with open(feed.path, 'rb') as f:
+            content = f.read()
+        if current is not None and current.csv == content:
+            current.mtime = mtime
+            return False
+        try:
+            snap = Snapshot(feed, content, mtime)
+        except (csv.Error, UnicodeDecodeError) as e:
+            print(f"{feed.name}: could not parse {feed.path}: {e}")
+            return False
+        self.snapshots[feed.name] = snap
+        print(f"{feed.name}: loaded {len(snap.rows)} rows from {feed.path}")
+        if current is None or current.columns != snap.columns:
+            self.publish(feed.name, 'snapshot', snap.full())
+        else:
+            self.publish(feed.name, 'diff', diff(current, snap))
+        return True
+
+    # -- push --
+
+    def publish(self, name, event, payload):
+        self.seq += 1
+        message = sse(event, self.seq, payload)
+        self.history.append((self.seq, name, message))
+        for queue, wanted in list(self.subscribers.items()):
+            if name not in wanted:
+                continue
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too far behind: cut it off, it resumes from Last-Event-ID
+                del self.subscribers[queue]
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def backlog(self, wanted, last_id):
+        """Events a client needs on connecting: missed ones if all still held, else snapshots"""
+        if last_id is not None and self.history and self.history[0][0] <= last_id + 1 and last_id <= self.seq:
+            return [message for seq, name, message in self.history if seq > last_id and name in wanted]
+        return [sse('snapshot', self.seq, self.snapshots[name].full()) for name in wanted if name in self.snapshots]
+
+    async def stream(self, writer, target, headers):
+        query = target.partition('?')[2]
+        params = dict(p.partition('=')[::2] for p in query.split('&') if p)
+        wanted = set(params['feeds'].split(',')) & set(self.feeds) if params.get('feeds') else set(self.feeds)
+        try:
+            last_id = int(headers['last-event-id'])
+        except (KeyError, ValueError):
+            last_id = None
+
+        writer.write(('HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n'
+                      'Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n').encode('latin-1'))
+        queue = asyncio.Queue(QUEUE_SIZE)
+        for message in self.backlog(wanted, last_id):
+            writer.write(message)
+        self.subscribers[queue] = wanted
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    message = b": keepalive\n\n"
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self.subscribers.pop(queue, None)
+
+    async def watch(self):
+        while True:
+            for feed in self.feeds.values():
+                self.reload(feed)
+            await asyncio.sleep(WATCH_INTERVAL)
+
+    # -- fetchers --
+
+    async def run_fetcher(self, feed):
+        started = ist_now()
+        try:
+            async with self.fetch_slots:
+                started = ist_now()
+                proc = await asyncio.create_subprocess_exec(
+                    sys.executable, os.path.join(SCRIPTS_DIR, feed.script),
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+                code = await proc.wait()
+        except OSError as e:
+            print(f"{feed.name}: could not start {feed.script}: {e}")
+            code = None
+        finally:
+            self.running.discard(feed.name)
+        entry = self.state.setdefault(feed.script, {})
+        entry.update(last_run=started.isoformat(timespec='minutes'), exit_code=code)
+        if code == 0:
+            entry['last_success'] = started.isoformat(timespec='minutes')
+        if code is not None:
+            print(f"{feed.name}: {feed.script} exited {code} after {(ist_now() - started).total_seconds():.1f}s")
+            self.reload(feed, settle=False)
+
+    async def refresh(self):
+        self.fetch_slots = asyncio.Semaphore(MAX_FETCHES)
+        while True:
+            now = ist_now()
+            for feed in self.feeds.values():
+                source = self.schedule.get(feed.script)
+                if source is None or feed.name in self.running:
+                    continue
+                # A failed fetch is not retried before the source's interval is up
+                last_run = self.state.get(feed.script, {}).get('last_run')
+                if last_run and now - datetime.fromisoformat(last_run) < timedelta(minutes=source.interval):
+                    continue
+                is_due, _ = due(source, now, self.state)
+                if is_due:
+                    self.running.add(feed.name)
+                    task = asyncio.create_task(self.run_fetcher(feed))
+                    self.tasks.add(task)   # the loop only holds tasks weakly
+                    task.add_done_callback(self.tasks.discard)
+            await asyncio.sleep(FETCH_TICK)
+
+    # -- HTTP --
+
+    def respond(self, method, target, headers):
+        """(status, headers, body) for one request"""
+        if method not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD'}, b''
+        path = target.split('?', 1)[0].strip('/')
+        if path in ('', 'feeds'):
+            listing = {name: snap.summary() for name, snap in self.snapshots.items()}
+            return 200, {'Content-Type': 'application/json'}, json.dumps(listing, separators=(',', ':')).encode()
+
+        name, _, kind = path.partition('.')
+        kind = kind or 'json'
+        if name not in self.feeds or kind not in ('json', 'csv'):
+            return 404, {'Content-Type': 'text/plain'}, f"no feed {path}".encode()
+        snap = self.snapshots.get(name)
+        if snap is None:
+            return 503, {'Content-Type': 'text/plain', 'Retry-After': '5'}, f"{name} not loaded yet".encode()
+
+        etag = f'"{snap.etag}-{kind}"'
+        common = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [t.strip() for t in headers.get('if-none-match', '').split(',')]:
+            return 304, common, b''
+        if kind == 'csv':
+            return 200, {**common, 'Content-Type': 'text/csv; charset=utf-8'}, snap.csv
+        return 200, {**common, 'Content-Type': 'application/json'}, snap.json
+
+    async def handle(self, reader, writer):
+        """HTTP/1.1 with keep-alive; requests have no body"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, version = line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = header.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                if method == 'GET' and target.split('?', 1)[0].strip('/') == 'events':
+                    await self.stream(writer, target, headers)
+                    break
+                status, extra, body = self.respond(method, target, headers)
+                close = version == 'HTTP/1.0' or headers.get('connection', '').lower() == 'close'
+                head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", f"Date: {formatdate(usegmt=True)}",
+                        f"Content-Length: {len(body)}", 'Access-Control-Allow-Origin: *',
+                        f"Connection: {'close' if close else 'keep-alive'}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        for feed in self.feeds.values():
+            self.reload(feed)
+        server = await asyncio.start_server(self.handle, host, port)
+        self.tasks.add(asyncio.create_task(self.watch()))
+        if self.fetch:
+            self.tasks.add(asyncio.create_task(self.refresh()))
+        print(f"Serving {len(self.snapshots)} of {len(self.feeds)} feeds on http://{host}:{port}/"
+              + ("" if self.fetch else " (watch only)"))
+        async with server:
+            await server.serve_forever()
+
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 404: 'Not Found', 405: 'Method Not Allowed',
+               503: 'Service Unavailable'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the latest watch-list snapshots as JSON and CSV")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8780)
+    parser.add_argument('--feeds', nargs='+', choices=[f.name for f in FEEDS], help='serve only these feeds')
+    parser.add_argument('--watch-only', action='store_true', help="don't run fetchers, only reload changed CSVs")
+    args = parser.parse_args()
+
+    feeds = [f for f in FEEDS if not args.feeds or f.name in args.feeds]
+    try:
+        asyncio.run(SnapshotServer(feeds, fetch=not args.watch_only).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+TradingView quotes for many tickers in one scanner request.
+
+fetch_tv_quotes() posts every ticker to the global scan endpoint at once. Any
+ticker the scan does not return, or every ticker if the scan itself fails, is
+retried through the per-symbol endpoint concurrently rather than one by one.
+"""
+import os
+import sys
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from instrument import failure, timer
+from http_policy import get, post
+
+SCAN_URL = "https://scanner.tradingview.com/global/scan"
+SYMBOL_URL = "https://scanner.tradingview.com/symbol?symbol={symbol}&fields={fields}&no_404=true"
+TV_FIELDS = ["close[1]", "change_abs", "price_52_week_high", "price_52_week_low", "close", "change"]
+
+headers = {'User-Agent': 'Mozilla/5.0'}
+
+
+def fetch_symbol(ticker, session=None):
+    return get(SYMBOL_URL.format(symbol=ticker, fields=','.join(TV_FIELDS)), session=session, headers=headers).json()
+
+
+def fetch_tv_quotes(tickers):
+    """Return {ticker: {field: value}}; tickers that could not be fetched are absent"""
+    tickers = list(dict.fromkeys(tickers))
+    quotes = {}
+    if not tickers:
+        return quotes
+
+    try:
+        payload = {"symbols": {"tickers": tickers, "query": {"types": []}}, "columns": TV_FIELDS}
+        response = post(SCAN_URL, json=payload, headers=headers)
+        response.raise_for_status()
+        with timer('tradingview.parse'):
+            for row in response.json().get('data', []):
+                quotes[row['s']] = dict(zip(TV_FIELDS, row['d']))
+    except (requests.RequestException, ValueError, KeyError) as e:
+        failure('tradingview', 'scan')
+        print(f"TradingView scan failed ({e}), falling back to per-symbol requests")
+
+    missing = [t for t in tickers if t not in quotes]
+    if missing:
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=min(8, len(missing))) as pool:
+            def fetch(ticker):
+                try:
+                    return ticker, fetch_symbol(ticker, session)
+                except (requests.RequestException, ValueError):
+                    return ticker, None
+
+            for ticker, data in pool.map(fetch, missing):
+                if data:
+                    quotes[ticker] = data
+                else:
+                    failure('tradingview', ticker)
+    return quotes
@@ -0,0 +1,145 @@
+"""
+Volatility smile fitting and term-structure surface.
+
+Each expiry's smile is fitted as a vega-weighted least-squares cubic B-spline of
+total implied variance w(k) = iv^2 * T in log-moneyness k = ln(K / F), using the
+OTM side of the chain. Expiries are joined into a VolSurface that interpolates
+total variance linearly in T at fixed k. Outside the fitted k range the smile is
+held flat in implied vol.
+
+Solving the IVs of one expiry of ~100 strikes takes a few milliseconds and the
+spline fit itself well under one, so the whole surface is rebuilt on every refresh.
+"""
+import time
+import numpy as np
+from scipy.interpolate import make_lsq_spline
+from scipy.special import ndtri
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from iv_calculator import black76_vega, implied_vol
+
+MIN_POINTS = 5
+INTERIOR_KNOTS = 4
+DELTA_GRID = 401
+
+
+class SmileFit:
+    """Fitted smile of one expiry"""
+
+    def __init__(self, expiry, T, forward, k, w, weights, fit_ms):
+        self.expiry = expiry
+        self.T = T
+        self.forward = forward
+        self.k_min, self.k_max = float(k.min()), float(k.max())
+        self.points = len(k)
+        self.fit_ms = fit_ms
+        self._spline = self._fit(k, w, weights)
+
+    @staticmethod
+    def _fit(k, w, weights):
+        order = np.argsort(k)
+        k, w, weights = k[order], w[order], weights[order]
+        n_knots = min(INTERIOR_KNOTS, max(len(k) - 4, 0))
+        interior = np.quantile(k, np.linspace(0, 1, n_knots + 2)[1:-1]) if n_knots else np.array([])
+        knots = np.concatenate([[k[0]] * 4, interior, [k[-1]] * 4])
+        try:
+            return make_lsq_spline(k, w, knots, k=3, w=weights)
+        except (ValueError, np.linalg.LinAlgError):
+            # Degenerate knot placement (duplicate strikes etc.): plain cubic without interior knots
+            return make_lsq_spline(k, w, np.concatenate([[k[0]] * 4, [k[-1]] * 4]), k=3, w=weights)
+
+    def total_variance(self, k):
+        k = np.asarray(k, dtype=np.float64)
+        inside = np.clip(k, self.k_min, self.k_max)
+        return np.maximum(self._spline(inside), 1e-12)
+
+    def iv(self, k):
+        """Implied vol at log-moneyness k (flat beyond the fitted range)"""
+        return np.sqrt(self.total_variance(k) / self.T)
+
+    def iv_at_strike(self, strike):
+        return self.iv(np.log(np.asarray(strike, dtype=np.float64) / self.forward))
+
+    def delta_strikes(self, delta=0.25):
+        """Log-moneyness of the `delta` call and -`delta` put (forward, undiscounted deltas)"""
+        pad = 0.5 * (self.k_max - self.k_min) + 1e-3
+        k = np.linspace(self.k_min - pad, self.k_max + pad, DELTA_GRID)
+        sqrt_w = np.sqrt(self.total_variance(k))
+        d1 = -k / sqrt_w + 0.5 * sqrt_w
+        # N(d1) falls as k rises; invert the target delta on the grid
+        target_call, target_put = ndtri(delta), ndtri(1.0 - delta)
+        k_call = np.interp(-target_call, -d1, k)
+        k_put = np.interp(-target_put, -d1, k)
+        return k_call, k_put
+
+    def metrics(self):
+        k_call, k_put = self.delta_strikes(0.25)
+        atm = float(self.iv(0.0))
+        iv_call, iv_put = float(self.iv(k_call)), float(self.iv(k_put))
+        return {
+            'ATM IV': atm * 100,
+            'RR25': (iv_call - iv_put) * 100,
+            'BF25': (0.5 * (iv_call + iv_put) - atm) * 100,
+        }
+
+
+def fit_smile(expiry, T, forward, strikes, call_prices, put_prices, r=0.0):
+    """Solve IVs for the OTM side of one chain and fit its smile; None if too few points"""
+    start = time.perf_counter()
+    strikes = np.asarray(strikes, dtype=np.float64)
+    is_call = strikes >= forward
+    prices = np.where(is_call, call_prices, put_prices).astype(np.float64)
+    iv = implied_vol(prices, forward, strikes, T, r, is_call)
+    ok = np.isfinite(iv) & (prices > 0)
+    if ok.sum() < MIN_POINTS or T <= 0:
+        return None
+    k = np.log(strikes[ok] / forward)
+    w = iv[ok] ** 2 * T
+    vega = black76_vega(forward, strikes[ok], T, iv[ok], r)
+    weights = np.sqrt(np.maximum(vega / vega.max(), 1e-6))
+    fit = SmileFit(expiry, T, forward, k, w, weights, 0.0)
+    fit.fit_ms = (time.perf_counter() - start) * 1000
+    return fit
+
+
+class VolSurface:
+    """Smiles joined across expiries; query by strike and time to expiry"""
+
+    def __init__(self, fits):
+        self.fits = sorted((f for f in fits if f is not None), key=lambda f: f.T)
+        self.T = np.array([f.T for f in self.fits])
+        self.forwards = np.array([f.forward for f in self.fits])
+
+    def __len__(self):
+        return len(self.fits)
+
+    def forward(self, T):
+        return float(np.interp(T, self.T, self.forwards))
+
+    def total_variance(self, k, T):
+        """w(k, T): linear in T between expiries, flat vol before the first and after the last"""
+        if not self.fits:
+            raise ValueError("Empty surface")
+        i = int(np.searchsorted(self.T, T))
+        if i == 0:
+            return self.fits[0].total_variance(k) * T / self.T[0]
+        if i == len(self.fits):
+            return self.fits[-1].total_variance(k) * T / self.T[-1]
+        t0, t1 = self.T[i - 1], self.T[i]
+        a = (T - t0) / (t1 - t0)
+        return (1 - a) * self.fits[i - 1].total_variance(k) + a * self.fits[i].total_variance(k)
+
+    def iv(self, strike, T):
+        k = np.log(np.asarray(strike, dtype=np.float64) / self.forward(T))
+        return np.sqrt(self.total_variance(k, T) / T)
+
+    def term_structure(self):
+        """One row per expiry with ATM IV, 25 delta risk reversal and butterfly (vol points)"""
+        rows = []
+        for f in self.fits:
+            rows.append({'Expiry': f.expiry, 'DTE': round(f.T * 365, 2), 'Forward': round(float(f.forward), 2),
+                         **{name: round(v, 2) for name, v in f.metrics().items()},
+                         'Points': f.points, 'Fit ms': round(f.fit_ms, 3)})
+        return rows